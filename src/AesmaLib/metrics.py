@@ -0,0 +1,139 @@
+"""
+    Модуль сбора метрик времени выполнения (гистограммы длительностей
+    и счётчики событий); выключенный сбор почти ничего не стоит:
+    stamp() возвращает 0 и since() сразу выходит
+"""
+import json
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+import numpy as np
+
+
+class Histogram:
+    """Класс гистограммы длительностей с логарифмическими интервалами
+    (от 1 мкс до 10 с, 10 интервалов на порядок)"""
+    BOUNDS = tuple(np.geomspace(1e-6, 10.0, 71).tolist())
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * (len(Histogram.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float):
+        """добавление длительности, сек"""
+        self.counts[bisect_left(Histogram.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, percent: float) -> float:
+        """оценка перцентиля по верхней границе интервала, сек"""
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100.0
+        accum = 0
+        for index, count in enumerate(self.counts):
+            accum += count
+            if accum >= rank:
+                if index < len(Histogram.BOUNDS):
+                    return min(Histogram.BOUNDS[index], self.maximum)
+                break
+        return self.maximum
+
+    def summary(self) -> dict:
+        """сводка: кол-во, среднее, перцентили и максимум (мс)"""
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count * 1000.0 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000.0,
+            'p90_ms': self.percentile(90) * 1000.0,
+            'p99_ms': self.percentile(99) * 1000.0,
+            'max_ms': self.maximum * 1000.0
+        }
+
+
+class Metrics:
+    """Класс глобального реестра метрик (общий для всех потоков)"""
+    enabled = False
+    _lock = Lock()
+    _histograms = {}
+    _counters = {}
+
+    @staticmethod
+    def setEnabled(state: bool):
+        """включение/выключение сбора метрик"""
+        Metrics.enabled = state
+
+    @staticmethod
+    def stamp() -> float:
+        """отметка начала замера (0 - сбор выключен)"""
+        return perf_counter() if Metrics.enabled else 0.0
+
+    @staticmethod
+    def since(name: str, stamp: float):
+        """добавление длительности с отметки stamp в гистограмму name"""
+        if stamp:
+            Metrics.observe(name, perf_counter() - stamp)
+
+    @staticmethod
+    def observe(name: str, seconds: float):
+        """добавление длительности в гистограмму name"""
+        with Metrics._lock:
+            histogram = Metrics._histograms.get(name)
+            if histogram is None:
+                histogram = Metrics._histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    @staticmethod
+    def count(name: str, value=1):
+        """увеличение счётчика name"""
+        if not Metrics.enabled:
+            return
+        with Metrics._lock:
+            Metrics._counters[name] = Metrics._counters.get(name, 0) + value
+
+    @staticmethod
+    def reset():
+        """сброс всех метрик"""
+        with Metrics._lock:
+            Metrics._histograms.clear()
+            Metrics._counters.clear()
+
+    @staticmethod
+    def snapshot() -> dict:
+        """текущие значения метрик"""
+        with Metrics._lock:
+            return {
+                'histograms': {
+                    name: histogram.summary()
+                    for name, histogram in sorted(Metrics._histograms.items())
+                },
+                'counters': dict(sorted(Metrics._counters.items()))
+            }
+
+    @staticmethod
+    def report() -> str:
+        """текстовый отчёт по метрикам"""
+        data = Metrics.snapshot()
+        lines = [
+            f"{name}: n={item['count']} avg={item['avg_ms']:.3f} p50={item['p50_ms']:.3f} "
+            f"p99={item['p99_ms']:.3f} max={item['max_ms']:.3f} мс"
+            for name, item in data['histograms'].items()
+        ]
+        lines.extend(f'{name}: {value}' for name, value in data['counters'].items())
+        return '\n'.join(lines) if lines else 'нет данных'
+
+    @staticmethod
+    def export(path: str) -> bool:
+        """сохранение метрик в файл JSON"""
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(Metrics.snapshot(), file, ensure_ascii=False, indent=2)
+            return True
+        except OSError:
+            return False
@@ -3,13 +3,17 @@
     Модуль для работы с Advantech Adam5000TCP
 """
 import socket
-from time import sleep
-from threading import Thread
+from time import monotonic, sleep
+from threading import Event, Thread, current_thread
 from dataclasses import dataclass
 from enum import Enum
-from array import array
+import numpy as np
 from loguru import logger
 
+from AesmaLib.metrics import Metrics
+from Classes.Adam.adam_scheduler import CommandScheduler, Priority
+from Classes.Adam.adam_snapshot import Snapshot
+
 class CommandType(Enum):
     """Типы команды"""
     READ = 0    # чтение
@@ -17,6 +21,13 @@ class CommandType(Enum):
     MULTI = 2   # несколько???
 
 
+class LinkState(Enum):
+    """Состояние связи с устройством"""
+    DISCONNECTED = 0    # не подключено
+    CONNECTED = 1       # подключено
+    RECONNECTING = 2    # связь потеряна, идёт переподключение
+
+
 class SlotType(Enum):
     """Тип слота"""
     ALL = 'ALL'
@@ -35,10 +46,28 @@ class Param:
     dig_max: int = 0x0FFF
 
 
+@dataclass(frozen=True)
+class ReadRange:
+    """Класс диапазона чтения слота: элементы массива значений слота
+    (аналоговые - регистры, цифровые - слова по 16 коилов) и период чтения"""
+    slot_type: SlotType
+    start: int
+    count: int
+    every: int = 1      # чтение раз в every тиков опроса
+
+
+# чтение слотов целиком на каждом тике
+DEFAULT_READS = (
+    ReadRange(SlotType.ANALOG, 0, 0x40),
+    ReadRange(SlotType.DIGITAL, 0, 0x08)
+)
+
+
 class CommandBuilder:
     """Класс строителя комманд"""
     def __init__(self, address: int):
         self._address = address
+        self._transaction = 0
         self._default_commands = {
             SlotType.ANALOG: {
                 CommandType.READ: bytearray([
@@ -62,10 +91,30 @@ class CommandBuilder:
             }
         }
 
+    def nextTransaction(self) -> int:
+        """следующий номер транзакции Modbus (поле Transaction ID заголовка MBAP)"""
+        self._transaction = (self._transaction + 1) & 0xFFFF
+        return self._transaction
+
+    def stampTransaction(self, command: bytearray) -> tuple:
+        """копия команды с новым номером транзакции -> (номер, команда)"""
+        transaction = self.nextTransaction()
+        result = bytearray(command)
+        result[0:2] = transaction.to_bytes(2, 'big')
+        return transaction, result
+
     def getCommand_default(self, slot_type, command_type):
         """получение команды по умолчанию"""
         return self._default_commands[slot_type][command_type]
 
+    def buildCommand_read(self, read: ReadRange):
+        """построение комманды для чтения диапазона слота"""
+        result = self._default_commands[read.slot_type][CommandType.READ].copy()
+        coef = 16 if read.slot_type == SlotType.DIGITAL else 1
+        result[8:10] = (read.start * coef).to_bytes(2, 'big')
+        result[10:12] = (read.count * coef).to_bytes(2, 'big')
+        return result
+
     def buildCommand_register(self, command_type, param: Param, value=0):
         """построение комманды для чтения/записи регистра канала"""
         result = self._default_commands[param.slot_type][command_type].copy()
@@ -80,56 +129,167 @@ class CommandBuilder:
         return result
 
     def buildCommand_slot(self, slot_type: SlotType, slot: int, pattern: list):
-        """построение комманды для чтения из регистров слота"""
-        address = slot * (16 if slot_type == SlotType.DIGITAL else 8)
-        result = bytearray([self._address, 0xf])
-        result.extend(address.to_bytes(2, 'big'))
+        """построение комманды для записи значений в каналы слота с первого"""
+        return self.buildCommand_channels(slot_type, slot, 0, pattern)
+
+    def buildCommand_channels(self, slot_type: SlotType, slot: int, channel: int,
+                              values: list):
+        """построение комманды для записи значений в подряд идущие каналы слота
+        (0x0F - цифровые, 0x10 - аналоговые)"""
         if slot_type == SlotType.DIGITAL:
-            bits = "".join(['1' if x else '0' for x in pattern])
-            bits = bits[::-1]
-            values = int(bits, 2).to_bytes(4, 'big')
-            result.extend((len(bits) * 2).to_bytes(2, 'big'))
-            result.extend((len(values) * 2).to_bytes(1, 'big'))
-            for value in values:
-                result.extend(value.to_bytes(2, 'little'))
-        else:
-            result.extend([0x0, 0x8])
-            result.extend(pattern)
-        prefix = bytearray(len(result).to_bytes(6, 'big'))
-        result[0:0] = prefix
+            return self.buildCommand_coils(slot * 16 + channel, values)
+        return self.buildCommand_registers(slot * 8 + channel, values)
+
+    def buildCommand_coils(self, address: int, values: list):
+        """построение комманды для записи нескольких коилов (0x0F)"""
+        data = bytearray((len(values) + 7) // 8)
+        for i, value in enumerate(values):
+            if value:
+                data[i // 8] |= 1 << (i % 8)
+        return self._buildCommand_multi(0x0F, address, len(values), data)
+
+    def buildCommand_registers(self, address: int, values: list):
+        """построение комманды для записи нескольких регистров (0x10)"""
+        data = b''.join(int(value).to_bytes(2, 'big') for value in values)
+        return self._buildCommand_multi(0x10, address, len(values), data)
+
+    def _buildCommand_multi(self, function: int, address: int, count: int, data: bytes):
+        """построение комманды записи нескольких значений:
+        заголовок MBAP, адрес устройства, функция, адрес, кол-во, кол-во байт, данные"""
+        result = bytearray([self._address, function])
+        result.extend(address.to_bytes(2, 'big'))
+        result.extend(count.to_bytes(2, 'big'))
+        result.append(len(data))
+        result.extend(data)
+        result[0:0] = len(result).to_bytes(6, 'big')
         return result
 
 
+class FrameBuffer:
+    """Класс предвыделенного буфера кадра Modbus/TCP с разбором данных на месте"""
+    SIZE = 260          # максимальный размер кадра Modbus/TCP
+    HEADER_SIZE = 6     # размер заголовка MBAP до поля длины включительно
+    DATA_OFFSET = 9     # смещение данных в ответе на чтение
+
+    def __init__(self):
+        self.buffer = bytearray(self.SIZE)
+        self.view = memoryview(self.buffer)
+        self.length = 0
+        # представления данных слотов поверх буфера (создаются один раз)
+        self._slots = {
+            SlotType.ANALOG: np.frombuffer(
+                self.buffer, dtype='>u2', count=0x40, offset=self.DATA_OFFSET
+            ),
+            SlotType.DIGITAL: np.frombuffer(
+                self.buffer, dtype='<u2', count=0x08, offset=self.DATA_OFFSET
+            )
+        }
+
+    @property
+    def transaction(self) -> int:
+        """номер транзакции принятого кадра"""
+        return self.buffer[0] << 8 | self.buffer[1]
+
+    @property
+    def bodySize(self) -> int:
+        """размер кадра после поля длины (из заголовка)"""
+        return self.buffer[4] << 8 | self.buffer[5]
+
+    @property
+    def isError(self) -> bool:
+        """является ли кадр ответом-исключением"""
+        return self.length < 8 or self.buffer[7] & 0x80 != 0
+
+    def payload(self) -> memoryview:
+        """данные ответа на чтение"""
+        if self.isError or self.length <= self.DATA_OFFSET:
+            return self.view[0:0]
+        return self.view[self.DATA_OFFSET:self.DATA_OFFSET + self.buffer[8]]
+
+    def decodeInto(self, slot_type: SlotType, target: np.ndarray, start=0, count=None) -> bool:
+        """разбор данных слота (или count элементов с start) из буфера в массив
+        (без промежуточных копий)"""
+        count = len(target) - start if count is None else count
+        source = self._slots[slot_type][:count]
+        if self.isError or self.length < self.DATA_OFFSET + source.nbytes \
+                or self.buffer[8] != source.nbytes:
+            return False
+        np.copyto(target[start:start + count], source)
+        return True
+
+    def recvFrom(self, sock: socket.socket) -> bool:
+        """приём одного кадра из сокета в буфер"""
+        self.length = 0
+        if not self._recvInto(sock, 0, self.HEADER_SIZE):
+            return False
+        size = self.HEADER_SIZE + self.bodySize
+        if size > self.SIZE or not self._recvInto(sock, self.HEADER_SIZE, size):
+            return False
+        self.length = size
+        return True
+
+    def _recvInto(self, sock: socket.socket, start: int, stop: int) -> bool:
+        """чтение из сокета в часть буфера;
+        таймаут посреди кадра - ошибка потока (дальше кадры не разобрать)"""
+        while start < stop:
+            try:
+                count = sock.recv_into(self.view[start:stop])
+            except socket.timeout:
+                if start:
+                    raise ConnectionError('прерван приём кадра') from None
+                raise
+            if not count:
+                return False
+            start += count
+        return True
+
+
 class Adam5K:
     """Класс для работы с Advantech Adam5000TCP"""
 
-    _states = {
-        "is_connected": False,
-        "is_reading": False,
-        "is_paused": False,
-        "interval": 1.0
-    }
-
-    def __init__(self, host: str, port=502, address=1):
-        self._conn = (host, port)
+    COMMANDS_PER_TICK = 4   # макс. кол-во команд записи, выполняемых за один тик
+    TIMEOUT = 1.0           # таймаут ответа на запрос, сек
+    RETRIES = 2             # кол-во повторов запроса без ответа
+    BACKOFF = (0.5, 8.0)    # начальная и макс. пауза между попытками переподключения, сек
+
+    def __init__(self, host: str = None, port=502, address=1, pipelined=False):
+        # без адреса - источник данных без подключения к устройству
+        # (воспроизведение записи): подключается переопределённым connect
+        self._conn = (host, port) if host else None
+        self._pipelined = pipelined
+        self._states = {
+            "link": LinkState.DISCONNECTED,
+            "is_reading": False,
+            "is_paused": False,
+            "interval": 1.0
+        }
         self._builder = CommandBuilder(address.to_bytes(1, 'big')[0])
         self._sock: socket.socket = None
         self._thread: Thread = None
+        self._wake = Event()    # прерывание ожидания в потоке опроса при остановке
+        self._delay = self.BACKOFF[0]
         self._callback = None
-        self._commands = []
-        self._data = {
-            SlotType.ANALOG: [],
-            SlotType.DIGITAL: []
-        }
+        self._commands = CommandScheduler()
+        self._frame = FrameBuffer()
+        self._snapshot = Snapshot({SlotType.ANALOG: 0x40, SlotType.DIGITAL: 0x08})
+        self._reads = ()
+        self._ticks = 0
+        self._poll_stats = {'ticks': 0, 'dropped': 0}
+        self.setReads(DEFAULT_READS)
 
     def __del__(self):
-        self.disconnect()
+        self._close()
         logger.debug('Adam5K: destroyed')
 
     @property
     def isConnected(self) -> bool:
         """возвращает статус подключения"""
-        return self._states["is_connected"]
+        return self._states["link"] == LinkState.CONNECTED
+
+    @property
+    def linkState(self) -> LinkState:
+        """возвращает состояние связи"""
+        return self._states["link"]
 
     @property
     def isReading(self) -> bool:
@@ -141,38 +301,43 @@ class Adam5K:
         """возвращает занят ли контроллер (есть ли команды в очереди)"""
         return len(self._commands)
 
+    @property
+    def commandStats(self) -> dict:
+        """статистика очереди команд (глубина, объединённые, задержка)"""
+        return self._commands.stats
+
+    @property
+    def pollStats(self) -> dict:
+        """статистика опроса: кол-во тиков и пропущенных из-за опоздания"""
+        return self._poll_stats.copy()
+
+    def setReads(self, reads):
+        """установка диапазонов и периодов чтения слотов (ReadRange)"""
+        self._reads = tuple(
+            (read, self._builder.buildCommand_read(read)) for read in reads
+        )
+
     def setCallback(self, callback):
         """привязка callback функции"""
         self._callback = callback
 
     async def connect(self) -> bool:
         """подключение"""
-        if not self.isConnected:
-            try:
-                self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self._sock.settimeout(0.5)
-                self._sock.connect(self._conn)
-                self._sock.settimeout(None)
-                self._states["is_connected"] = True
-                self._states["is_reading"] = False
-                msg = 'сокет подключен'
-            except socket.error as ex:
-                msg = 'error', self._conn, ex.strerror
-        logger.debug(f'Adam5K:: статус подключения:\t{msg}')
+        if not self.isConnected and not self.isReading:
+            self._close()
+            if self._open():
+                self._states["link"] = LinkState.CONNECTED
         return self.isConnected
 
     async def disconnect(self):
         """отключение"""
-        if not self.isConnected:
+        if self.linkState == LinkState.DISCONNECTED:
             return
-        self._states["is_reading"] = False
-        while self._thread.is_alive():
-            continue
-        self._sock.close()
-        self._sock = None
-        self._states["is_connected"] = False
-        msg = 'сокет отключен'
-        logger.debug(f'Adam5K:: статус отключения:\t{msg}')
+        if self.isReading:
+            self._stopThread()
+        self._close()
+        self._states["link"] = LinkState.DISCONNECTED
+        logger.debug('Adam5K:: статус отключения:\tсокет отключен')
 
     def pause(self):
         """приостановка опроса"""
@@ -192,8 +357,8 @@ class Adam5K:
 
     def setReadingState(self, state: bool) -> bool:
         """вкл/выкл режима чтения"""
-        # проверка подключения
-        if not self.isConnected:
+        # проверка подключения (остановить опрос можно и при потерянной связи)
+        if state and not self.isConnected:
             logger.error('Adam5K:: нет подключения')
             return False
         # проверака текущего статуса потока опроса
@@ -205,64 +370,107 @@ class Adam5K:
         logger.debug(f'Adam5K:: статус опроса {self._states["is_reading"]}')
         return True
 
-    def setChannelValue(self, slot_type: SlotType, slot: int, channel: int, value):
+    def setChannelValue(self, slot_type: SlotType, slot: int, channel: int, value,
+                        priority=Priority.NORMAL):
         """установка значения для канала"""
         command = self._builder.buildCommand_register(
             CommandType.WRITE, Param(slot_type, slot, channel), value
         )
-        self.sendCommand(command)
+        self.sendCommand(command, priority)
 
-    def setSlotValues(self, slot_type: SlotType, slot: int, pattern: list):
+    async def setChannelValueAsync(self, slot_type: SlotType, slot: int, channel: int, value,
+                                   priority=Priority.NORMAL):
+        """установка значения для канала (ассинхронная)"""
+        command = self._builder.buildCommand_register(
+            CommandType.WRITE, Param(slot_type, slot, channel), value
+        )
+        await self.sendCommandAsync(command, priority)
+
+    def setSlotValues(self, slot_type: SlotType, slot: int, pattern: list,
+                      priority=Priority.NORMAL):
         """установка значений для слота"""
         command = self._builder.buildCommand_slot(slot_type, slot, pattern)
-        self.sendCommand(command)
+        self.sendCommand(command, priority)
 
-    def getValue(self, slot_type: SlotType, slot: int, channel: int):
-        """получение значения канала"""
-        if not self.isReading:
+    def getValue(self, slot_type: SlotType, slot: int, channel: int, max_age: float = None):
+        """получение значения канала (при выключенном опросе - из устройства,
+        если нет считанного значения не старше max_age)"""
+        if not self.isReading and not self.hasData(slot_type, max_age):
             self.__readAllValues_fromDevice()
-        result = self.getValue_fromData(slot_type, slot, channel)
+        result = self.getValue_fromData(slot_type, slot, channel, max_age)
         return result
 
+    def setChannelValues(self, slot_type: SlotType, slot: int, values: dict,
+                         priority=Priority.NORMAL):
+        """установка значений для нескольких каналов слота {канал: значение}
+        (по команде на группу подряд идущих каналов)"""
+        for command in self._buildCommands_channels(slot_type, slot, values):
+            self.sendCommand(command, priority)
+
+    async def setChannelValuesAsync(self, slot_type: SlotType, slot: int, values: dict,
+                                    priority=Priority.NORMAL):
+        """установка значений для нескольких каналов слота (ассинхронная)"""
+        for command in self._buildCommands_channels(slot_type, slot, values):
+            await self.sendCommandAsync(command, priority)
+
+    async def getValueAsync(self, slot_type: SlotType, slot: int, channel: int,
+                            max_age: float = None):
+        """получение значения канала (ассинхронная)"""
+        return self.getValue(slot_type, slot, channel, max_age)
+
+    def getSlotData(self, slot_type: SlotType, max_age: float = None):
+        """последние считанные значения слотов (None - если нет данных)"""
+        return self._snapshot.read(slot_type, max_age)
+
+    def hasData(self, slot_type: SlotType, max_age: float = None) -> bool:
+        """есть ли считанные значения слотов не старше max_age"""
+        return max_age is not None and self._snapshot.read(slot_type, max_age) is not None
+
     def getValue_fromDevice(self, slot_type: SlotType, slot: int, channel: int):
         """получение значения канала из устройства"""
         command = self._builder.buildCommand_register(
             CommandType.READ, Param(slot_type, slot, channel)
         )
-        values = self.__execute(command)
+        if not self.__execute(command):
+            return 0
+        values = self._frame.payload()
         if not values:
             return 0
         if slot_type == SlotType.DIGITAL:
-            return values[0] == 1
-        return values[0]
+            return values[0] & 1 == 1
+        return values[0] << 8 | values[1] if len(values) > 1 else 0
 
-    def getValue_fromData(self, slot_type: SlotType, slot: int, channel: int):
-        """чтение значения канала из массива считанных"""
+    def getValue_fromData(self, slot_type: SlotType, slot: int, channel: int,
+                          max_age: float = None):
+        """чтение значения канала из снимка считанных (0 - нет данных)"""
         result = 0
         if 0 <= slot < 8 and 0 <= channel < 8:
             if slot_type == SlotType.DIGITAL:
-                if len(self._data[slot_type]) == 8:
-                    value = self._data[SlotType.DIGITAL][slot]
-                    bits = self.__toBits(value)
-                    result = bits[channel] == '1'
+                value = self._snapshot.getItem(slot_type, slot, max_age)
+                result = value is not None and (value >> channel) & 1 == 1
             else:
-                if len(self._data[slot_type]) == 64:
-                    result = self._data[slot_type][slot * 8 + channel]
+                value = self._snapshot.getItem(slot_type, slot * 8 + channel, max_age)
+                result = 0 if value is None else value
         return result
 
-    def sendCommand(self, command):
+    def sendCommand(self, command, priority=Priority.NORMAL):
         """отправка команды"""
         if not self.isConnected:
             logger.error('Adam5K:: нет подключения')
         if self.isReading:
-            self._commands.append(command)
+            self._commands.push(command, priority)
         else:
             _ = self.__execute(command)
 
+    async def sendCommandAsync(self, command, priority=Priority.NORMAL):
+        """отправка команды (ассинхронная)"""
+        self.sendCommand(command, priority)
+
     def _startThread(self):
         """запуск потока опроса"""
         logger.debug('Adam5K:: запущен таймер опроса устройства...')
         self._states["is_reading"] = True
+        self._wake.clear()
         self._thread = Thread(
             name="Adam5k polling thread",
             target=self._threadPolling
@@ -270,89 +478,238 @@ class Adam5K:
         self._thread.start()
 
     def _stopThread(self):
-        """остановка потока опроса"""
+        """остановка потока опроса (с ожиданием его завершения)"""
         self._states["is_reading"] = False
-        while self._thread.is_alive():
-            continue
+        self._wake.set()
+        if self._thread and self._thread is not current_thread():
+            self._thread.join()
         logger.debug('Adam5K:: таймер опроса устройства остановлен')
 
     def _threadPolling(self):
-        """поток чтения данных из устройства"""
-        while self.isConnected and self.isReading:
-            sleep(self._states["interval"])
+        """поток чтения данных из устройства;
+        время тиков отсчитывается от начала опроса, а не от конца
+        предыдущего тика, чтоб частота не уплывала на время обмена;
+        при потере связи - переподключение"""
+        deadline = monotonic()
+        while self.isReading:
+            if not self.isConnected:
+                if not self._reconnect():
+                    break
+                deadline = monotonic()
+            deadline = self._nextDeadline(deadline)
+            if self._wake.wait(max(deadline - monotonic(), 0.0)):
+                break
             if self._states["is_paused"]:
                 continue
-            thr = Thread(
-                name="Adam5k polling subthread",
-                target=self._threadTick
-            )
-            thr.start()
-            thr.join()
+            self._threadTick()
+
+    def _reconnect(self) -> bool:
+        """переподключение с растущей паузой между попытками
+        -> False, если опрос остановлен"""
+        while self.isReading and self.linkState == LinkState.RECONNECTING:
+            if self._wake.wait(self._backoff()):
+                break
+            if self._open():
+                self._states["link"] = LinkState.CONNECTED
+                logger.info('Adam5K:: связь восстановлена')
+                return True
+        return False
+
+    def _backoff(self) -> float:
+        """пауза перед попыткой переподключения, сек: растёт вдвое до BACKOFF[1]
+        и сбрасывается только после ответа устройства (а не после подключения,
+        чтоб не переподключаться на каждом тике к сразу рвущему связь устройству)"""
+        delay = self._delay
+        self._delay = min(delay * 2, self.BACKOFF[1])
+        return delay
+
+    def _open(self) -> bool:
+        """открытие сокета (таймаут - на каждый запрос)"""
+        try:
+            sock = socket.create_connection(self._conn, timeout=self.TIMEOUT)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as ex:
+            logger.debug(f'Adam5K:: статус подключения:\terror {self._conn} {ex!r}')
+            return False
+        self._sock = sock
+        logger.debug('Adam5K:: статус подключения:\tсокет подключен')
+        return True
+
+    def _close(self):
+        """закрытие сокета"""
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def _linkLost(self, reason: str):
+        """обработка потери связи: сокет закрывается, данные слотов
+        становятся недействительными, опрос переходит к переподключению"""
+        if self.linkState != LinkState.CONNECTED:
+            return
+        logger.warning(f'Adam5K:: связь потеряна ({reason}), переподключение...')
+        Metrics.count('adam.link_lost')
+        self._states["link"] = LinkState.RECONNECTING
+        self._close()
+        for read, _ in self._reads:
+            self._snapshot.invalidate(read.slot_type)
+
+    def _nextDeadline(self, deadline: float) -> float:
+        """время следующего тика; тики, время которых уже прошло, пропускаются"""
+        interval = self._states["interval"]
+        deadline += interval
+        now = monotonic()
+        if deadline < now:
+            missed = int((now - deadline) / interval) + 1 if interval > 0 else 0
+            self._poll_stats['dropped'] += missed
+            Metrics.count('adam.dropped_ticks', missed)
+            deadline = now if interval <= 0 else deadline + missed * interval
+        self._poll_stats['ticks'] += 1
+        Metrics.count('adam.ticks')
+        return deadline
+
+    def _dueReads(self, force=False) -> list:
+        """диапазоны чтения, подошедшие по расписанию на текущем тике
+        (force - все, например после записи)"""
+        self._ticks += 1
+        return [
+            (read, command) for read, command in self._reads
+            if force or self._ticks % read.every == 0
+        ]
 
     def _threadTick(self):
         """тик таймера отправки команд в устройство"""
-        # если в очереди есть комманды - выполнить
-        if self._commands:
-            command = self._commands.pop(0)
-            _ = self.__execute(command)
-        # если нет - читать все значения
+        # выполнение части команд из очереди (по приоритету)
+        commands = self._commands.pop(self.COMMANDS_PER_TICK)
+        # чтение по расписанию (после записи - всё, чтоб увидеть результат)
+        reads = self._dueReads(force=bool(commands))
+        if self._pipelined:
+            self.__executeMany(
+                commands + [command for _, command in reads],
+                [None] * len(commands) + [read for read, _ in reads]
+            )
         else:
-            self.__readAllValues_fromDevice()
+            for command in commands:
+                _ = self.__execute(command)
+            for read, command in reads:
+                self.__execute(command)
+                self._storeSlotData(read, self._frame)
         # транслировать событие, если есть обработчик
         if self._callback:
             self._callback()
 
-    def __readAllValues_fromDevice(self, slot_type: SlotType = SlotType.ALL):
-        """чтение всех значений в слоте из устройства"""
-        if slot_type == SlotType.ALL:
-            self.__readAllValues_fromDevice(SlotType.ANALOG)
-            self.__readAllValues_fromDevice(SlotType.DIGITAL)
-        else:
-            result = array('H')
-            command = self._builder.getCommand_default(slot_type, CommandType.READ)
-            data_bytes = self.__execute(command)
-            if len(data_bytes) > 8:
-                data_count = data_bytes[8]
-                data_bytes = data_bytes[9:9 + data_count]
-            result = self.__parseBytes(slot_type, data_bytes)
-            self._data[slot_type] = result.tolist()
-
-    def __execute(self, command: bytearray):
-        """выполнение команды"""
-        result = bytearray([])
-        self.__read(command, result)
+    def __readAllValues_fromDevice(self):
+        """чтение всех значений из устройства"""
+        if self._pipelined:
+            self.__executeMany([command for _, command in self._reads],
+                               [read for read, _ in self._reads])
+            return
+        for read, command in self._reads:
+            self.__execute(command)
+            self._storeSlotData(read, self._frame)
+
+    def _buildCommands_channels(self, slot_type: SlotType, slot: int, values: dict) -> list:
+        """построение команд записи каналов слота - по команде на каждую группу
+        подряд идущих каналов (пропуски не заполняются: текущие значения
+        могут быть устаревшими и перезаписали бы более свежие)"""
+        runs = []
+        for channel in sorted(values):
+            if runs and channel == runs[-1][-1] + 1:
+                runs[-1].append(channel)
+            else:
+                runs.append([channel])
+        return [
+            self._builder.buildCommand_register(
+                CommandType.WRITE, Param(slot_type, slot, run[0]), values[run[0]]
+            ) if len(run) == 1 else
+            self._builder.buildCommand_channels(slot_type, slot, run[0], [values[ch] for ch in run])
+            for run in runs
+        ]
+
+    def _storeSlotData(self, read: ReadRange, frame: FrameBuffer) -> bool:
+        """разбор ответа на чтение диапазона слота из буфера кадра и сохранение значений"""
+        stamp = Metrics.stamp()
+        result = self._snapshot.write(read.slot_type, frame, read.start, read.count)
+        Metrics.since('adam.decode', stamp)
         return result
 
-    def __read(self, command: bytearray, result: bytearray):
-        """запись / чтение из устройства"""
-        if self.__write(command):
-            data = bytearray(self._sock.recv(0x89))
-            result.extend(data)
+    def __execute(self, command: bytearray) -> bool:
+        """выполнение команды (ответ - в буфере кадра, сверяется по номеру транзакции);
+        запрос без ответа повторяется до RETRIES раз, затем связь считается потерянной"""
+        self._frame.length = 0
+        for attempt in range(self.RETRIES + 1):
+            transaction, frame = self._builder.stampTransaction(command)
+            stamp = Metrics.stamp()
+            try:
+                if not self.__write(frame):
+                    return False
+                while self._frame.recvFrom(self._sock):
+                    if self._frame.transaction == transaction:
+                        Metrics.since('adam.rtt', stamp)
+                        self._delay = self.BACKOFF[0]
+                        return True
+                    # ответы на предыдущие (устаревшие) транзакции пропускаются
+                    logger.warning('Adam5K:: получен ответ на устаревшую транзакцию')
+                self._linkLost('соединение закрыто устройством')
+                return False
+            except socket.timeout:
+                Metrics.count('adam.timeouts')
+                logger.warning(f'Adam5K:: нет ответа на запрос (попытка {attempt + 1})')
+            except OSError as ex:
+                self._linkLost(repr(ex))
+                return False
+        self._linkLost('нет ответа на запрос')
+        return False
+
+    def __executeMany(self, commands: list, targets: list) -> list:
+        """отправка команд одним пакетом (конвейером) и приём ответов, которые
+        сопоставляются с запросами по номеру транзакции; ответы на чтение слотов
+        (targets) разбираются сразу при приёме; запросы без ответа повторяются
+        до RETRIES раз, затем связь считается потерянной -> список успехов"""
+        result = [False] * len(commands)
+        remaining = list(range(len(commands)))
+        for attempt in range(self.RETRIES + 1):
+            pending, frames = {}, []
+            for index in remaining:
+                transaction, frame = self._builder.stampTransaction(commands[index])
+                pending[transaction] = index
+                frames.append(frame)
+            stamp = Metrics.stamp()
+            try:
+                if not self.__write(b''.join(frames)):
+                    return result
+                while pending:
+                    if not self._frame.recvFrom(self._sock):
+                        self._linkLost('соединение закрыто устройством')
+                        return result
+                    index = pending.pop(self._frame.transaction, None)
+                    if index is None:
+                        # ответы на предыдущие (устаревшие) транзакции пропускаются
+                        logger.warning('Adam5K:: получен ответ на устаревшую транзакцию')
+                        continue
+                    # буфер кадра перезаписывается следующим ответом - разбор сразу
+                    target = targets[index]
+                    result[index] = self._storeSlotData(target, self._frame) if target else True
+                    self._delay = self.BACKOFF[0]
+                Metrics.since('adam.rtt', stamp)
+                return result
+            except socket.timeout:
+                Metrics.count('adam.timeouts', len(pending))
+                logger.warning(f'Adam5K:: нет ответа на {len(pending)} запрос(а) '
+                               f'(попытка {attempt + 1})')
+                remaining = sorted(pending.values())
+            except OSError as ex:
+                self._linkLost(repr(ex))
+                return result
+        self._linkLost('нет ответа на запрос')
+        return result
 
     def __write(self, command: bytes):
         """запись команды в устройство"""
         if self._sock and self.isConnected:
-            return self._sock.send(command) == len(command)
+            self._sock.sendall(command)
+            return True
         return False
 
-    @staticmethod
-    def __toBits(value: int):
-        """конвертирование значения в биты"""
-        bits = f"{value:08b}"
-        bits = bits[::-1]
-        return bits
-
-    @staticmethod
-    def __parseBytes(slot_type: SlotType, slots_data: bytearray):
-        """получение списка байт из массива байт"""
-        result = array('H')
-        if len(slots_data) % 2 > 0:
-            slots_data.append(0)
-        result.frombytes(slots_data)
-        if slot_type == SlotType.ANALOG:
-            result.byteswap()
-        return result
-
 
 if __name__ == '__main__':
     adam = Adam5K('10.10.10.11', 502, 1)
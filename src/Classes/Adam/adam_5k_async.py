@@ -0,0 +1,380 @@
+"""
+    AesmaDiv 2021
+    Модуль асинхронного транспорта для Advantech Adam5000TCP:
+    одно постоянное подключение и опрос в цикле событий
+"""
+import asyncio
+import socket
+from concurrent.futures import Future
+from threading import Thread
+from time import monotonic
+from loguru import logger
+
+from AesmaLib.metrics import Metrics
+from Classes.Adam.adam_5k import Adam5K, CommandType, FrameBuffer, LinkState, Param, SlotType
+from Classes.Adam.adam_scheduler import Priority
+
+
+class EventLoopThread:
+    """Класс цикла событий, работающего в отдельном потоке"""
+    def __init__(self, name="Adam5k event loop"):
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(name=name, target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """возвращает цикл событий"""
+        return self._loop
+
+    @property
+    def isCurrent(self) -> bool:
+        """выполняется ли вызов из потока цикла событий"""
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(self, coro) -> Future:
+        """запуск корутины в цикле событий (без ожидания)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """запуск корутины в цикле событий и ожидание результата"""
+        return self.submit(coro).result(timeout)
+
+    async def wrap(self, coro):
+        """ожидание корутины из любого цикла событий"""
+        if self.isCurrent:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def stop(self, timeout=1.0):
+        """остановка цикла событий"""
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+    def _run(self):
+        """поток цикла событий"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+
+class Adam5KAsync(Adam5K):
+    """Класс для работы с Advantech Adam5000TCP через asyncio"""
+
+    def __init__(self, host: str, port=502, address=1,
+                 loop: EventLoopThread = None, pipelined=True):
+        super().__init__(host, port, address, pipelined)
+        self._loop = loop if loop else EventLoopThread()
+        self._own_loop = loop is None
+        self._lock: asyncio.Lock = None
+        self._receiver: asyncio.Task = None
+        self._pending = {}
+        self._wake = asyncio.Event()
+
+    def __del__(self):
+        if self._own_loop:
+            self._loop.stop(timeout=0)
+        self._close()
+        logger.debug('Adam5KAsync: destroyed')
+
+    async def connect(self) -> bool:
+        """подключение"""
+        return await self._loop.wrap(self._connect())
+
+    async def disconnect(self):
+        """отключение"""
+        await self._loop.wrap(self._disconnect())
+
+    def getValue(self, slot_type: SlotType, slot: int, channel: int, max_age: float = None):
+        """получение значения канала"""
+        if not self.isReading and self.isConnected and not self._loop.isCurrent \
+                and not self.hasData(slot_type, max_age):
+            self._loop.run(self._readAllValues())
+        return self.getValue_fromData(slot_type, slot, channel, max_age)
+
+    async def getValueAsync(self, slot_type: SlotType, slot: int, channel: int,
+                            max_age: float = None):
+        """получение значения канала (ассинхронная)"""
+        if not self.isReading and self.isConnected and not self.hasData(slot_type, max_age):
+            await self._loop.wrap(self._readAllValues())
+        return self.getValue_fromData(slot_type, slot, channel, max_age)
+
+    def getValue_fromDevice(self, slot_type: SlotType, slot: int, channel: int):
+        """получение значения канала из устройства"""
+        if self._loop.isCurrent:
+            return self.getValue_fromData(slot_type, slot, channel)
+        command = self._builder.buildCommand_register(
+            CommandType.READ, Param(slot_type, slot, channel)
+        )
+        reply = self._loop.run(self._execute(command))
+        if len(reply) < 10:
+            return 0
+        if slot_type == SlotType.DIGITAL:
+            return reply[9] & 1 == 1
+        return int.from_bytes(reply[9:11], 'big')
+
+    def sendCommand(self, command, priority=Priority.NORMAL):
+        """отправка команды"""
+        if not self.isConnected:
+            logger.error('Adam5K:: нет подключения')
+            return
+        if self.isReading:
+            self._commands.push(command, priority)
+        elif self._loop.isCurrent:
+            self._loop.loop.create_task(self._execute(command))
+        else:
+            self._loop.run(self._execute(command))
+
+    async def sendCommandAsync(self, command, priority=Priority.NORMAL):
+        """отправка команды (ассинхронная)"""
+        if not self.isConnected:
+            logger.error('Adam5K:: нет подключения')
+            return
+        if self.isReading:
+            self._commands.push(command, priority)
+        else:
+            await self._loop.wrap(self._execute(command))
+
+    def _startThread(self):
+        """запуск задачи опроса в цикле событий"""
+        logger.debug('Adam5K:: запущен опрос устройства (asyncio)...')
+        self._states["is_reading"] = True
+        self._wake = asyncio.Event()
+        self._thread = self._loop.submit(self._polling())
+
+    def _stopThread(self):
+        """остановка задачи опроса (с ожиданием её завершения)"""
+        self._states["is_reading"] = False
+        if not self._loop.loop.is_closed():
+            self._loop.loop.call_soon_threadsafe(self._wake.set)
+        if self._thread and not self._loop.isCurrent:
+            self._thread.result()
+        logger.debug('Adam5K:: опрос устройства остановлен')
+
+    async def _connect(self) -> bool:
+        """подключение (в цикле событий)"""
+        if not self.isConnected and not self.isReading:
+            self._close()
+            if await self._openAsync():
+                self._states["link"] = LinkState.CONNECTED
+        return self.isConnected
+
+    async def _disconnect(self):
+        """отключение (в цикле событий)"""
+        if self.linkState == LinkState.DISCONNECTED:
+            return
+        self._states["is_reading"] = False
+        self._wake.set()
+        if isinstance(self._thread, Future) and not self._thread.done():
+            await asyncio.wrap_future(self._thread)
+        self._close()
+        self._states["link"] = LinkState.DISCONNECTED
+        logger.debug('Adam5K:: статус отключения:\tсокет отключен')
+
+    async def _openAsync(self) -> bool:
+        """открытие сокета и запуск задачи приёма ответов"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            await asyncio.wait_for(self._loop.loop.sock_connect(sock, self._conn), self.TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as ex:
+            sock.close()
+            logger.debug(f'Adam5K:: статус подключения:\terror {self._conn} {ex!r}')
+            return False
+        self._sock = sock
+        self._lock = asyncio.Lock()
+        self._receiver = self._loop.loop.create_task(self._receiving())
+        logger.debug('Adam5K:: статус подключения:\tсокет подключен')
+        return True
+
+    def _close(self):
+        """остановка приёма, отказ ожидающим запросам и закрытие сокета"""
+        if self._receiver:
+            self._receiver.cancel()
+            self._receiver = None
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionResetError('соединение закрыто'))
+        self._pending.clear()
+        super()._close()
+
+    async def _sleep(self, seconds: float) -> bool:
+        """пауза, прерываемая остановкой опроса -> True, если опрос остановлен"""
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return self._wake.is_set()
+        try:
+            await asyncio.wait_for(self._wake.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _polling(self):
+        """задача чтения данных из устройства (с компенсацией времени обмена
+        и переподключением при потере связи)"""
+        deadline = monotonic()
+        while self.isReading:
+            if not self.isConnected:
+                if not await self._reconnectAsync():
+                    break
+                deadline = monotonic()
+            deadline = self._nextDeadline(deadline)
+            if await self._sleep(max(deadline - monotonic(), 0.0)):
+                break
+            if self._states["is_paused"]:
+                continue
+            await self._tick()
+
+    async def _reconnectAsync(self) -> bool:
+        """переподключение с растущей паузой между попытками
+        -> False, если опрос остановлен"""
+        while self.isReading and self.linkState == LinkState.RECONNECTING:
+            if await self._sleep(self._backoff()):
+                break
+            if await self._openAsync():
+                self._states["link"] = LinkState.CONNECTED
+                logger.info('Adam5K:: связь восстановлена')
+                return True
+        return False
+
+    async def _tick(self):
+        """тик опроса: выполнение команд из очереди и чтение по расписанию"""
+        if self._pipelined:
+            await self._tickPipelined()
+        else:
+            commands = self._commands.pop(self.COMMANDS_PER_TICK)
+            for command in commands:
+                _ = await self._execute(command)
+            for read, command in self._dueReads(force=bool(commands)):
+                await self._executeMany([command], [read])
+        if self._callback:
+            self._callback()
+
+    async def _tickPipelined(self):
+        """тик опроса: команды из очереди и чтение по расписанию одним пакетом"""
+        commands = self._commands.pop(self.COMMANDS_PER_TICK)
+        targets = [None] * len(commands)
+        for read, command in self._dueReads(force=bool(commands)):
+            commands.append(command)
+            targets.append(read)
+        await self._executeMany(commands, targets)
+
+    async def _readAllValues(self):
+        """чтение всех значений из устройства"""
+        commands = [command for _, command in self._reads]
+        reads = [read for read, _ in self._reads]
+        if self._pipelined:
+            await self._executeMany(commands, reads)
+        else:
+            for command, read in zip(commands, reads):
+                await self._executeMany([command], [read])
+
+    async def _execute(self, command: bytearray) -> bytes:
+        """выполнение команды с ожиданием ответа по номеру транзакции"""
+        replies = await self._executeMany([command])
+        return replies[0]
+
+    async def _executeMany(self, commands: list, targets: list = None) -> list:
+        """отправка команд одним пакетом (конвейером) и ожидание ответов,
+        которые сопоставляются с запросами по номеру транзакции;
+        ответы на чтение слотов (targets) разбираются сразу при приёме;
+        запросы без ответа повторяются до RETRIES раз, затем связь
+        считается потерянной -> список ответов (для слотов - успех разбора)"""
+        targets = targets if targets else [None] * len(commands)
+        result = [None] * len(commands)
+        remaining = list(range(len(commands)))
+        for attempt in range(self.RETRIES + 1):
+            if not self._sock or not remaining:
+                break
+            if attempt:
+                Metrics.count('adam.timeouts', len(remaining))
+                logger.warning(f'Adam5K:: нет ответа на {len(remaining)} запрос(а), '
+                               f'повтор {attempt}')
+            await self._exchange(commands, targets, remaining, result)
+            remaining = [index for index in remaining if result[index] is None]
+            if not remaining or not self.isConnected:
+                break
+        else:
+            self._linkLost('нет ответа на запрос')
+        for index in remaining:
+            if targets[index]:
+                self._snapshot.invalidate(targets[index].slot_type)
+            result[index] = b'' if targets[index] is None else False
+        return result
+
+    async def _exchange(self, commands: list, targets: list, indices: list, result: list):
+        """одна попытка обмена: отправка команд indices одним пакетом
+        и ожидание ответов (полученные - в result)"""
+        loop = self._loop.loop
+        futures, frames = {}, []
+        for index in indices:
+            transaction, frame = self._builder.stampTransaction(commands[index])
+            future = loop.create_future()
+            self._pending[transaction] = (future, targets[index])
+            futures[index] = (transaction, future)
+            frames.append(frame)
+        stamp = Metrics.stamp()
+        try:
+            async with self._lock:
+                await loop.sock_sendall(self._sock, b''.join(frames))
+            done, _ = await asyncio.wait(
+                [future for _, future in futures.values()], timeout=self.TIMEOUT
+            )
+            Metrics.since('adam.rtt', stamp)
+        except OSError as ex:
+            self._linkLost(repr(ex))
+            done = set()
+        for index, (transaction, future) in futures.items():
+            self._pending.pop(transaction, None)
+            if future in done and not future.exception():
+                result[index] = future.result()
+                self._delay = self.BACKOFF[0]
+            elif not future.done():
+                future.cancel()
+
+    async def _receiving(self):
+        """задача приёма ответов и сопоставления их с ожидающими запросами"""
+        frame = self._frame
+        while self._sock:
+            try:
+                await self._recvFrame(frame)
+            except OSError as ex:
+                # задача приёма завершается сама - отменять её не нужно
+                self._receiver = None
+                self._linkLost(repr(ex))
+                return
+            future, target = self._pending.get(frame.transaction, (None, None))
+            if future is None or future.done():
+                logger.warning('Adam5K:: получен ответ на устаревшую транзакцию')
+                continue
+            # буфер кадра будет перезаписан следующим ответом -
+            # данные слота разбираются сразу, прочие ответы копируются
+            if target:
+                future.set_result(self._storeSlotData(target, frame))
+            else:
+                future.set_result(bytes(frame.view[:frame.length]))
+
+    async def _recvFrame(self, frame: FrameBuffer):
+        """чтение одного кадра Modbus/TCP в буфер"""
+        frame.length = 0
+        await self._recvInto(frame, 0, FrameBuffer.HEADER_SIZE)
+        size = FrameBuffer.HEADER_SIZE + frame.bodySize
+        if size > FrameBuffer.SIZE:
+            raise ConnectionResetError('некорректная длина кадра')
+        await self._recvInto(frame, FrameBuffer.HEADER_SIZE, size)
+        frame.length = size
+
+    async def _recvInto(self, frame: FrameBuffer, start: int, stop: int):
+        """чтение из сокета в часть буфера кадра"""
+        while start < stop:
+            count = await self._loop.loop.sock_recv_into(self._sock, frame.view[start:stop])
+            if not count:
+                raise ConnectionResetError('соединение закрыто устройством')
+            start += count
@@ -0,0 +1,121 @@
+"""
+    AesmaDiv 2021
+    Модуль загрузки, проверки и компиляции конфигурации Adam5000TCP
+    в неизменяемый объект (для замены на лету без остановки опроса)
+"""
+import importlib.util
+from dataclasses import dataclass
+from math import isfinite
+from types import MappingProxyType, ModuleType
+
+from Classes.Adam.adam_5k import Param, ReadRange, SlotType
+from Classes.Adam.adam_filters import FilterParams
+from Classes.Adam.adam_stand import StandConfig
+from Classes.Adam import adam_config
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    """Класс скомпилированной конфигурации стенда (только чтение)"""
+    params: MappingProxyType
+    coefs: MappingProxyType
+    filters: MappingProxyType
+    deadbands: MappingProxyType
+    safety: tuple               # параметры каналов безопасности
+    reads: tuple                # диапазоны чтения слотов (ReadRange)
+    delta: bool
+    gui_interval: float
+
+    @staticmethod
+    def build(namespace, stand: StandConfig):
+        """компиляция конфигурации стенда из модуля конфигурации
+        (параметры стенда заменяют значения модуля) с проверкой
+        -> CompiledConfig; ValueError - при ошибках в конфигурации"""
+        params = dict(stand.params if stand.params else namespace.PARAMS)
+        coefs = dict(stand.coefs if stand.coefs else namespace.COEFS)
+        filters = dict(stand.filters if stand.filters else getattr(namespace, 'FILTERS', {}))
+        deadbands = dict(getattr(namespace, 'DEADBANDS', {}))
+        schedule = dict(getattr(namespace, 'SCHEDULE', {}))
+        errors = validate(params, coefs, filters, deadbands)
+        errors.extend(
+            f'{key}: неверный период чтения' for key, every in schedule.items()
+            if not isinstance(every, int) or every < 1
+        )
+        if errors:
+            raise ValueError('; '.join(errors))
+        return CompiledConfig(
+            params=MappingProxyType(params),
+            coefs=MappingProxyType(coefs),
+            filters=MappingProxyType(filters),
+            deadbands=MappingProxyType(deadbands),
+            safety=tuple(params[name] for name in getattr(namespace, 'SAFETY', ())
+                         if name in params),
+            reads=buildReads(params, schedule),
+            delta=bool(getattr(namespace, 'DELTA', False)),
+            gui_interval=float(getattr(namespace, 'GUI_INTERVAL', 0.0))
+        )
+
+
+def buildReads(params: dict, schedule: dict) -> tuple:
+    """диапазоны чтения: от первого до последнего задействованного
+    регистра (аналоговые) или слова слота (цифровые)"""
+    result = []
+    for slot_type in (SlotType.ANALOG, SlotType.DIGITAL):
+        indices = [
+            param.slot * 8 + param.channel if slot_type == SlotType.ANALOG else param.slot
+            for param in params.values() if param.slot_type == slot_type
+        ]
+        if indices:
+            result.append(ReadRange(
+                slot_type, min(indices), max(indices) - min(indices) + 1,
+                schedule.get(slot_type, 1)
+            ))
+    return tuple(result)
+
+
+def loadConfig(path: str = None) -> ModuleType:
+    """загрузка модуля конфигурации из файла в новое пространство имён
+    (загруженный ранее adam_config не изменяется)"""
+    path = path if path else adam_config.__file__
+    spec = importlib.util.spec_from_file_location(f'{adam_config.__name__}_reload', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def findStand(namespace, stand: StandConfig) -> StandConfig:
+    """параметры стенда с тем же именем из модуля конфигурации (если есть)"""
+    for item in getattr(namespace, 'STANDS', ()):
+        if isinstance(item, StandConfig) and item.name == stand.name:
+            return item
+    return stand
+
+
+def validate(params: dict, coefs: dict, filters: dict, deadbands: dict) -> list:
+    """проверка конфигурации -> список ошибок"""
+    errors = []
+    channels = {}
+    for name, param in params.items():
+        if not isinstance(param, Param) or param.slot_type not in (SlotType.ANALOG,
+                                                                    SlotType.DIGITAL):
+            errors.append(f'{name}: неверный параметр канала')
+            continue
+        if not 0 <= param.slot < 8 or not 0 <= param.channel < 8:
+            errors.append(f'{name}: слот/канал вне диапазона')
+        if param.dig_max <= 0 or not isfinite(param.val_rng) or param.val_rng < 0:
+            errors.append(f'{name}: неверный диапазон')
+        key = (param.slot_type, param.slot, param.channel)
+        if key in channels:
+            errors.append(f'{name}: канал уже занят {channels[key]}')
+        channels[key] = name
+    for name, coef in coefs.items():
+        if not isinstance(coef, (int, float)) or not isfinite(coef):
+            errors.append(f'{name}: неверный коэффициент')
+    for name, fltr in filters.items():
+        if not isinstance(fltr, FilterParams) or fltr.size < 1 \
+                or not 0.0 < fltr.alpha <= 1.0 or fltr.noise_q < 0 or fltr.noise_r <= 0:
+            errors.append(f'{name}: неверные параметры фильтра')
+    for name, deadband in deadbands.items():
+        if not isinstance(deadband, (int, float)) or deadband < 0:
+            errors.append(f'{name}: неверная зона нечувствительности')
+    return errors
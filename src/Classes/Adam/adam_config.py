@@ -3,12 +3,25 @@
     имя_параметра = (слот, канал)
 """
 from Classes.Adam.adam_5k import SlotType, Param
+from Classes.Adam.adam_filters import FilterType, FilterParams
 from Classes.Adam.adam_names import ChannelNames
+from Classes.Adam.adam_stand import StandConfig
 
 
 IP              = '127.0.0.1'
 PORT            = 502
 ADDRESS         = 1
+ASYNC           = False     # True - asyncio транспорт (одно постоянное подключение)
+PIPELINED       = True      # True - запросы тика отправляются одним пакетом
+DELTA           = True      # True - в интерфейс отправляются только изменившиеся показания
+GUI_INTERVAL    = 0.2       # мин. интервал отправки показаний в интерфейс, сек
+
+# стенды (первый - управляется из окна программы, остальные - опрос и запись)
+# для стенда можно задать свои params, coefs, filters (по умолчанию - ниже)
+STANDS = (
+    StandConfig('Стенд 1', IP, PORT, ADDRESS),
+    # StandConfig('Стенд 2', '127.0.0.1', 503, 1),
+)
 
 PARAMS = {
     # "имя": ((тип_слота, слот, канал), (диапазон, смещение, макс.цифр)
@@ -33,6 +46,18 @@ PARAMS = {
     ChannelNames.VLV_FLW: Param(SlotType.ANALOG,  1, 1,  4095, 0x0000, 0x0FFF),
 }
 
+# чтение слотов раз в N тиков опроса
+# (читаются только диапазоны каналов, заданных в PARAMS)
+SCHEDULE = {
+    SlotType.ANALOG:    1,  # расход, давление, обороты, момент - каждый тик
+    SlotType.DIGITAL:   3,  # краны и аварийный стоп (после записи - сразу)
+}
+
+# каналы безопасности: запись 0 (выкл) в них выполняется вне очереди
+SAFETY = (
+    ChannelNames.ENGINE,
+)
+
 COEFS = {
     ChannelNames.FLW_0:   1.0,
     ChannelNames.FLW_1:   1.0,
@@ -42,3 +67,40 @@ COEFS = {
     ChannelNames.PSI_IN:  1.0,
     ChannelNames.PSI_OUT: 1.0
 }
+
+FILTERS = {
+    # "имя": параметры фильтра сглаживания
+    # (для отсутствующих - скользящее среднее на 10 проб)
+    ChannelNames.FLW_0:   FilterParams(FilterType.EMA, alpha=0.3),
+    ChannelNames.FLW_1:   FilterParams(FilterType.EMA, alpha=0.3),
+    ChannelNames.FLW_2:   FilterParams(FilterType.EMA, alpha=0.3),
+    ChannelNames.RPM:     FilterParams(FilterType.MEDIAN, size=5),
+    ChannelNames.TORQUE:  FilterParams(FilterType.MEDIAN, size=5),
+    ChannelNames.PSI_IN:  FilterParams(FilterType.EMA, alpha=0.3),
+    ChannelNames.PSI_OUT: FilterParams(FilterType.EMA, alpha=0.3),
+}
+
+DEADBANDS = {
+    # "имя": зона нечувствительности - изменения не больше неё не отправляются
+    # в интерфейс (для отсутствующих - любое изменение)
+    ChannelNames.FLW_0:   0.01,
+    ChannelNames.FLW_1:   0.01,
+    ChannelNames.FLW_2:   0.05,
+    ChannelNames.RPM:     1.0,
+    ChannelNames.TORQUE:  0.01,
+    ChannelNames.PSI_IN:  0.01,
+    ChannelNames.PSI_OUT: 0.05,
+}
+
+# установившийся режим (для снятия точки): окно - кол-во последних опросов,
+# допуск - макс. СКО и дрейф за окно по каналу
+STEADY_WINDOW = 20
+STEADY = {
+    ChannelNames.FLW_0:   0.5,
+    ChannelNames.FLW_1:   1.0,
+    ChannelNames.FLW_2:   5.0,
+    ChannelNames.RPM:     10.0,
+    ChannelNames.TORQUE:  10.0,
+    ChannelNames.PSI_IN:  0.5,
+    ChannelNames.PSI_OUT: 5.0,
+}
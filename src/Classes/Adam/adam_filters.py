@@ -0,0 +1,258 @@
+"""
+    AesmaDiv 2021
+    Модуль фильтров сглаживания показаний датчиков.
+    Каждый фильтр обрабатывает сразу группу каналов (вектор значений),
+    затраты на одну пробу не зависят от длины записи.
+"""
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from enum import Enum
+from time import perf_counter
+import numpy as np
+
+
+class FilterType(Enum):
+    """Типы фильтров"""
+    MOVING = 'MOVING'   # скользящее среднее по size пробам
+    EMA = 'EMA'         # экспоненциальное сглаживание с коэф. alpha
+    MEDIAN = 'MEDIAN'   # медиана по size пробам
+    KALMAN = 'KALMAN'   # скалярный фильтр Калмана (шум процесса q, шум измерения r)
+
+
+@dataclass(frozen=True)
+class FilterParams:
+    """Класс параметров фильтра канала"""
+    filter_type: FilterType = FilterType.MOVING
+    size: int = 10
+    alpha: float = 0.3
+    noise_q: float = 0.01
+    noise_r: float = 1.0
+
+
+class MovingAverage:
+    """Скользящее среднее: кольцевой буфер с накопленной суммой"""
+    def __init__(self, params: FilterParams, count: int):
+        self._size = params.size
+        self._window = np.zeros((self._size, count), dtype=np.float64)
+        self._sums = np.zeros(count, dtype=np.float64)
+        self._position = 0
+        self.output = np.zeros(count, dtype=np.float64)
+
+    def reset(self):
+        """сброс состояния"""
+        self._window.fill(0.0)
+        self._sums.fill(0.0)
+        self.output.fill(0.0)
+        self._position = 0
+
+    def prime(self, values: np.ndarray):
+        """заполнение окна значениями (установившееся состояние)"""
+        self._window[:] = values
+        self._window.sum(axis=0, out=self._sums)
+        self.output[:] = values
+        self._position = 0
+
+    def update(self, values: np.ndarray):
+        """добавление пробы"""
+        row = self._window[self._position]
+        self._sums += values - row
+        row[:] = values
+        self._position = (self._position + 1) % self._size
+        # пересчёт сумм раз в полный оборот окна, чтоб не копилась ошибка округления
+        if not self._position:
+            self._window.sum(axis=0, out=self._sums)
+        np.divide(self._sums, self._size, out=self.output)
+
+
+class ExpAverage:
+    """Экспоненциальное скользящее среднее"""
+    def __init__(self, params: FilterParams, count: int):
+        self._alpha = params.alpha
+        self._ready = False
+        self.output = np.zeros(count, dtype=np.float64)
+
+    def reset(self):
+        """сброс состояния"""
+        self._ready = False
+        self.output.fill(0.0)
+
+    def prime(self, values: np.ndarray):
+        """установка начального значения"""
+        self.output[:] = values
+        self._ready = True
+
+    def update(self, values: np.ndarray):
+        """добавление пробы"""
+        if self._ready:
+            self.output += self._alpha * (values - self.output)
+        else:
+            self.output[:] = values
+            self._ready = True
+
+
+class MedianFilter:
+    """Медиана по окну фиксированного размера: для каждого канала хранится
+    отсортированная копия окна, обновляемая через bisect - на пробу одно
+    удаление и одна вставка вместо сортировки всего окна"""
+    def __init__(self, params: FilterParams, count: int):
+        self._size = params.size
+        self._window = np.zeros((self._size, count), dtype=np.float64)
+        self._sorted = [[] for _ in range(count)]
+        self._position = 0
+        self._filled = 0
+        self.output = np.zeros(count, dtype=np.float64)
+
+    def reset(self):
+        """сброс состояния"""
+        self._window.fill(0.0)
+        for column in self._sorted:
+            column.clear()
+        self.output.fill(0.0)
+        self._position = 0
+        self._filled = 0
+
+    def prime(self, values: np.ndarray):
+        """заполнение окна значениями (установившееся состояние)"""
+        self._window[:] = values
+        for column, value in zip(self._sorted, values.tolist()):
+            column[:] = [value] * self._size
+        self.output[:] = values
+        self._position = 0
+        self._filled = self._size
+
+    def update(self, values: np.ndarray):
+        """добавление пробы"""
+        row = self._window[self._position]
+        removed = row.tolist() if self._filled == self._size else None
+        for i, (column, value) in enumerate(zip(self._sorted, values.tolist())):
+            if removed is not None:
+                del column[bisect_left(column, removed[i])]
+            insort(column, value)
+        row[:] = values
+        self._position = (self._position + 1) % self._size
+        self._filled = min(self._filled + 1, self._size)
+        half = self._filled // 2
+        for i, column in enumerate(self._sorted):
+            self.output[i] = column[half] if self._filled % 2 \
+                else (column[half - 1] + column[half]) / 2.0
+
+
+class KalmanFilter:
+    """Скалярный фильтр Калмана (модель - случайное блуждание)"""
+    def __init__(self, params: FilterParams, count: int):
+        self._q = params.noise_q
+        self._r = params.noise_r
+        self._ready = False
+        self._error = np.ones(count, dtype=np.float64)
+        self.output = np.zeros(count, dtype=np.float64)
+
+    def reset(self):
+        """сброс состояния"""
+        self._ready = False
+        self._error.fill(1.0)
+        self.output.fill(0.0)
+
+    def prime(self, values: np.ndarray):
+        """установка начального значения"""
+        self.output[:] = values
+        self._ready = True
+
+    def update(self, values: np.ndarray):
+        """добавление пробы"""
+        if not self._ready:
+            self.output[:] = values
+            self._ready = True
+            return
+        self._error += self._q
+        gain = self._error / (self._error + self._r)
+        self.output += gain * (values - self.output)
+        self._error *= 1.0 - gain
+
+
+FILTERS = {
+    FilterType.MOVING: MovingAverage,
+    FilterType.EMA: ExpAverage,
+    FilterType.MEDIAN: MedianFilter,
+    FilterType.KALMAN: KalmanFilter
+}
+
+
+def createFilter(params: FilterParams, count: int):
+    """создание фильтра для группы из count каналов"""
+    return FILTERS[params.filter_type](params, count)
+
+
+def benchmark(samples: np.ndarray, params: list, period: float = 0.1) -> list:
+    """сравнение фильтров на записанных данных (samples - пробы x каналы):
+    время обработки пробы, задержка и остаточный шум относительно
+    центрированного (не причинного) среднего исходного сигнала"""
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+    count, channels = samples.shape
+    reference = _centeredMean(samples, 9)
+    result = []
+    for item in params:
+        fltr = createFilter(item, channels)
+        output = np.empty_like(samples)
+        start = perf_counter()
+        for i in range(count):
+            fltr.update(samples[i])
+            output[i] = fltr.output
+        elapsed = perf_counter() - start
+        lag = _estimateLag(reference, output)
+        result.append({
+            'filter': item,
+            'us_per_sample': elapsed / count * 1e6,
+            'lag_s': lag * period,
+            'noise': float(np.std(output[lag:] - reference[:count - lag])),
+            'noise_raw': float(np.std(samples - reference))
+        })
+    return result
+
+
+def _centeredMean(samples: np.ndarray, size: int) -> np.ndarray:
+    """центрированное скользящее среднее (опорный сигнал)"""
+    kernel = np.ones(size) / size
+    padded = np.pad(samples, ((size // 2, size // 2), (0, 0)), mode='edge')
+    return np.column_stack([
+        np.convolve(padded[:, i], kernel, mode='valid') for i in range(samples.shape[1])
+    ])
+
+
+def _estimateLag(reference: np.ndarray, output: np.ndarray, max_lag: int = 50) -> int:
+    """задержка выхода фильтра относительно опорного сигнала, проб"""
+    count = len(reference)
+    errors = [
+        np.mean((output[lag:] - reference[:count - lag]) ** 2)
+        for lag in range(min(max_lag, count - 1))
+    ]
+    return int(np.argmin(errors))
+
+
+if __name__ == '__main__':
+    import sys
+    # записанные пробы (*.npy: пробы x каналы; *.adr: запись телеметрии - слот 0)
+    # или синтетическая ступенька с шумом
+    if len(sys.argv) > 1 and sys.argv[1].endswith('.adr'):
+        from Classes.Adam.adam_recorder import readRecording
+        data = readRecording(sys.argv[1])['analog'][:, :8]
+    elif len(sys.argv) > 1:
+        data = np.load(sys.argv[1])
+    else:
+        rng = np.random.default_rng(0)
+        data = np.repeat([100.0, 150.0, 120.0], 200) + rng.normal(0.0, 3.0, 600)
+    candidates = [
+        FilterParams(FilterType.MOVING, size=10),
+        FilterParams(FilterType.MOVING, size=4),
+        FilterParams(FilterType.EMA, alpha=0.3),
+        FilterParams(FilterType.MEDIAN, size=5),
+        FilterParams(FilterType.KALMAN, noise_q=0.5, noise_r=9.0)
+    ]
+    for row in benchmark(data, candidates):
+        print(
+            f"{row['filter'].filter_type.value:>7} "
+            f"{row['us_per_sample']:8.2f} мкс/проба  "
+            f"задержка {row['lag_s']:.2f} с  "
+            f"шум {row['noise']:.3f} (исх. {row['noise_raw']:.3f})"
+        )
@@ -1,34 +1,109 @@
 """
     Модуль содержит классы для работы с Advantech ADAM 5000 TCP"""
 import asyncio
-from importlib import reload
 from loguru import logger
 
 from PyQt6.QtCore import pyqtSignal, QObject
 
+from AesmaLib.metrics import Metrics
 from Classes.Adam.adam_5k import Adam5K, Param, SlotType
+from Classes.Adam.adam_5k_async import Adam5KAsync, EventLoopThread
+from Classes.Adam.adam_replay import Adam5KReplay
+from Classes.Adam.adam_scheduler import Priority
+from Classes.Adam.adam_sensors import SensorPipeline
+from Classes.Adam.adam_recorder import Recorder, createPath
+from Classes.Adam.adam_publisher import DeltaPublisher
+from Classes.Adam.adam_stand import StandConfig
+from Classes.Adam.adam_compiled import CompiledConfig, findStand, loadConfig
 from Classes.Adam import adam_config as config
 
 
+class Transaction:
+    """Класс транзакции записи: изменения каналов накапливаются
+    и отправляются при выходе из блока with наименьшим кол-вом команд"""
+    def __init__(self, manager):
+        self._manager = manager
+        self._values = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        self._values.clear()
+        return False
+
+    def setValue(self, param: Param, value: int):
+        """добавление изменения канала (повторное - заменяет предыдущее)"""
+        self._values[(param.slot_type, param.slot, param.channel)] = (param, value)
+
+    def commit(self) -> bool:
+        """отправка накопленных изменений"""
+        values, self._values = self._values, {}
+        return self._manager.commitValues(list(values.values()))
+
+
 class AdamManager(QObject):
     """Класс для связи контроллера Adam5000TCP с интерфейсом программы"""
     _signal = pyqtSignal(dict, name="dataReceived")
-    _probes = 10
-    _sensors = {
-        'rpm': [0.0] * _probes,
-        'torque': [0.0] * _probes,
-        'psi_in': [0.0] * _probes,
-        'psi_out': [0.0] * _probes,
-        'flw0': [0.0] * _probes,
-        'flw1': [0.0] * _probes,
-        'flw2': [0.0] * _probes
-    }
-
-    def __init__(self, host, port=502, address=1, parent=None) -> None:
+
+    def __init__(self, stand: StandConfig, loop: EventLoopThread = None, parent=None) -> None:
         super().__init__(parent=parent)
-        self._adam = Adam5K(host, port, address)
+        self._stand = stand
+        self._names = ()
+        # конфигурация, преобразование показаний и отбор изменений
+        # заменяются целиком (присваиванием) при перезагрузке конфигурации
+        self._config = CompiledConfig.build(config, stand)
+        self._pipeline = SensorPipeline(self._names, self.params, self.coefs)
+        self._publisher = DeltaPublisher(self._config.deadbands, self._config.gui_interval)
+        self._recorder: Recorder = None
+        self._records_folder = ''
+        self._listeners = []
+        # все вызовы выполняются в одном постоянном цикле событий: общем
+        # для нескольких стендов или своём - у синхронного транспорта
+        # (config.ASYNC = False) всегда свой, чтоб блокирующие подключение
+        # и отключение не задерживали другие стенды
+        sync = not stand.replay and not config.ASYNC
+        self._own_loop = loop is None or sync
+        self._loop = EventLoopThread("AdamManager event loop") if self._own_loop else loop
+        if stand.replay:
+            self._adam = Adam5KReplay(stand.replay, stand.speed)
+        elif sync:
+            self._adam = Adam5K(stand.host, stand.port, stand.address, config.PIPELINED)
+        else:
+            self._adam = Adam5KAsync(
+                stand.host, stand.port, stand.address,
+                loop=self._loop, pipelined=config.PIPELINED
+            )
+        self._adam.setReads(self._config.reads)
         self._adam.setCallback(self.__adamThreadTickCallback)
 
+    def close(self):
+        """остановка собственного цикла событий"""
+        if self._own_loop:
+            self._loop.stop()
+
+    @property
+    def name(self) -> str:
+        """имя стенда"""
+        return self._stand.name
+
+    @property
+    def params(self) -> dict:
+        """параметры каналов стенда"""
+        return self._config.params
+
+    @property
+    def coefs(self) -> dict:
+        """коэффициенты датчиков стенда"""
+        return self._config.coefs
+
+    @property
+    def filters(self) -> dict:
+        """параметры фильтров датчиков стенда"""
+        return self._config.filters
+
     @property
     def isConnected(self):
         """состояние подключения к Adam5000TCP"""
@@ -36,29 +111,75 @@ class AdamManager(QObject):
 
     def setSensors(self, sensor_names: list):
         """определение имён опрашиваемых каналов"""
-        self._sensors = {
-            name: [0.0] * self._probes if name in config.COEFS
-                else False for name in sensor_names
-        }
-
-    def reloadConfig(self):
-        """перезагрузка конфигурации"""
-        self._adam.pause()
+        self._names = tuple(sensor_names)
+        self._pipeline = SensorPipeline(self._names, self.params, self.coefs, self.filters)
+
+    def addListener(self, listener):
+        """подписка на все показания с частотой опроса: listener(dict)
+        (вызывается в потоке опроса, в отличие от сигнала dataReceived)"""
+        self._listeners.append(listener)
+
+    def removeListener(self, listener):
+        """отписка от показаний"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def setRecordsFolder(self, folder: str):
+        """задаёт папку для файлов записи телеметрии"""
+        self._records_folder = folder
+
+    def startRecording(self, name: str) -> bool:
+        """начало записи всех считанных кадров в файл"""
+        self.stopRecording()
+        if not self._records_folder:
+            logger.error("AdamManager:: не задана папка для записи телеметрии")
+            return False
         try:
-            global config
-            config = reload(config)
-        except BaseException as err:
+            self._recorder = Recorder(createPath(self._records_folder, name))
+        except OSError as err:
+            logger.error(f"AdamManager:: ошибка создания файла записи {err}")
+            return False
+        return True
+
+    def stopRecording(self):
+        """завершение записи телеметрии"""
+        recorder, self._recorder = self._recorder, None
+        if recorder:
+            recorder.close()
+
+    def reloadConfig(self) -> bool:
+        """перезагрузка конфигурации без остановки опроса: новая конфигурация
+        загружается, проверяется и компилируется, затем подменяется целиком"""
+        try:
+            namespace = loadConfig()
+            compiled = CompiledConfig.build(namespace, findStand(namespace, self._stand))
+            pipeline = SensorPipeline(
+                self._names, compiled.params, compiled.coefs, compiled.filters
+            )
+        except Exception as err:
             logger.error("Ошибка обновления конфигурации. Проверьте корректность данных.")
             logger.error(str(err))
-        self._adam.unpause()
+            return False
+        pipeline.prime(self._pipeline)
+        publisher = DeltaPublisher(compiled.deadbands, compiled.gui_interval)
+        self._config, self._pipeline, self._publisher = compiled, pipeline, publisher
+        self._adam.setReads(compiled.reads)
+        logger.info(f"AdamManager:: конфигурация стенда {self.name} обновлена")
+        return True
 
     def setPollingState(self, state: bool, interval=1):
         """вкл/выкл опрос устройства"""
-        return AdamManager.__create_task(self.setPollingStateAsync(state, interval))
+        return self.__create_task(self.setPollingStateAsync(state, interval))
 
     async def setPollingStateAsync(self, state: bool, interval=1):
-        """вкл/выкл опрос устройства (ассинхронная)"""
+        """вкл/выкл опрос устройства (ассинхронная; из любого цикла событий -
+        выполняется в цикле событий менеджера)"""
+        return await self._loop.wrap(self.__setPollingState(state, interval))
+
+    async def __setPollingState(self, state: bool, interval):
+        """вкл/выкл опрос устройства в цикле событий менеджера"""
         if state and await self._adam.connect():
+            self._publisher.reset()
             self._adam.setInterval(interval)
             return self._adam.setReadingState(True)
         self._adam.setReadingState(False)
@@ -67,23 +188,70 @@ class AdamManager(QObject):
 
     def setValue(self, param: Param, value: int) -> bool:
         """установка значения для канала"""
-        return AdamManager.__create_task(self.setValueAsync(param, value))
+        return self.__create_task(self.setValueAsync(param, value))
+
+    def setValues(self, values: list, wait=True):
+        """установка значений для нескольких каналов [(канал, значение), ...]
+        одним пакетом; wait=False - без ожидания (возвращает Future)"""
+        if wait:
+            return self.__create_task(self.setValuesAsync(values))
+        return self._loop.submit(self.setValuesAsync(values))
+
+    def transaction(self) -> Transaction:
+        """транзакция записи нескольких каналов (with adam.transaction() as tr: ...)"""
+        return Transaction(self)
 
-    def getValue(self, param: Param):
-        """получение значения из канала"""
-        return AdamManager.__create_task(self.getValueAsync(param))
+    def commitValues(self, values: list) -> bool:
+        """установка значений для нескольких каналов [(канал, значение), ...]
+        с объединением в команды записи нескольких коилов/регистров слота"""
+        return self.__create_task(self.commitValuesAsync(values))
+
+    def getValue(self, param: Param, max_age: float = None):
+        """получение значения из канала (max_age - допустимый возраст
+        последнего считанного значения, сек)"""
+        return self.__create_task(self.getValueAsync(param, max_age))
 
     async def setValueAsync(self, param: Param, value: int) -> bool:
         """установка значения для канала (ассинхронная)"""
         if self.checkParams(param, value):
-            self._adam.setChannelValue(param.slot_type, param.slot, param.channel, value)
+            await self._adam.setChannelValueAsync(
+                param.slot_type, param.slot, param.channel, value,
+                self.__getPriority(param, value)
+            )
             return True
         return False
 
-    async def getValueAsync(self, param: Param):
+    async def setValuesAsync(self, values: list) -> list:
+        """установка значений для нескольких каналов (ассинхронная);
+        команды отправляются одновременно -> список результатов"""
+        return await asyncio.gather(*(
+            self.setValueAsync(param, value) for param, value in values
+        ))
+
+    async def commitValuesAsync(self, values: list) -> bool:
+        """установка значений для нескольких каналов с объединением (ассинхронная)"""
+        slots = {}
+        for param, value in values:
+            if not self.checkParams(param, value):
+                logger.error(f"AdamManager:: неверные параметры записи {param}")
+                return False
+            # по слотам (с наивысшим приоритетом среди изменений слота)
+            key = (param.slot_type, param.slot)
+            channels, priority = slots.get(key, ({}, Priority.NORMAL))
+            channels[param.channel] = value
+            slots[key] = (channels, min(priority, self.__getPriority(param, value)))
+        await asyncio.gather(*(
+            self._adam.setChannelValuesAsync(slot_type, slot, channels, priority)
+            for (slot_type, slot), (channels, priority) in slots.items()
+        ))
+        return True
+
+    async def getValueAsync(self, param: Param, max_age: float = None):
         """получение значения для канала (ассинхронная)"""
         if self.checkParams(param, 0):
-            return self._adam.getValue(param.slot_type, param.slot, param.channel)
+            return await self._adam.getValueAsync(
+                param.slot_type, param.slot, param.channel, max_age
+            )
         return -1
 
     def checkParams(self, params: Param, value) -> bool:
@@ -95,45 +263,64 @@ class AdamManager(QObject):
                         return True
         return False
 
+    @property
+    def commandStats(self) -> dict:
+        """статистика очереди команд контроллера"""
+        return self._adam.commandStats
+
+    @property
+    def pollStats(self) -> dict:
+        """статистика опроса контроллера (тики, пропущенные тики)"""
+        return self._adam.pollStats
+
     def __adamThreadTickCallback(self):
         """тик таймера опроса устройства"""
-        self.__updateSensors()
-        args = self.__createEventArgs()
+        stamp = Metrics.stamp()
+        args = self.__updateSensors()
+        Metrics.since('adam.convert', stamp)
+        for listener in self._listeners:
+            listener(args)
+        # в интерфейс - только изменения и не чаще GUI_INTERVAL
+        if self._config.delta:
+            args = self._publisher.update(args)
+            if not args:
+                return
+        stamp = Metrics.stamp()
         try:
             self._signal.emit(args)
+            Metrics.since('adam.emit', stamp)
         except RuntimeError as err:
-            self._adam.disconnect()
+            # без ожидания: отключение дожидается завершения опроса,
+            # из которого вызван этот обработчик
+            self._loop.submit(self._adam.disconnect())
             logger.error(err.args)
 
-    def __updateSensors(self):
-        for key in self._sensors:
-            if not self._adam.isReading:
-                self._sensors[key] = [0.0] * self._probes
-                continue
-            if key not in config.PARAMS:
-                continue
-            param = config.PARAMS[key]
-            value = self._adam.getValue(param.slot_type, param.slot, param.channel)
-            if key in config.COEFS:
-                value = param.val_rng * (value - param.offset) / param.dig_max
-                value *= config.COEFS[key]
-                self._sensors[key].pop(0)
-                self._sensors[key].append(round(value, 2))
-            else:
-                self._sensors[key] = value
-
-    def __createEventArgs(self):
-        return {
-            key: sum(vals)/len(vals) if key in config.COEFS
-                else vals for key, vals in self._sensors.items()
-        }
-
-    @staticmethod
-    def __create_task(task):
-        # try:
-        #     loop = asyncio.new_event_loop()
-        #     asyncio.set_event_loop(loop)
-        #     return asyncio.create_task(task)
-        # except RuntimeError as err:
-        #     print("Async error:", err)
-        return asyncio.run(task)
+    def __updateSensors(self) -> dict:
+        """обновление значений датчиков из последнего считанного кадра"""
+        pipeline = self._pipeline
+        if not self._adam.isReading:
+            pipeline.reset()
+            return pipeline.values()
+        analog = self._adam.getSlotData(SlotType.ANALOG)
+        digital = self._adam.getSlotData(SlotType.DIGITAL)
+        pipeline.update(analog, digital)
+        recorder = self._recorder
+        if recorder and analog is not None and digital is not None:
+            recorder.write(analog, digital)
+        return pipeline.values()
+
+    def __getPriority(self, param: Param, value) -> Priority:
+        """приоритет записи: выключение каналов безопасности - вне очереди"""
+        if not value and param in self._config.safety:
+            return Priority.HIGH
+        return Priority.NORMAL
+
+    def __create_task(self, task):
+        """выполнение корутины в цикле событий менеджера с ожиданием результата;
+        из потока самого цикла ожидание невозможно - там нужны методы ...Async"""
+        if self._loop.isCurrent:
+            task.close()
+            raise RuntimeError(
+                "AdamManager:: вызов из цикла событий менеджера - используйте методы ...Async"
+            )
+        return self._loop.run(task)
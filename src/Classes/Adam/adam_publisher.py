@@ -0,0 +1,38 @@
+"""
+    AesmaDiv 2021
+    Модуль отбора изменившихся показаний для отправки в интерфейс:
+    зоны нечувствительности по каналам и ограничение частоты отправки
+"""
+from time import monotonic
+
+
+class DeltaPublisher:
+    """Класс накопления изменений показаний между отправками"""
+    def __init__(self, deadbands: dict = None, interval=0.0):
+        self._deadbands = deadbands if deadbands else {}
+        self._interval = interval
+        self._published = {}
+        self._pending = {}
+        self._stamp = 0.0
+
+    def reset(self):
+        """сброс (следующая отправка будет содержать все каналы)"""
+        self._published.clear()
+        self._pending.clear()
+        self._stamp = 0.0
+
+    def update(self, values: dict) -> dict:
+        """добавление показаний -> изменения для отправки
+        (пустой словарь - если отправлять нечего или ещё рано)"""
+        published, pending = self._published, self._pending
+        for key, value in values.items():
+            if key in published and abs(value - published[key]) <= self._deadbands.get(key, 0):
+                continue
+            published[key] = value
+            pending[key] = value
+        now = monotonic()
+        if not pending or now - self._stamp < self._interval:
+            return {}
+        self._stamp = now
+        self._pending = {}
+        return pending
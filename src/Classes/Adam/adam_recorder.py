@@ -0,0 +1,107 @@
+"""
+    AesmaDiv 2021
+    Модуль записи сырых кадров Adam5000TCP в бинарный файл
+    (кольцевой буфер фиксированных записей, отображённый в память через mmap)
+"""
+import mmap
+import os
+import struct
+from threading import Lock
+from time import time
+import numpy as np
+from loguru import logger
+
+
+# структура записи: метка времени (unix, сек), регистры аналоговых слотов, слова цифровых
+RECORD = np.dtype([
+    ('time', '<f8'),
+    ('analog', '<u2', (0x40,)),
+    ('digital', '<u2', (0x08,))
+])
+# заголовок: сигнатура, версия, размер записи, ёмкость, кол-во записанных
+HEADER = struct.Struct('<8sIIQQ')
+HEADER_SIZE = 64
+MAGIC = b'ADAMREC1'
+VERSION = 1
+EXTENSION = '.adr'
+
+
+class Recorder:
+    """Класс записи кадров в кольцевой файл"""
+    def __init__(self, path: str, capacity=72000):
+        self._path = path
+        self._capacity = capacity
+        self._lock = Lock()
+        size = HEADER_SIZE + capacity * RECORD.itemsize
+        with open(path, 'wb') as file:
+            file.truncate(size)
+        self._file = open(path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        records = np.ndarray(
+            (capacity,), dtype=RECORD, buffer=self._mmap, offset=HEADER_SIZE
+        )
+        # представления полей создаются один раз - запись пробы без выделения памяти
+        self._time = records['time']
+        self._analog = records['analog']
+        self._digital = records['digital']
+        self._count = 0
+        self._writeHeader()
+        logger.debug(f'Recorder:: запись в {path}')
+
+    @property
+    def path(self) -> str:
+        """путь к файлу записи"""
+        return self._path
+
+    @property
+    def count(self) -> int:
+        """кол-во записанных кадров (включая перезаписанные)"""
+        return self._count
+
+    def write(self, analog: np.ndarray, digital: np.ndarray, stamp: float = None):
+        """запись кадра"""
+        with self._lock:
+            if self._mmap is None:
+                return
+            index = self._count % self._capacity
+            self._time[index] = time() if stamp is None else stamp
+            self._analog[index] = analog
+            self._digital[index] = digital
+            self._count += 1
+            self._writeHeader()
+
+    def close(self):
+        """завершение записи"""
+        with self._lock:
+            if self._mmap is None:
+                return
+            self._time = self._analog = self._digital = None
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+            self._file.close()
+        logger.debug(f'Recorder:: записано кадров {self._count} в {self._path}')
+
+    def _writeHeader(self):
+        """обновление заголовка"""
+        HEADER.pack_into(
+            self._mmap, 0, MAGIC, VERSION, RECORD.itemsize, self._capacity, self._count
+        )
+
+
+def readRecording(path: str) -> np.ndarray:
+    """чтение записи -> структурированный массив кадров в хронологическом порядке"""
+    with open(path, 'rb') as file:
+        magic, version, itemsize, capacity, count = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or itemsize != RECORD.itemsize:
+        raise ValueError(f'Неверный формат файла записи: {path}')
+    records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(capacity,))
+    if count <= capacity:
+        return records[:count]
+    return np.roll(records, -(count % capacity))
+
+
+def createPath(folder: str, name: str) -> str:
+    """путь к новому файлу записи в папке"""
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, name + EXTENSION)
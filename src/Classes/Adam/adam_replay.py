@@ -0,0 +1,99 @@
+"""
+    AesmaDiv 2021
+    Модуль воспроизведения записи телеметрии Adam5000TCP вместо контроллера
+    (для воспроизведения ситуаций и замеров производительности без стенда)
+"""
+from time import monotonic
+import numpy as np
+from loguru import logger
+
+from Classes.Adam.adam_5k import Adam5K, LinkState, SlotType
+from Classes.Adam.adam_recorder import readRecording
+from Classes.Adam.adam_scheduler import Priority
+
+
+class RecordFrame:
+    """Класс кадра записи с тем же разбором, что у FrameBuffer (для Snapshot.write)"""
+    def __init__(self, records: np.ndarray):
+        self._fields = {
+            SlotType.ANALOG: records['analog'],
+            SlotType.DIGITAL: records['digital']
+        }
+        self.index = 0
+
+    def decodeInto(self, slot_type: SlotType, target: np.ndarray, start=0, count=None) -> bool:
+        """копирование значений слота (или count элементов с start) из кадра записи"""
+        count = len(target) - start if count is None else count
+        np.copyto(target[start:start + count],
+                  self._fields[slot_type][self.index, start:start + count])
+        return True
+
+
+class Adam5KReplay(Adam5K):
+    """Класс источника данных из файла записи с интерфейсом Adam5K:
+    кадры подаются в снимок с записанными интервалами, ускоренными в speed раз
+    (0 - без пауз), и транслируются тем же обработчиком тика, что и при опросе;
+    команды записи в устройство отбрасываются"""
+    def __init__(self, path: str, speed=1.0):
+        super().__init__()
+        self._path = path
+        self._records = readRecording(path)
+        self._record_frame = RecordFrame(self._records)
+        self._speed = speed
+        self._position = 0
+
+    @property
+    def progress(self) -> float:
+        """доля воспроизведённых кадров"""
+        return self._position / len(self._records) if len(self._records) else 1.0
+
+    async def connect(self) -> bool:
+        """открытие записи (с начала)"""
+        if not self.isConnected and not self.isReading and len(self._records):
+            self._position = 0
+            self._states["link"] = LinkState.CONNECTED
+            logger.debug(f'Adam5KReplay:: воспроизведение {self._path} '
+                         f'({len(self._records)} кадров, x{self._speed})')
+        return self.isConnected
+
+    def getValue(self, slot_type: SlotType, slot: int, channel: int, max_age: float = None):
+        """значение канала из снимка: устройства нет, поэтому и при
+        остановленном воспроизведении снимок не перечитывается и не сбрасывается"""
+        return self.getValue_fromData(slot_type, slot, channel, max_age)
+
+    def getValue_fromDevice(self, slot_type: SlotType, slot: int, channel: int):
+        """значение канала из снимка (текущий кадр записи)"""
+        return self.getValue_fromData(slot_type, slot, channel)
+
+    def sendCommand(self, command, priority=Priority.NORMAL):
+        """команды записи при воспроизведении не выполняются"""
+        logger.debug('Adam5KReplay:: команда записи пропущена')
+
+    async def sendCommandAsync(self, command, priority=Priority.NORMAL):
+        """команды записи при воспроизведении не выполняются"""
+        self.sendCommand(command, priority)
+
+    def _threadPolling(self):
+        """поток воспроизведения: время кадров отсчитывается от начала
+        (или от снятия с паузы), чтоб темп не уплывал на время обработки"""
+        times = self._records['time']
+        start, origin = monotonic(), times[self._position] if self.progress < 1 else 0.0
+        while self.isReading and self._position < len(self._records):
+            if self._speed > 0:
+                delay = start + (times[self._position] - origin) / self._speed - monotonic()
+                if self._wake.wait(max(delay, 0.0)):
+                    break
+            if self._states["is_paused"]:
+                if self._wake.wait(self._states["interval"]):
+                    break
+                start, origin = monotonic(), times[self._position]
+                continue
+            self._record_frame.index = self._position
+            self._snapshot.write(SlotType.ANALOG, self._record_frame)
+            self._snapshot.write(SlotType.DIGITAL, self._record_frame)
+            self._position += 1
+            self._poll_stats['ticks'] += 1
+            if self._callback:
+                self._callback()
+        if self._position >= len(self._records):
+            logger.info(f'Adam5KReplay:: воспроизведение завершено ({self._position} кадров)')
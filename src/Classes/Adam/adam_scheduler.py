@@ -0,0 +1,156 @@
+"""
+    AesmaDiv 2021
+    Модуль планировщика команд записи для Advantech Adam5000TCP:
+    объединение команд записи в один регистр, приоритеты и статистика очереди
+"""
+from collections import OrderedDict
+from enum import IntEnum
+from threading import Lock
+from time import monotonic
+
+from AesmaLib.metrics import Metrics
+
+
+class Priority(IntEnum):
+    """Приоритет команды (меньше - важнее)"""
+    HIGH = 0    # команды безопасности (останов привода и т.п.)
+    NORMAL = 1  # обычные команды управления
+
+
+class CommandScheduler:
+    """Класс очереди команд записи с объединением по регистру"""
+    FUNC_MULTI = (0x0F, 0x10)   # функции записи нескольких коил/регистров
+    FUNC_COILS = (0x05, 0x0F)   # функции записи коил (остальные - регистров)
+
+    def __init__(self):
+        self._lock = Lock()
+        self._queues = {priority: OrderedDict() for priority in Priority}
+        self._stats = {
+            'pushed': 0,        # всего поставлено в очередь
+            'coalesced': 0,     # заменено более свежими значениями
+            'patched': 0,       # исправлено значениями пересекающихся команд
+            'sent': 0,          # выдано на выполнение
+            'depth_max': 0,     # максимальная глубина очереди
+            'latency_sum': 0.0, # суммарное время ожидания в очереди, сек
+            'latency_max': 0.0  # максимальное время ожидания в очереди, сек
+        }
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def stats(self) -> dict:
+        """статистика очереди"""
+        with self._lock:
+            result = self._stats.copy()
+            result['depth'] = len(self)
+        latency_sum = result.pop('latency_sum')
+        result['latency_avg'] = latency_sum / result['sent'] if result['sent'] else 0.0
+        return result
+
+    def push(self, command: bytearray, priority: Priority = Priority.NORMAL):
+        """постановка команды в очередь;
+        команда в тот же регистр заменяет ещё не отправленную"""
+        key = CommandScheduler._getKey(command)
+        addresses = CommandScheduler._getValues(command)
+        with self._lock:
+            self._stats['pushed'] += 1
+            # ожидающие команды того же и меньшего приоритета, пересекающиеся
+            # по адресам, не должны записать устаревшие значения после этой:
+            # полностью перекрытые отменяются, частично - исправляются
+            for level in Priority:
+                if level >= priority:
+                    self._resolveOverlaps(
+                        self._queues[level], key if level == priority else None, addresses
+                    )
+            queue = self._queues[priority]
+            if key in queue:
+                # сохраняется место в очереди и время первой постановки
+                queue[key] = (command, queue[key][1])
+                self._stats['coalesced'] += 1
+            else:
+                queue[key] = (command, monotonic())
+            self._stats['depth_max'] = max(self._stats['depth_max'], len(self))
+
+    def _resolveOverlaps(self, queue: OrderedDict, key: bytes, addresses: dict):
+        """отмена/исправление команд очереди, пересекающихся с новой по адресам
+        (кроме команды с ключом key - она заменяется в своей очереди)"""
+        for other in list(queue):
+            if other == key:
+                continue
+            command, stamp = queue[other]
+            values = CommandScheduler._getValues(command)
+            common = values.keys() & addresses.keys()
+            if not common:
+                continue
+            if common == values.keys():
+                queue.pop(other)
+                self._stats['coalesced'] += 1
+            else:
+                queue[other] = (CommandScheduler._patch(command, {
+                    address: addresses[address] for address in common
+                }), stamp)
+                self._stats['patched'] += 1
+
+    def pop(self, count=1) -> list:
+        """выдача до count команд в порядке приоритета"""
+        result = []
+        now = monotonic()
+        with self._lock:
+            for priority in Priority:
+                queue = self._queues[priority]
+                while queue and len(result) < count:
+                    _, (command, stamp) = queue.popitem(last=False)
+                    latency = now - stamp
+                    self._stats['latency_sum'] += latency
+                    self._stats['latency_max'] = max(self._stats['latency_max'], latency)
+                    if Metrics.enabled:
+                        Metrics.observe('adam.queue_wait', latency)
+                    result.append(command)
+            self._stats['sent'] += len(result)
+        return result
+
+    def clear(self):
+        """очистка очереди"""
+        with self._lock:
+            for queue in self._queues.values():
+                queue.clear()
+
+    @staticmethod
+    def _getKey(command: bytearray) -> bytes:
+        """ключ объединения: адрес устройства, функция, начальный адрес
+        (и кол-во для функций записи нескольких коил/регистров)"""
+        if len(command) > 7 and command[7] in CommandScheduler.FUNC_MULTI:
+            return bytes(command[6:12])
+        return bytes(command[6:10])
+
+    @staticmethod
+    def _getValues(command: bytearray) -> dict:
+        """записываемые значения команды {(адрес устройства, коил/регистр, адрес): значение}"""
+        unit, function = command[6], command[7]
+        coils = function in CommandScheduler.FUNC_COILS
+        start = int.from_bytes(command[8:10], 'big')
+        if function not in CommandScheduler.FUNC_MULTI:
+            value = command[10] == 0xFF if coils else int.from_bytes(command[10:12], 'big')
+            return {(unit, coils, start): int(value)}
+        count = int.from_bytes(command[10:12], 'big')
+        data = command[13:]
+        if coils:
+            return {(unit, coils, start + i): (data[i // 8] >> (i % 8)) & 1 for i in range(count)}
+        return {(unit, coils, start + i): int.from_bytes(data[2 * i:2 * i + 2], 'big')
+                for i in range(count)}
+
+    @staticmethod
+    def _patch(command: bytearray, values: dict) -> bytearray:
+        """копия команды записи нескольких коил/регистров с заменой значений
+        {(адрес устройства, коил/регистр, адрес): значение}"""
+        result = bytearray(command)
+        start = int.from_bytes(command[8:10], 'big')
+        for (_, coils, address), value in values.items():
+            index = address - start
+            if coils:
+                mask = 1 << (index % 8)
+                result[13 + index // 8] = (result[13 + index // 8] & ~mask) | (mask if value else 0)
+            else:
+                result[13 + 2 * index:15 + 2 * index] = value.to_bytes(2, 'big')
+        return result
@@ -0,0 +1,121 @@
+"""
+    AesmaDiv 2021
+    Модуль векторного преобразования показаний датчиков Adam5000TCP
+    в физические величины со сглаживанием
+"""
+import numpy as np
+
+from Classes.Adam.adam_5k import SlotType
+from Classes.Adam.adam_filters import FilterParams, createFilter
+
+
+class SensorPipeline:
+    """Класс преобразования кадра аналоговых входов в значения датчиков:
+    все каналы пересчитываются одним выражением, затем сглаживаются
+    фильтрами, сгруппированными по одинаковым параметрам;
+    состояния цифровых каналов выбираются из слов слотов по маскам"""
+
+    def __init__(self, names, params: dict, coefs: dict, filters: dict = None):
+        filters = filters if filters else {}
+        self._names = tuple(
+            name for name in names
+            if name in params and params[name].slot_type == SlotType.ANALOG
+        )
+        items = [(params[name], coefs.get(name, 1.0)) for name in self._names]
+        # индекс регистра в кадре, смещение и масштаб (диапазон / макс.цифр * коэф)
+        self._index = np.array([p.slot * 8 + p.channel for p, _ in items], dtype=np.intp)
+        self._offset = np.array([p.offset for p, _ in items], dtype=np.float64)
+        self._scale = np.array([p.val_rng / p.dig_max * c for p, c in items], dtype=np.float64)
+        self._output = np.zeros(len(self._names), dtype=np.float64)
+        # группы каналов с одинаковыми параметрами фильтра -> (индексы, фильтр)
+        groups = {}
+        for i, name in enumerate(self._names):
+            groups.setdefault(filters.get(name, FilterParams()), []).append(i)
+        self._filters = [
+            (np.array(indices, dtype=np.intp), createFilter(fltr, len(indices)))
+            for fltr, indices in groups.items()
+        ]
+        # цифровые каналы: слово слота и номер бита
+        self._digital_names = tuple(
+            name for name in names
+            if name in params and params[name].slot_type == SlotType.DIGITAL
+        )
+        self._words = np.array(
+            [params[name].slot for name in self._digital_names], dtype=np.intp
+        )
+        self._bits = np.array(
+            [params[name].channel for name in self._digital_names], dtype=np.uint16
+        )
+        self._states = np.zeros(len(self._digital_names), dtype=bool)
+
+    @property
+    def names(self) -> tuple:
+        """имена обрабатываемых каналов"""
+        return self._names + self._digital_names
+
+    def reset(self):
+        """сброс состояния фильтров"""
+        for _, fltr in self._filters:
+            fltr.reset()
+        self._output.fill(0.0)
+        self._states.fill(False)
+
+    def prime(self, previous):
+        """перенос сглаженных значений из предыдущего преобразования
+        (с пересчётом под новые смещения и масштабы), чтоб после смены
+        калибровки фильтры не начинали с нуля"""
+        previous_values = previous.values()
+        self._states[:] = [previous_values.get(name, False) for name in self._digital_names]
+        if not self._names:
+            return
+        previous_raw = previous.rawValues()
+        values = np.zeros(len(self._names), dtype=np.float64)
+        known = np.zeros(len(self._names), dtype=bool)
+        for i, name in enumerate(self._names):
+            if name in previous_raw:
+                values[i] = (previous_raw[name] - self._offset[i]) * self._scale[i]
+                known[i] = True
+        for indices, fltr in self._filters:
+            if known[indices].all():
+                fltr.prime(values[indices])
+        self._output[:] = values
+
+    def update(self, analog: np.ndarray, digital: np.ndarray = None):
+        """добавление кадра аналоговых входов (сырые значения регистров)
+        и слов цифровых слотов"""
+        if digital is not None and self._digital_names:
+            np.not_equal((digital[self._words] >> self._bits) & 1, 0, out=self._states)
+        if not self._names or analog is None:
+            return
+        values = analog[self._index] - self._offset
+        values *= self._scale
+        np.round(values, 2, out=values)
+        for indices, fltr in self._filters:
+            fltr.update(values[indices])
+            self._output[indices] = fltr.output
+
+    def convert(self, analog: np.ndarray, digital: np.ndarray = None) -> dict:
+        """пересчёт пачки кадров (строки - кадры) без сглаживания
+        -> {имя канала: массив значений по кадрам}"""
+        values = np.atleast_2d(analog)[:, self._index] - self._offset
+        values *= self._scale
+        np.round(values, 2, out=values)
+        result = dict(zip(self._names, values.T))
+        if digital is not None and self._digital_names:
+            states = (np.atleast_2d(digital)[:, self._words] >> self._bits) & 1
+            result.update(zip(self._digital_names, (states != 0).T))
+        return result
+
+    def values(self) -> dict:
+        """сглаженные значения каналов и состояния цифровых"""
+        result = dict(zip(self._names, self._output.tolist()))
+        result.update(zip(self._digital_names, self._states.tolist()))
+        return result
+
+    def rawValues(self) -> dict:
+        """сглаженные значения аналоговых каналов, пересчитанные обратно
+        в значения регистров (каналы с нулевым масштабом пропускаются)"""
+        known = self._scale != 0
+        raw = self._output[known] / self._scale[known] + self._offset[known]
+        names = (name for name, flag in zip(self._names, known) if flag)
+        return dict(zip(names, raw.tolist()))
@@ -0,0 +1,99 @@
+"""
+    AesmaDiv 2021
+    Модуль службы опроса нескольких стендов:
+    все контроллеры Adam5000TCP опрашиваются в одном цикле событий
+"""
+import asyncio
+from loguru import logger
+
+from PyQt6.QtCore import pyqtSignal, QObject
+
+from Classes.Adam.adam_5k_async import EventLoopThread
+from Classes.Adam.adam_manager import AdamManager
+
+
+class AcquisitionService(QObject):
+    """Класс службы опроса стендов (у каждого стенда свой менеджер,
+    конфигурация, обработка показаний и сигнал о новых данных)"""
+    _signal = pyqtSignal(str, dict, name="dataReceived")
+
+    def __init__(self, stands: list, parent=None) -> None:
+        super().__init__(parent=parent)
+        self._loop = EventLoopThread("Adam5k acquisition loop")
+        self._managers = {}
+        for stand in stands:
+            if stand.name in self._managers:
+                logger.error(f"AcquisitionService:: повтор имени стенда {stand.name}")
+                continue
+            manager = AdamManager(stand, self._loop, self)
+            manager.dataReceived.connect(
+                lambda args, name=stand.name: self._signal.emit(name, args)
+            )
+            self._managers[stand.name] = manager
+
+    @property
+    def names(self) -> tuple:
+        """имена стендов"""
+        return tuple(self._managers)
+
+    @property
+    def managers(self) -> tuple:
+        """менеджеры стендов"""
+        return tuple(self._managers.values())
+
+    def getManager(self, name: str) -> AdamManager:
+        """менеджер стенда по имени"""
+        return self._managers.get(name)
+
+    def setSensors(self, sensor_names: list, names=None):
+        """определение имён опрашиваемых каналов стендов"""
+        for manager in self._select(names):
+            manager.setSensors(sensor_names)
+
+    def setPollingState(self, state: bool, interval=1, names=None) -> dict:
+        """вкл/выкл опрос стендов (одновременно) -> {имя стенда: результат}"""
+        managers = self._select(names)
+        results = self._loop.run(AcquisitionService._gather(
+            manager.setPollingStateAsync(state, interval) for manager in managers
+        ))
+        return {manager.name: result for manager, result in zip(managers, results)}
+
+    def reloadConfig(self) -> bool:
+        """перезагрузка конфигурации всех стендов (без остановки опроса)"""
+        return all([manager.reloadConfig() for manager in self._managers.values()])
+
+    def setRecordsFolder(self, folder: str):
+        """задаёт папку для файлов записи телеметрии всех стендов"""
+        for manager in self._managers.values():
+            manager.setRecordsFolder(folder)
+
+    def startRecording(self, name: str, names=None):
+        """начало записи телеметрии стендов (в имени файла - имя стенда)"""
+        for manager in self._select(names):
+            manager.startRecording(f"{manager.name}_{name}")
+
+    def stopRecording(self, names=None):
+        """завершение записи телеметрии стендов"""
+        for manager in self._select(names):
+            manager.stopRecording()
+
+    def close(self):
+        """остановка опроса всех стендов и цикла событий"""
+        self.stopRecording()
+        self.setPollingState(False, names=[
+            manager.name for manager in self._managers.values() if manager.isConnected
+        ])
+        for manager in self._managers.values():
+            manager.close()
+        self._loop.stop()
+
+    @staticmethod
+    async def _gather(coros) -> list:
+        """одновременное выполнение корутин в цикле событий службы"""
+        return await asyncio.gather(*coros)
+
+    def _select(self, names=None) -> list:
+        """выбор менеджеров стендов по именам (None - все)"""
+        if names is None:
+            return list(self._managers.values())
+        return [self._managers[name] for name in names if name in self._managers]
@@ -0,0 +1,309 @@
+"""
+    AesmaDiv 2021
+    Модуль имитатора Advantech Adam5000TCP (сервер Modbus/TCP на asyncio)
+    с моделью насоса - для работы без стенда, нагрузочных испытаний
+    и замеров производительности опроса.
+    Запуск: python -m Classes.Adam.adam_simulator [--stands N] [--benchmark]
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from math import sqrt
+import numpy as np
+from loguru import logger
+
+from Classes.Adam.adam_5k import SlotType
+from Classes.Adam.adam_names import ChannelNames as CN
+from Classes.Adam import adam_config as config
+
+
+@dataclass(frozen=True)
+class PumpModel:
+    """Класс параметров модели насоса (значения для номинальной скорости)"""
+    rpm: float = 2910.0         # номинальная скорость вращения, об/мин
+    flow_max: float = 250.0     # подача при полностью открытом кране, м3/сут
+    flow_bep: float = 160.0     # подача в точке макс. КПД, м3/сут
+    psi_max: float = 2800.0     # давление при закрытом кране, psi
+    psi_in: float = 15.0        # давление на входе, psi
+    efficiency: float = 0.55    # максимальный КПД
+    losses: float = 0.4         # механические потери, кВт
+    inertia: float = 0.8        # постоянная времени разгона привода, сек
+    noise: float = 0.005        # относительный шум датчиков
+
+
+class StandModel:
+    """Класс виртуального стенда: регистры и коилы контроллера + модель насоса"""
+    REGISTERS = 0x40    # аналоговые каналы (8 слотов по 8 каналов)
+    COILS = 0x80        # цифровые каналы (8 слотов по 16 каналов)
+
+    def __init__(self, pump: PumpModel = None, seed=None):
+        self._pump = pump if pump else PumpModel()
+        self._random = np.random.default_rng(seed)
+        self.registers = np.zeros(self.REGISTERS, dtype=np.uint16)
+        self.coils = np.zeros(self.COILS, dtype=np.uint8)
+        self.rpm = 0.0
+        self.requests = 0
+
+    def getValue(self, name: CN):
+        """значение канала управления в физических величинах"""
+        param = config.PARAMS[name]
+        if param.slot_type == SlotType.DIGITAL:
+            return bool(self.coils[param.slot * 16 + param.channel])
+        raw = int(self.registers[param.slot * 8 + param.channel])
+        return (raw - param.offset) * param.val_rng / param.dig_max
+
+    def setValue(self, name: CN, value: float):
+        """запись показания датчика (обратное преобразование в цифры)"""
+        param = config.PARAMS[name]
+        coef = config.COEFS.get(name, 1.0)
+        raw = value * param.dig_max / param.val_rng / coef + param.offset
+        self.registers[param.slot * 8 + param.channel] = min(max(round(raw), 0), 0xFFFF)
+
+    def step(self, seconds: float):
+        """расчёт состояния насоса через промежуток времени"""
+        pump = self._pump
+        target = self.getValue(CN.SPEED) if self.getValue(CN.ENGINE) else 0.0
+        self.rpm += (target - self.rpm) * min(seconds / pump.inertia, 1.0)
+        ratio = self.rpm / pump.rpm
+        # рабочая точка - пересечение характеристики насоса H = H0 - k * Q^2
+        # и характеристики крана; в режиме обкатки вода идёт мимо расходомеров
+        opening = self.getValue(CN.VLV_FLW) / config.PARAMS[CN.VLV_FLW].val_rng
+        if not self.getValue(CN.VLV_TST):
+            opening = 1.0
+        flow = pump.flow_max * ratio * opening / sqrt(opening ** 2 + 1.0) * sqrt(2.0)
+        psi_out = pump.psi_in + max(
+            pump.psi_max * ratio ** 2 * (1.0 - (flow / pump.flow_max) ** 2 / 2.0), 0.0
+        )
+        # мощность: гидравлическая / КПД + потери; момент в lb-in
+        lift = (psi_out - pump.psi_in) * 2.31 * 0.3048
+        hydraulic = 9.81 * flow / 86400.0 * lift
+        x = flow / (pump.flow_bep * ratio) if ratio > 0.01 else 0.0
+        efficiency = max(pump.efficiency * x * (2.0 - x), 0.05)
+        power = (hydraulic / efficiency + pump.losses * ratio) if ratio > 0.01 else 0.0
+        torque = power * 9549.0 / self.rpm / 0.113 if self.rpm > 1.0 else 0.0
+        if not self.getValue(CN.ROTATE):
+            torque = -torque
+        # показания расходомера, выбранного кранами
+        flowmeters = dict.fromkeys((CN.FLW_0, CN.FLW_1, CN.FLW_2), 0.0)
+        if self.getValue(CN.VLV_TST):
+            active = CN.FLW_0 if self.getValue(CN.VLV_1) else \
+                     CN.FLW_1 if self.getValue(CN.VLV_2) else CN.FLW_2
+            flowmeters[active] = flow
+        values = {
+            CN.RPM: self.rpm, CN.TORQUE: torque,
+            CN.PSI_IN: pump.psi_in, CN.PSI_OUT: psi_out,
+            **flowmeters
+        }
+        for name, value in values.items():
+            self.setValue(name, value * (1.0 + self._random.normal(0.0, pump.noise)))
+
+    def handle(self, pdu: bytes) -> bytes:
+        """обработка запроса Modbus (PDU без адреса устройства) -> PDU ответа"""
+        self.requests += 1
+        func = pdu[0]
+        handler = StandModel._HANDLERS.get(func)
+        if handler is None:
+            return bytes([func | 0x80, 0x01])
+        if len(pdu) < 5:
+            return bytes([func | 0x80, 0x03])
+        address = int.from_bytes(pdu[1:3], 'big')
+        value = int.from_bytes(pdu[3:5], 'big')
+        try:
+            return handler(self, func, address, value, pdu[5:])
+        except IndexError:
+            return bytes([func | 0x80, 0x02])
+        except ValueError:
+            return bytes([func | 0x80, 0x03])
+
+    def _readCoils(self, func, address, count, _) -> bytes:
+        """0x01 - чтение коилов"""
+        StandModel._checkRange(address, count, self.COILS)
+        data = np.packbits(self.coils[address:address + count], bitorder='little')
+        return bytes([func, len(data)]) + data.tobytes()
+
+    def _readRegisters(self, func, address, count, _) -> bytes:
+        """0x04 - чтение регистров"""
+        StandModel._checkRange(address, count, self.REGISTERS)
+        data = self.registers[address:address + count].astype('>u2').tobytes()
+        return bytes([func, len(data)]) + data
+
+    def _writeCoil(self, func, address, value, _) -> bytes:
+        """0x05 - запись коила"""
+        StandModel._checkRange(address, 1, self.COILS)
+        if value not in (0x0000, 0xFF00):
+            raise ValueError(value)
+        self.coils[address] = value == 0xFF00
+        return bytes([func]) + address.to_bytes(2, 'big') + value.to_bytes(2, 'big')
+
+    def _writeRegister(self, func, address, value, _) -> bytes:
+        """0x06 - запись регистра"""
+        StandModel._checkRange(address, 1, self.REGISTERS)
+        self.registers[address] = value
+        return bytes([func]) + address.to_bytes(2, 'big') + value.to_bytes(2, 'big')
+
+    def _writeCoils(self, func, address, count, data) -> bytes:
+        """0x0F - запись нескольких коилов"""
+        StandModel._checkRange(address, count, self.COILS)
+        if not data or data[0] != (count + 7) // 8 or len(data) - 1 < data[0]:
+            raise ValueError(count)
+        bits = np.unpackbits(np.frombuffer(data[1:1 + data[0]], dtype=np.uint8),
+                             bitorder='little')
+        self.coils[address:address + count] = bits[:count]
+        return bytes([func]) + address.to_bytes(2, 'big') + count.to_bytes(2, 'big')
+
+    def _writeRegisters(self, func, address, count, data) -> bytes:
+        """0x10 - запись нескольких регистров"""
+        StandModel._checkRange(address, count, self.REGISTERS)
+        if not data or data[0] != count * 2 or len(data) - 1 < data[0]:
+            raise ValueError(count)
+        self.registers[address:address + count] = np.frombuffer(
+            data[1:1 + data[0]], dtype='>u2'
+        )
+        return bytes([func]) + address.to_bytes(2, 'big') + count.to_bytes(2, 'big')
+
+    @staticmethod
+    def _checkRange(address: int, count: int, size: int):
+        """проверка диапазона адресов"""
+        if count < 1 or address + count > size:
+            raise IndexError(address)
+
+    _HANDLERS = {
+        0x01: _readCoils,
+        0x04: _readRegisters,
+        0x05: _writeCoil,
+        0x06: _writeRegister,
+        0x0F: _writeCoils,
+        0x10: _writeRegisters
+    }
+
+
+class Simulator:
+    """Класс сервера Modbus/TCP для одного или нескольких виртуальных стендов
+    (стенды слушают последовательные порты начиная с port)"""
+    PERIOD = 0.05   # шаг расчёта модели насоса, сек
+
+    def __init__(self, host='127.0.0.1', port=502, stands=1,
+                 latency=0.0, jitter=0.0, pump: PumpModel = None):
+        self._host = host
+        self._port = port
+        self._latency = latency
+        self._jitter = jitter
+        self._stands = [StandModel(pump, seed=i) for i in range(stands)]
+        self._servers = []
+        self._tasks = []
+
+    @property
+    def stands(self) -> list:
+        """виртуальные стенды"""
+        return self._stands
+
+    @property
+    def ports(self) -> list:
+        """порты стендов"""
+        return [self._port + i for i in range(len(self._stands))]
+
+    async def start(self):
+        """запуск серверов и расчёта моделей"""
+        loop = asyncio.get_running_loop()
+        for stand, port in zip(self._stands, self.ports):
+            server = await asyncio.start_server(
+                lambda r, w, s=stand: self._serve(s, r, w), self._host, port
+            )
+            self._servers.append(server)
+            self._tasks.append(loop.create_task(self._modelling(stand)))
+            logger.debug(f'Simulator:: стенд на {self._host}:{port}')
+
+    async def stop(self):
+        """остановка серверов"""
+        for task in self._tasks:
+            task.cancel()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        self._tasks.clear()
+
+    async def _modelling(self, stand: StandModel):
+        """задача расчёта модели стенда"""
+        loop = asyncio.get_running_loop()
+        stamp = loop.time()
+        while True:
+            await asyncio.sleep(self.PERIOD)
+            now = loop.time()
+            stand.step(now - stamp)
+            stamp = now
+
+    async def _serve(self, stand: StandModel,
+                     reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """обслуживание подключения: запросы выполняются по порядку,
+        как в контроллере, каждый - с заданной задержкой"""
+        try:
+            while True:
+                header = await reader.readexactly(6)
+                body = await reader.readexactly(int.from_bytes(header[4:6], 'big'))
+                delay = self._latency + random.uniform(-self._jitter, self._jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                reply = body[:1] + stand.handle(body[1:])
+                writer.write(header[:4] + len(reply).to_bytes(2, 'big') + reply)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def benchmark(host: str, port: int, seconds=5.0, use_async=False) -> dict:
+    """замер производительности опроса одного стенда клиентом Adam5K:
+    кол-во тиков в секунду и задержка между тиками (мс)"""
+    from time import perf_counter, sleep
+    from Classes.Adam.adam_5k import Adam5K
+    from Classes.Adam.adam_5k_async import Adam5KAsync
+    stamps = []
+    adam = Adam5KAsync(host, port) if use_async else Adam5K(host, port)
+    adam.setCallback(lambda: stamps.append(perf_counter()))
+    if not asyncio.run(adam.connect()):
+        return {}
+    adam.setInterval(0)
+    adam.setReadingState(True)
+    sleep(seconds)
+    adam.setReadingState(False)
+    asyncio.run(adam.disconnect())
+    periods = np.diff(stamps) * 1000.0
+    if not len(periods):
+        return {}
+    return {
+        'ticks_per_sec': len(periods) / (stamps[-1] - stamps[0]),
+        'tick_ms_avg': float(periods.mean()),
+        'tick_ms_p50': float(np.percentile(periods, 50)),
+        'tick_ms_p99': float(np.percentile(periods, 99)),
+        'tick_ms_max': float(periods.max())
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    from threading import Thread
+    parser = argparse.ArgumentParser(description='Имитатор Adam5000TCP')
+    parser.add_argument('--host', default=config.IP)
+    parser.add_argument('--port', type=int, default=config.PORT)
+    parser.add_argument('--stands', type=int, default=1, help='кол-во стендов')
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа, сек')
+    parser.add_argument('--jitter', type=float, default=0.0, help='разброс задержки, сек')
+    parser.add_argument('--benchmark', type=float, default=0.0,
+                        help='замер опроса первого стенда в течение N сек')
+    args = parser.parse_args()
+    simulator = Simulator(args.host, args.port, args.stands, args.latency, args.jitter)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(simulator.start())
+    if not args.benchmark:
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        Thread(target=loop.run_forever, daemon=True).start()
+        for mode in (False, True):
+            result = benchmark(args.host, args.port, args.benchmark, use_async=mode)
+            print('Adam5KAsync' if mode else 'Adam5K', ', '.join(
+                f'{key} {value:.2f}' for key, value in result.items()
+            ))
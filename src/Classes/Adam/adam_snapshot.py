@@ -0,0 +1,96 @@
+"""
+    AesmaDiv 2021
+    Модуль снимка последних считанных значений слотов Adam5000TCP,
+    разделяемого между потоками без блокировок (seqlock над двойным буфером)
+"""
+from time import monotonic
+import numpy as np
+
+
+class SnapshotBuffer:
+    """Класс буфера снимка: значения слотов и время их получения"""
+    __slots__ = ('slots', 'stamps')
+
+    def __init__(self, sizes: dict):
+        self.slots = {key: np.zeros(size, dtype=np.uint16) for key, size in sizes.items()}
+        self.stamps = dict.fromkeys(sizes, 0.0)  # 0 - нет данных
+
+    def copyFrom(self, other):
+        """копирование содержимого другого буфера"""
+        for key, values in self.slots.items():
+            np.copyto(values, other.slots[key])
+        self.stamps.update(other.stamps)
+
+
+class Snapshot:
+    """Класс снимка значений слотов.
+    Писатель (один поток) заполняет неактивный буфер и публикует его
+    увеличением счётчика; читатели без блокировок берут активный буфер
+    и повторяют чтение, только если за это время буфер начали перезаписывать.
+    Счётчик: чётный - опубликован кадр sequence / 2 в буфере (кадр % 2),
+    нечётный - идёт запись следующего кадра в другой буфер"""
+
+    def __init__(self, sizes: dict):
+        self._buffers = (SnapshotBuffer(sizes), SnapshotBuffer(sizes))
+        self._sequence = 0
+
+    @property
+    def sequence(self) -> int:
+        """номер опубликованного кадра"""
+        return self._sequence >> 1
+
+    def write(self, key, frame, start=0, count=None) -> bool:
+        """разбор данных слота (или count элементов с start) из буфера кадра
+        (frame.decodeInto) и публикация"""
+        sequence = self._sequence | 1
+        front = self._buffers[(sequence >> 1) & 1]
+        back = self._buffers[((sequence >> 1) + 1) & 1]
+        self._sequence = sequence
+        back.copyFrom(front)
+        result = frame.decodeInto(key, back.slots[key], start, count)
+        back.stamps[key] = monotonic() if result else 0.0
+        self._sequence = sequence + 1
+        return result
+
+    def invalidate(self, key):
+        """публикация отсутствия данных слота (ошибка чтения)"""
+        sequence = self._sequence | 1
+        front = self._buffers[(sequence >> 1) & 1]
+        back = self._buffers[((sequence >> 1) + 1) & 1]
+        self._sequence = sequence
+        back.copyFrom(front)
+        back.stamps[key] = 0.0
+        self._sequence = sequence + 1
+
+    def read(self, key, max_age: float = None):
+        """значения слота из последнего кадра (без копирования; действительны
+        до следующей записи в тот же буфер - для потока писателя)
+        -> массив или None, если данных нет или они старше max_age"""
+        buffer = self._buffers[(self._sequence >> 1) & 1]
+        if not Snapshot._isFresh(buffer.stamps[key], max_age):
+            return None
+        return buffer.slots[key]
+
+    def getItem(self, key, index: int, max_age: float = None):
+        """согласованное чтение одного значения слота за O(1)
+        -> значение или None, если данных нет или они старше max_age"""
+        while True:
+            sequence = self._sequence
+            frame = sequence >> 1
+            buffer = self._buffers[frame & 1]
+            stamp = buffer.stamps[key]
+            value = buffer.slots[key].item(index)
+            # буфер перезаписывается только при записи кадра frame + 2
+            if self._sequence - (frame << 1) <= 2:
+                break
+        return value if Snapshot._isFresh(stamp, max_age) else None
+
+    def age(self, key) -> float:
+        """возраст данных слота, сек (None - нет данных)"""
+        stamp = self._buffers[(self._sequence >> 1) & 1].stamps[key]
+        return monotonic() - stamp if stamp else None
+
+    @staticmethod
+    def _isFresh(stamp: float, max_age: float) -> bool:
+        """проверка наличия и возраста данных"""
+        return bool(stamp) and (max_age is None or monotonic() - stamp <= max_age)
@@ -0,0 +1,22 @@
+"""
+    AesmaDiv 2021
+    Модуль параметров стенда (контроллер Adam5000TCP и его конфигурация)
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StandConfig:
+    """Класс параметров стенда;
+    для незаданных params/coefs/filters используются значения из adam_config;
+    replay - путь к записи телеметрии, воспроизводимой вместо опроса контроллера
+    со скоростью speed (0 - без пауз)"""
+    name: str
+    host: str
+    port: int = 502
+    address: int = 1
+    params: dict = None
+    coefs: dict = None
+    filters: dict = None
+    replay: str = None
+    speed: float = 1.0
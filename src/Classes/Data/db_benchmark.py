@@ -0,0 +1,179 @@
+"""
+    Модуль замера времени запросов DataManager на синтетической БД
+    (прежние запросы count() + one() против выборки одним запросом -
+    на одной схеме; выигрыш от индексов поиска - отдельно, --growth)
+"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+from time import perf_counter
+
+from sqlalchemy import create_engine, exc, func
+from sqlalchemy.orm.session import Session
+
+from AesmaLib.metrics import Histogram
+from Classes.Data.db_manager import DataManager
+from Classes.Data.db_migrations import migrate
+from Classes.Data.db_tables import Base, Producer, Test, Type
+
+
+def createDatabase(path: str, tests=100_000, types=500, producers=20, seed=0):
+    """создание БД со схемой программы и синтетическими записями
+    (как до миграций: без индексов поиска, версия схемы 0; наряд-заказ
+    уникален, как и в поставляемой БД)"""
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    rng = random.Random(seed)
+    with sqlite3.connect(path) as conn:
+        conn.execute('DROP INDEX ix_Tests_Serial')
+        conn.execute('DROP INDEX ix_Types_Name_Producer')
+        conn.execute('DROP INDEX ix_Tests_DateTime')
+        conn.executemany('INSERT INTO Producers (ID, Name) VALUES (?, ?)',
+                         [(i, f'Producer {i}') for i in range(1, producers + 1)])
+        conn.executemany('INSERT INTO Types (ID, Name, Producer) VALUES (?, ?, ?)',
+                         [(i, f'TYPE-{i:04}', rng.randint(1, producers))
+                          for i in range(1, types + 1)])
+        conn.executemany(
+            'INSERT INTO Tests (ID, DateTime, OrderNum, Serial, Lease, Well, Type)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(i, f'2021-01-01 00:00:{i % 60:02}', f'ORD-{i:07}', f'SN{i // 2:07}',
+              f'Lease {rng.randint(1, 300)}', f'W-{rng.randint(1, 5000)}',
+              rng.randint(1, types))
+             for i in range(1, tests + 1)]
+        )
+
+
+def _legacyOne(engine, entities: tuple, *criteria):
+    """прежний вариант: count() и затем one() - два запроса
+    (one() для повторяющегося ключа бросает исключение, как и раньше)"""
+    with Session(engine) as session:
+        query = session.query(*entities).where(*criteria)
+        try:
+            return query.one() if query.count() else None
+        except exc.MultipleResultsFound:
+            return None
+
+
+def benchmark(path: str, repeats=200, seed=1) -> list:
+    """замер запросов поиска на случайных ключах: прежний вариант и методы
+    DataManager поочередно на одной и той же БД (после миграций), так что
+    разница - только в запросах; выигрыш от индексов - в benchmarkGrowth
+    -> [{'name', 'legacy', 'fetch': сводки Histogram}]"""
+    manager = DataManager(path)
+    engine = create_engine(f'sqlite:///{path}')
+    with Session(engine) as session:
+        tests = session.query(func.max(Test.ID)).scalar()
+        types = [{'Name': name, 'Producer': producer}
+                 for name, producer in session.query(Type.Name, Type.Producer)]
+    # метод DataManager и прежний запрос для ключа i
+    cases = {
+        'loadRecord': (
+            lambda i: manager.loadRecord(Test, i),
+            lambda i: ((Test,), (Test.ID == i,))),
+        'loadRecord_All': (
+            lambda i: manager.loadRecord_All(i),
+            lambda i: ((Test, Type, Producer),
+                       (Test.ID == i, Type.ID == Test.Type, Producer.ID == Type.Producer))),
+        'findRecord_Pump': (
+            lambda i: manager.findRecord_Pump(f'SN{i // 2:07}'),
+            lambda i: ((Test,), (Test.Serial == f'SN{i // 2:07}',))),
+        'findRecord_Test': (
+            lambda i: manager.findRecord_Test(f'ORD-{i:07}'),
+            lambda i: ((Test,), (Test.OrderNum == f'ORD-{i:07}',))),
+        'findRecord_Type': (
+            lambda i: manager.findRecord_Type(types[i % len(types)]['Name'],
+                                              types[i % len(types)]['Producer']),
+            lambda i: ((Type,), (Type.Name == types[i % len(types)]['Name'],
+                                 Type.Producer == types[i % len(types)]['Producer']))),
+    }
+    rng = random.Random(seed)
+    result = []
+    for name, (method, query) in cases.items():
+        legacy, fetch = Histogram(), Histogram()
+        for _ in range(repeats):
+            key = rng.randint(1, tests)
+            entities, criteria = query(key)
+            stamp = perf_counter()
+            _legacyOne(engine, entities, *criteria)
+            legacy.add(perf_counter() - stamp)
+            stamp = perf_counter()
+            method(key)
+            fetch.add(perf_counter() - stamp)
+        result.append({'name': name, 'legacy': legacy.summary(), 'fetch': fetch.summary()})
+    engine.dispose()
+    return result
+
+
+def _timeLookups(engine, tests: int, types: int, repeats: int, rng) -> dict:
+    """среднее время запросов поиска (как в DataManager) по случайным ключам, мс"""
+    cases = {
+        'Serial': lambda i: (Test, (Test.Serial == f'SN{i // 2:07}',), Test.ID),
+        'OrderNum': lambda i: (Test, (Test.OrderNum == f'ORD-{i:07}',), Test.ID),
+        'Type': lambda i: (Type, (Type.Name == f'TYPE-{i % types + 1:04}',
+                                  Type.Producer == i % 20 + 1), None),
+    }
+    result = {}
+    with Session(engine) as session:
+        for name, case in cases.items():
+            histogram = Histogram()
+            for _ in range(repeats):
+                entity, criteria, latest = case(rng.randint(1, tests))
+                stamp = perf_counter()
+                query = session.query(entity).where(*criteria)
+                if latest is not None:
+                    query = query.order_by(latest.desc())
+                query.first()
+                histogram.add(perf_counter() - stamp)
+            result[name] = histogram.summary()['avg_ms']
+    return result
+
+
+def benchmarkGrowth(folder: str, sizes=(1_000, 10_000, 100_000), repeats=100, seed=2) -> list:
+    """замер поиска по мере роста таблицы Tests до и после миграций
+    -> [{'tests', 'before', 'after': {запрос: среднее время, мс}}]"""
+    rng = random.Random(seed)
+    result = []
+    for size in sizes:
+        path = os.path.join(folder, f'growth_{size}.sqlite')
+        createDatabase(path, size)
+        engine = create_engine(f'sqlite:///{path}')
+        before = _timeLookups(engine, size, 500, repeats, rng)
+        migrate(engine)
+        after = _timeLookups(engine, size, 500, repeats, rng)
+        engine.dispose()
+        result.append({'tests': size, 'before': before, 'after': after})
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Замер запросов DataManager')
+    parser.add_argument('--db', default='', help='файл БД (по умолчанию - синтетическая)')
+    parser.add_argument('--tests', type=int, default=100_000, help='кол-во испытаний')
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--growth', action='store_true',
+                        help='замер поиска до/после миграций по мере роста таблицы Tests')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as folder:
+        if args.growth:
+            for row in benchmarkGrowth(folder, repeats=args.repeats):
+                print(f"{row['tests']:>7} испытаний  " + '  '.join(
+                    f"{name}: {row['before'][name]:8.3f} -> {row['after'][name]:6.3f} мс"
+                    for name in row['before']
+                ))
+            raise SystemExit
+        # замер идёт на копии: DataManager выполняет миграции и включает WAL
+        db_path = os.path.join(folder, 'bench.sqlite')
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            createDatabase(db_path, args.tests)
+        for row in benchmark(db_path, args.repeats):
+            print(
+                f"{row['name']:>16}  "
+                f"count+one: avg {row['legacy']['avg_ms']:8.3f} p99 {row['legacy']['p99_ms']:8.3f} мс  "
+                f"DataManager: avg {row['fetch']['avg_ms']:8.3f} p99 {row['fetch']['p99_ms']:8.3f} мс"
+            )
@@ -3,19 +3,37 @@
     и класс по управлению этой информацией
 """
 import os
+from contextlib import contextmanager
+from threading import local
 from loguru import logger
-from sqlalchemy import create_engine, MetaData, Row, exc
+from sqlalchemy import and_, cast, column, create_engine, event, MetaData, or_, Row, exc, text
+from sqlalchemy.sql.sqltypes import INTEGER, String
 from sqlalchemy.orm.session import sessionmaker
+from sqlalchemy.pool import QueuePool
 
+from Classes.Data.db_migrations import hasTable, migrate
 from Classes.Data.db_tables import Producer, Test, Type
 from Classes.Data.record import Record
 
 
 class DataManager:
     """Класс менеджера базы данных"""
+    # настройки SQLite для каждого нового подключения пула
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',      # чтение не блокируется записью
+        'PRAGMA synchronous=NORMAL',    # в режиме WAL - без потери целостности
+        'PRAGMA cache_size=-16000',     # кэш страниц 16 МБ
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA busy_timeout=5000',     # ожидание блокировки, мс
+    )
+    FILTER_WINDOW = 5000    # последние тесты, проверяемые перебором при фильтре списка
+
     def __init__(self, path_to_db) -> None:
         self._path_to_db = path_to_db
         self._engine = None
+        self._session = None
+        self._scope = local()
+        self._full_text = False
         self._meta = None
         self._ready = self._checkConnection(path_to_db)
 
@@ -24,16 +42,36 @@ class DataManager:
         """статус подключения к БД"""
         return self._ready
 
+    @property
+    def hasFullText(self):
+        """есть ли полнотекстовый индекс списка тестов (FTS5)"""
+        return self._full_text
+
     def execute(self, func, *args, **kwargs):
-        """выполнение запросов к БД и очистка"""
-        # engine = create_engine(f'sqlite:///{self._path_to_db}')
-        Session = sessionmaker(self._engine)
-        with Session() as session:
+        """выполнение запросов к БД: в сессии текущего sessionScope
+        или в отдельной сессии (подключение возвращается в пул)"""
+        with self.sessionScope() as session:
             kwargs.update({'session': session})
-            result = func(*args, **kwargs)
-            session.close()
-        # engine.dispose()
-        return result
+            return func(*args, **kwargs)
+
+    @contextmanager
+    def sessionScope(self):
+        """единица работы: все запросы внутри блока (в т.ч. вложенных)
+        выполняются в одной сессии на одном подключении;
+        при ошибке изменения откатываются"""
+        session = getattr(self._scope, 'session', None)
+        if session is not None:
+            yield session
+            return
+        with self._session() as session:
+            self._scope.session = session
+            try:
+                yield session
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                self._scope.session = None
 
     def createRecord(self, data: dict) -> int:
         """создание новой записи"""
@@ -47,58 +85,47 @@ class DataManager:
     def loadRecord(self, db_table, rec_id: int) -> dict:
         """загрузка информации о записи"""
         logger.debug(f'{self.loadRecord.__doc__} {db_table.__doc__} № {rec_id}')
-        def func(**kwargs):
-            query = kwargs['session'].query(
-                db_table,
-            ).where(
-                db_table.ID == rec_id
-            )
-            return query.one() if query.count() else None
-        result = self.execute(func)
+        result = self.fetchOne((db_table,), db_table.ID == rec_id)
         return DataManager._recordToDict(result)
 
     def loadRecord_Pump(self, serial) -> list:
-        """загружаем полную информацию о насосе"""
-        def func(**kwargs):
-            query = kwargs['session'].query(
-                Test, Type, Producer
-            ).where(
-                Test.Serial == serial
-            ).where(
-                Type.ID == Test.Type
-            ).where(
-                Producer.ID == Type.Producer
-            )
-            return query.one() if query.count() else None
-        result = self.execute(func)
-        return [DataManager._recordToDict(item) for item in result]
+        """загружаем полную информацию о насосе по последнему (наибольший ID)
+        испытанию с этим серийным номером"""
+        result = self.fetchOne(
+            (Test, Type, Producer),
+            Test.Serial == serial, Type.ID == Test.Type, Producer.ID == Type.Producer,
+            latest=Test.ID
+        )
+        return [DataManager._recordToDict(item) for item in result] if result else []
 
     def loadRecord_All(self, rec_id) -> list:
         """загружаем полную информацию о записи"""
-        def func(**kwargs):
-            query = kwargs['session'].query(
-                Test, Type, Producer
-            ).where(
-                Test.ID == rec_id
-            ).where(
-                Type.ID == Test.Type
-            ).where(
-                Producer.ID == Type.Producer
-            )
-            return query.one() if query.count() else None
-        result = self.execute(func)
-        return [DataManager._recordToDict(item) for item in result]
+        result = self.fetchOne(
+            (Test, Type, Producer),
+            Test.ID == rec_id, Type.ID == Test.Type, Producer.ID == Type.Producer
+        )
+        return [DataManager._recordToDict(item) for item in result] if result else []
 
     def removeRecord(self, db_table, rec_id):
         """удаляет текущую запись из БД"""
-        session = sessionmaker(self._engine)
-        with session() as session_:
-            query = session_.query(db_table).where(db_table.ID == rec_id)
-            if query.count():
-                session_.delete(query.one())
-                session_.commit()
-            session_.close()
-            self._engine.dispose()
+        def func(**kwargs):
+            session = kwargs['session']
+            item = session.get(db_table, rec_id)
+            if item is not None:
+                session.delete(item)
+                session.commit()
+        self.execute(func)
+
+    def fetchOne(self, entities: tuple, *criteria, latest=None):
+        """выборка первой подходящей записи одним запросом (LIMIT 1)
+        -> объект таблицы / Row (для нескольких entities) / None;
+        latest - столбец для выбора последней из нескольких подходящих"""
+        def func(**kwargs):
+            query = kwargs['session'].query(*entities).where(*criteria)
+            if latest is not None:
+                query = query.order_by(latest.desc())
+            return query.first()
+        return self.execute(func)
 
     def writeRecord(self, db_table, data: dict) -> int:
         """записывает данные в БД (data должен содержать ключ ID)"""
@@ -113,21 +140,35 @@ class DataManager:
                 kwargs['session'].commit()
                 data.update({'ID': item.ID })
             except exc.IntegrityError:
+                # сессия потоковая и переиспользуется - сбрасываем неудачную транзакцию
+                kwargs['session'].rollback()
                 return 0
             return item.ID
         return self.execute(func)
 
-    def getTestsList(self) -> list:
-        """получает список тестов"""
+    def getTestsPage(self, before_id: int = None, limit: int = 200,
+                     conditions: dict = None, cancel=None) -> list:
+        """получает страницу списка тестов (от новых к старым):
+        limit тестов с ID меньше before_id (с последнего - если не задан),
+        отвечающих условиям фильтра conditions (см. _testsCriteria);
+        cancel (threading.Event) прерывает выполняющийся запрос -> None"""
         def func(**kwargs):
-            query = kwargs['session'].query(
-                    Test.ID, Test.DateTime, Test.OrderNum, Test.Serial
-                ).order_by(
-                    Test.ID.desc()
-                ).all()
-            return query
+            session = kwargs['session']
+            if cancel is None:
+                return self._queryTestsPage(session, before_id, limit, conditions)
+            # SQLite вызывает обработчик каждые N инструкций и прерывает запрос
+            connection = session.connection().connection.dbapi_connection
+            connection.set_progress_handler(cancel.is_set, 1000)
+            try:
+                return self._queryTestsPage(session, before_id, limit, conditions)
+            except exc.OperationalError as error:
+                if not cancel.is_set():
+                    logger.error(f'ошибка запроса списка тестов: {error}')
+                return None
+            finally:
+                connection.set_progress_handler(None, 0)
         result = self.execute(func)
-        return self._itemsToDicts(result)
+        return None if result is None else self._itemsToDicts(result)
 
     def getListFor(self, table_class, fields) -> list:
         """получает список элементов из таблицы"""
@@ -138,57 +179,109 @@ class DataManager:
         result = self.execute(func)
         return self._itemsToDicts(result)
 
-    def findRecord_Type(self, type_name, producer_id):
+    def findRecord_Type(self, type_name, producer_id) -> dict:
         """возвращает запись с введенным именем типоразмера"""
-        def func(**kwargs):
-            query = kwargs['session'].query(
-                Type
-            ).where(
-                Type.Name ==type_name
-            ).filter(
-                Type.Producer == producer_id
-            )
-            if query.count():
-                return query.all()
-            return None
-        result = self.execute(func)
+        result = self.fetchOne((Type,), Type.Name == type_name, Type.Producer == producer_id)
         return DataManager._recordToDict(result)
 
-    def findRecord_Pump(self, serial, type_id) -> Record:
-        """возвращает запись с введенным серийным номером"""
-        def func(**kwargs):
-            query = kwargs['session'].query(
-                Test
-            ).where(
-                Test.Serial == serial
-            )
-            if query.count():
-                return query.one()
-            return None
-        result = self.execute(func)
+    def findRecord_Pump(self, serial) -> dict:
+        """возвращает запись с введенным серийным номером; насос испытывается
+        многократно - из нескольких записей возвращается последняя (наибольший ID)"""
+        result = self.fetchOne((Test,), Test.Serial == serial, latest=Test.ID)
         return DataManager._recordToDict(result)
 
-    def findRecord_Test(self, order_num) -> Record:
-        """возвращает запись с введенным номером наряд-заказа"""
-        def func(**kwargs):
-            query = kwargs['session'].query(
-                Test
-            ).where(
-                Test.OrderNum == order_num
-            )
-            return query.one() if query.count() else None
-        result = self.execute(func)
+    def findRecord_Test(self, order_num) -> dict:
+        """возвращает запись с введенным номером наряд-заказа; если их несколько
+        (БД без ограничения UNIQUE на номер) - последнюю (наибольший ID)"""
+        result = self.fetchOne((Test,), Test.OrderNum == order_num, latest=Test.ID)
         return DataManager._recordToDict(result)
 
+    def _queryTestsPage(self, session, before_id, limit, conditions) -> list:
+        """запрос страницы списка тестов: при фильтре сначала перебором
+        проверяются FILTER_WINDOW последних тестов (частые совпадения -
+        без сортировки всего диапазона индекса), оставшиеся - по индексу"""
+        def query(*criteria):
+            query = session.query(
+                    Test.ID, Test.DateTime, Test.OrderNum, Test.Serial
+                ).where(*criteria)
+            if before_id is not None:
+                query = query.where(Test.ID < before_id)
+            return query.order_by(Test.ID.desc())
+        if not any((conditions or {}).values()):
+            return query().limit(limit).all()
+        lower = query().offset(self.FILTER_WINDOW).limit(1).first()
+        window = [] if lower is None else [Test.ID > lower.ID]
+        result = query(*window, *self._testsCriteria(conditions, indexed=False)).limit(limit).all()
+        if lower is not None and len(result) < limit:
+            result += query(Test.ID <= lower.ID, *self._testsCriteria(conditions)) \
+                .limit(limit - len(result)).all()
+        return result
+
+    def _testsCriteria(self, conditions: dict, indexed=True) -> list:
+        """условия фильтра списка тестов {поле: значение}:
+        ID, DateTime, OrderNum, Serial - по началу значения (диапазон строк -
+        по индексу, indexed=False - без индекса), Text - полнотекстовый поиск
+        по началу слов в наряд-заказе, зав.номере, кусте и скважине"""
+        criteria = []
+        for key, value in (conditions or {}).items():
+            if not value:
+                continue
+            if key == 'ID':
+                criteria.append(cast(Test.ID, String).startswith(value, autoescape=True))
+            elif key == 'Text' and self._full_text:
+                criteria.append(Test.ID.in_(
+                    text('SELECT rowid FROM Tests_fts WHERE Tests_fts MATCH :match')
+                    .bindparams(match=DataManager._matchQuery(value))
+                    .columns(column('rowid', INTEGER))
+                ))
+            elif key == 'Text':
+                criteria.append(or_(*(
+                    field.contains(value, autoescape=True)
+                    for field in (Test.OrderNum, Test.Serial, Test.Lease, Test.Well)
+                )))
+            else:
+                # выражение (поле || '') SQLite не ищет по индексу
+                field = getattr(Test, key) if indexed else getattr(Test, key).concat('')
+                criteria.append(and_(field >= value,
+                                     field < value[:-1] + chr(ord(value[-1]) + 1)))
+        return criteria
+
+    @staticmethod
+    def _matchQuery(value: str) -> str:
+        """запрос FTS5: все слова (по началу), спецсимволы - как текст"""
+        words = ('"' + word.replace('"', '""') + '"*' for word in value.split())
+        return ' '.join(words)
+
     def _checkConnection(self, path_to_db):
         if os.path.exists(path_to_db):
-            self._engine = create_engine(f'sqlite:///{path_to_db}')
+            # пул соединений задается явно: SQLAlchemy 1.4 для файловой БД
+            # по умолчанию использует NullPool (новое соединение на каждую сессию);
+            # соединения пула используются и из фонового потока фильтра
+            self._engine = create_engine(f'sqlite:///{path_to_db}', poolclass=QueuePool,
+                                         connect_args={'check_same_thread': False})
+            event.listen(self._engine, 'connect', DataManager._onConnect)
+            self._session = sessionmaker(self._engine)
+            try:
+                logger.debug(f'версия схемы БД: {migrate(self._engine)}')
+            except exc.SQLAlchemyError:
+                # схема не соответствует программе - БД считается не подключенной
+                return False
+            with self._engine.connect() as conn:
+                self._full_text = hasTable(conn, 'Tests_fts')
             # self._meta = MetaData(self._engine)
             return True
         return False
 
     @staticmethod
-    def _recordToDict(record: Record) -> dict:
+    def _onConnect(dbapi_connection, _):
+        """настройка нового подключения"""
+        cursor = dbapi_connection.cursor()
+        for pragma in DataManager.PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @staticmethod
+    def _recordToDict(record) -> dict:
         try:
             return record.__dict__ if record else {}
         except AttributeError as err:
@@ -0,0 +1,115 @@
+"""
+    Модуль версионных миграций схемы БД (версия хранится в PRAGMA user_version);
+    миграции выполняются по порядку при подключении к БД
+"""
+from loguru import logger
+from sqlalchemy import exc
+
+
+def _hasIndex(conn, table: str, columns: tuple, unique=False) -> bool:
+    """есть ли индекс (в т.ч. автоиндекс ограничения UNIQUE) ровно по столбцам"""
+    for _, name, is_unique, *_ in conn.exec_driver_sql(f'PRAGMA index_list("{table}")'):
+        if unique and not is_unique:
+            continue
+        info = conn.exec_driver_sql(f'PRAGMA index_info("{name}")').fetchall()
+        if tuple(row[2] for row in info) == columns:
+            return True
+    return False
+
+
+def _hasDuplicates(conn, table: str, column: str) -> bool:
+    """есть ли в столбце повторяющиеся (не пустые) значения"""
+    duplicate = conn.exec_driver_sql(
+        f'SELECT 1 FROM "{table}" WHERE "{column}" IS NOT NULL '
+        f'GROUP BY "{column}" HAVING COUNT(*) > 1 LIMIT 1'
+    ).first()
+    if duplicate is not None:
+        logger.warning(f'{table}.{column}: есть повторы - индекс не уникальный')
+    return duplicate is not None
+
+
+def _addLookupIndexes(conn):
+    """индексы для поиска насоса, наряд-заказа и типоразмера;
+    серийный номер повторяется (насос испытывается многократно),
+    имя типоразмера в БД повторяется у одного производителя - индексы не уникальные;
+    наряд-заказ в поставляемой схеме объявлен UNIQUE (есть автоиндекс) - индекс
+    создаётся только для БД без этого ограничения (неуникальный, если есть повторы)"""
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_Tests_Serial ON Tests (Serial)')
+    if not _hasIndex(conn, 'Tests', ('OrderNum',), unique=True):
+        unique = '' if _hasDuplicates(conn, 'Tests', 'OrderNum') else 'UNIQUE '
+        conn.exec_driver_sql(f'CREATE {unique}INDEX IF NOT EXISTS ix_Tests_OrderNum ON Tests (OrderNum)')
+    conn.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_Types_Name_Producer ON Types (Name, Producer)'
+    )
+
+
+def _addTestsSearch(conn):
+    """индекс по дате испытания и, если SQLite собран с FTS5, полнотекстовый
+    индекс по наряд-заказу, заводскому номеру, кусту и скважине
+    (синхронизируется с таблицей Tests триггерами)"""
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_Tests_DateTime ON Tests (DateTime)')
+    try:
+        conn.exec_driver_sql(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS Tests_fts USING fts5('
+            "OrderNum, Serial, Lease, Well, content='Tests', content_rowid='ID', prefix='2 3')"
+        )
+    except exc.OperationalError as error:
+        logger.warning(f'полнотекстовый поиск недоступен: {error}')
+        return
+    columns = 'OrderNum, Serial, Lease, Well'
+    values = {
+        prefix: f'{prefix}.ID, ' + ', '.join(f'{prefix}.{name}' for name in columns.split(', '))
+        for prefix in ('new', 'old')
+    }
+    insert = f'INSERT INTO Tests_fts(rowid, {columns}) VALUES ({values["new"]});'
+    delete = f"INSERT INTO Tests_fts(Tests_fts, rowid, {columns}) VALUES ('delete', {values['old']});"
+    for name, event, body in (('ai', 'INSERT', insert),
+                              ('ad', 'DELETE', delete),
+                              ('au', 'UPDATE', delete + ' ' + insert)):
+        conn.exec_driver_sql(
+            f'CREATE TRIGGER IF NOT EXISTS Tests_fts_{name} AFTER {event} ON Tests '
+            f'BEGIN {body} END'
+        )
+    conn.exec_driver_sql("INSERT INTO Tests_fts(Tests_fts) VALUES ('rebuild')")
+
+
+# миграции по порядку: (версия схемы после миграции, описание, функция(conn));
+# новые миграции добавляются только в конец
+MIGRATIONS = (
+    (1, 'индексы поиска по Tests.Serial, Tests.OrderNum, Types(Name, Producer)', _addLookupIndexes),
+    (2, 'индекс Tests.DateTime и полнотекстовый индекс Tests_fts', _addTestsSearch),
+)
+
+
+def getVersion(conn) -> int:
+    """текущая версия схемы БД"""
+    return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def hasTable(conn, name: str) -> bool:
+    """есть ли в БД таблица (в т.ч. виртуальная)"""
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).first() is not None
+
+
+def migrate(engine) -> int:
+    """выполнение недостающих миграций -> версия схемы БД;
+    версия записывается после миграции, поэтому прерванная миграция
+    повторяется при следующем запуске (операции миграций - с IF NOT EXISTS);
+    ошибка миграции пробрасывается (exc.SQLAlchemyError)"""
+    with engine.connect() as conn:
+        version = getVersion(conn)
+    for target, description, func in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info(f'миграция БД {version} -> {target}: {description}')
+        try:
+            with engine.begin() as conn:
+                func(conn)
+                conn.exec_driver_sql(f'PRAGMA user_version={target}')
+        except exc.SQLAlchemyError as error:
+            logger.error(f'миграция БД {target} не выполнена: {error}')
+            raise
+        version = target
+    return version
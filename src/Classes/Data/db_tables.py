@@ -4,7 +4,7 @@
 from dataclasses import dataclass
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql.schema import Column, ForeignKey
+from sqlalchemy.sql.schema import Column, ForeignKey, Index
 from sqlalchemy.sql.sqltypes import FLOAT, INTEGER, VARCHAR, String
 
 
@@ -95,11 +95,11 @@ class Test(Base):
     """Класс испытания"""
     __tablename__ = 'Tests'
     ID = Column('ID', INTEGER, primary_key=True)
-    DateTime = Column('DateTime', String)
+    DateTime = Column('DateTime', String, index=True)
     DateAssembled = Column('DateAssembled', String)
     Customer = Column('Customer', INTEGER, ForeignKey("Customers.ID"))
     Owner = Column('Owner', INTEGER, ForeignKey("Owners.ID"))
-    OrderNum = Column('OrderNum', VARCHAR)
+    OrderNum = Column('OrderNum', VARCHAR, unique=True)
     Location = Column('Location', VARCHAR)
     Lease = Column('Lease', VARCHAR)
     Well = Column('Well', VARCHAR)
@@ -117,7 +117,7 @@ class Test(Base):
     Powers = Column('Powers', VARCHAR)
     Comments = Column('Comments', VARCHAR)
     Vibrations = Column('Vibrations', VARCHAR)
-    Serial = Column('Serial', VARCHAR)
+    Serial = Column('Serial', VARCHAR, index=True)
     Type = Column('Type', INTEGER, ForeignKey("Types.ID"))
     Party = Column('Party', INTEGER, ForeignKey("Parties.ID"))
     Material = Column('Material', INTEGER, ForeignKey("Materials.ID"))
@@ -131,6 +131,7 @@ class Test(Base):
 class Type(Base):
     """Класс типоразмера"""
     __tablename__ = 'Types'
+    __table_args__ = (Index('ix_Types_Name_Producer', 'Name', 'Producer'),)
     ID = Column('ID', INTEGER, primary_key=True)
     Name = Column('Name', VARCHAR)
     Producer = Column('Producer', INTEGER, ForeignKey("Producers.ID"))
@@ -0,0 +1,74 @@
+"""
+    Модуль векторного расчёта показателей испытания (расход, напор,
+    мощность и КПД на ступень, приведённые к номинальной скорости)
+    для текущих показаний, воспроизведения и пересчёта записанных испытаний
+"""
+import numpy as np
+
+from Classes.Adam.adam_names import ChannelNames as CN
+from Classes.Adam.adam_recorder import readRecording
+from Classes.Adam.adam_sensors import SensorPipeline
+
+PSI_TO_METERS = 2.31 * 0.3048   # 1 psi поднимает воду на 2.31 фута -> метры
+LBIN_TO_NM = 0.113              # lb-in -> Н*м
+NM_RPM_TO_KW = 1 / 9549.0       # Н*м * об/мин -> кВт
+GRAVITY = 9.81                  # м/с2
+SECONDS_PER_DAY = 24 * 3600
+
+# каналы, необходимые для расчёта по записи
+CHANNELS = (CN.FLW_0, CN.FLW_1, CN.FLW_2, CN.PSI_IN, CN.PSI_OUT,
+            CN.RPM, CN.TORQUE, CN.VLV_1, CN.VLV_2)
+
+
+def calculate(flow, psi_in, psi_out, torque, rpm, base_rpm: float, stages=1):
+    """расчёт по показаниям датчиков (числа или массивы одной длины):
+    расход (м3/сут), напор (м) и мощность (кВт) на ступень, пересчитанные
+    по законам подобия к base_rpm, и КПД (%) -> (flw, lft, pwr, eff)"""
+    flow = np.asarray(flow, dtype=np.float64)
+    rpm = np.asarray(rpm, dtype=np.float64)
+    lift = np.maximum(np.subtract(psi_out, psi_in, dtype=np.float64), 0.0) * PSI_TO_METERS
+    power = np.abs(np.asarray(torque, dtype=np.float64)) * LBIN_TO_NM * rpm * NM_RPM_TO_KW
+    # законы подобия: Q ~ n, H ~ n^2, N ~ n^3 (при нулевой скорости - без пересчёта)
+    coeff = np.divide(base_rpm, rpm, out=np.ones_like(rpm), where=rpm != 0)
+    flow = flow * coeff
+    lift = lift * coeff ** 2 / stages
+    power = power * coeff ** 3 / stages
+    return flow, lift, power, efficiency(flow, lift, power)
+
+
+def efficiency(flow, lift, power):
+    """КПД, % (0 - если расход, напор или мощность нулевые)"""
+    flow, lift, power = np.broadcast_arrays(
+        np.asarray(flow, dtype=np.float64),
+        np.asarray(lift, dtype=np.float64),
+        np.asarray(power, dtype=np.float64)
+    )
+    valid = (flow != 0) & (lift != 0) & (power != 0)
+    return np.divide(GRAVITY * lift * flow * 100.0, SECONDS_PER_DAY * power,
+                     out=np.zeros_like(flow), where=valid)
+
+
+def selectFlow(flw_0, flw_1, flw_2, vlv_1, vlv_2):
+    """показания активного расходомера по состоянию кранов
+    (кран1 - 0.5", иначе кран2 - 1", иначе 2")"""
+    return np.where(vlv_1, flw_0, np.where(vlv_2, flw_1, flw_2))
+
+
+def calculateRecording(path: str, params: dict, coefs: dict, base_rpm: float, stages=1) -> dict:
+    """пересчёт записи телеметрии целиком (без сглаживания)
+    -> {'time', 'rpm', 'flw', 'lft', 'pwr', 'eff': массивы по кадрам}"""
+    records = readRecording(path)
+    pipeline = SensorPipeline(CHANNELS, params, coefs)
+    values = pipeline.convert(records['analog'], records['digital'])
+    flow = selectFlow(values[CN.FLW_0], values[CN.FLW_1], values[CN.FLW_2],
+                      values[CN.VLV_1], values[CN.VLV_2])
+    flw, lft, pwr, eff = calculate(flow, values[CN.PSI_IN], values[CN.PSI_OUT],
+                                   values[CN.TORQUE], values[CN.RPM], base_rpm, stages)
+    return {
+        'time': np.array(records['time']),
+        'rpm': values[CN.RPM],
+        'flw': flw,
+        'lft': lft,
+        'pwr': pwr,
+        'eff': eff
+    }
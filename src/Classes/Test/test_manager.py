@@ -5,8 +5,10 @@ from enum import Enum, auto
 from loguru import logger
 
 from Classes.Adam.adam_manager import AdamManager
-from Classes.Adam.adam_config import PARAMS
 from Classes.Adam.adam_names import ChannelNames as CN
+from Classes.Adam import adam_config as config
+from Classes.Test import test_kernel
+from Classes.Test.test_steady import SteadyStateDetector
 from Classes.UI.funcs.funcs_aux import pause
 
 
@@ -42,11 +44,15 @@ class TestManager:
         self._testmode = TestMode.IDLING
         self._adam.setSensors(TestManager.SENSORS)
         self._sensors = dict.fromkeys(self.SENS_NAMES, 0.0)
+        self._adam_data = dict.fromkeys(self.SENSORS, 0.0)
+        # определение установившегося режима - на полном потоке показаний
+        self._steady = SteadyStateDetector(config.STEADY, config.STEADY_WINDOW)
+        self._adam.addListener(self._steady.update)
 
     @property
     def isEngineRunning(self):
         """проверка статуса главного привода"""
-        return self._adam.getValue(PARAMS[CN.ENGINE]) is True
+        return self._adam.getValue(self._adam.params[CN.ENGINE]) is True
 
     @property
     def sensors(self):
@@ -58,6 +64,16 @@ class TestManager:
         """текущий режим"""
         return self._testmode
 
+    @property
+    def isSteady(self) -> bool:
+        """установился ли режим (можно снимать точку)"""
+        return self._steady.isSteady
+
+    def setSteadyCallback(self, callback):
+        """привязка callback функции смены установившегося режима
+        (вызывается из потока опроса)"""
+        self._steady.setCallback(callback)
+
     def switchConnection(self, state):
         """управление подключением к ADAM"""
         result = self._adam.setPollingState(state, 0.100)
@@ -70,15 +86,17 @@ class TestManager:
         if not self._adam.isConnected:
             logger.error("Adam5KTCP не подключен.")
             return
-        self._adam.setValue(PARAMS[CN.ENGINE],      False)
-        self._adam.setValue(PARAMS[CN.VLV_AIR],     False)
-        self._adam.setValue(PARAMS[CN.VLV_WTR],     False)
-        self._adam.setValue(PARAMS[CN.VLV_TST],     False)
-        self._adam.setValue(PARAMS[CN.VLV_2],       False)
-        self._adam.setValue(PARAMS[CN.VLV_1],       False)
-        self._adam.setValue(PARAMS[CN.ROTATE],      True)
-        self._adam.setValue(PARAMS[CN.VLV_FLW],     0x0000)
-        self._adam.setValue(PARAMS[CN.SPEED],       0x0A7F)
+        params = self._adam.params
+        with self._adam.transaction() as trn:
+            trn.setValue(params[CN.ENGINE],      False)
+            trn.setValue(params[CN.VLV_AIR],     False)
+            trn.setValue(params[CN.VLV_WTR],     False)
+            trn.setValue(params[CN.VLV_TST],     False)
+            trn.setValue(params[CN.VLV_2],       False)
+            trn.setValue(params[CN.VLV_1],       False)
+            trn.setValue(params[CN.ROTATE],      True)
+            trn.setValue(params[CN.VLV_FLW],     0x0000)
+            trn.setValue(params[CN.SPEED],       0x0A7F)
         # ЗАДЕРЖКА
         pause(1)
         self._testmode = TestMode.IDLING
@@ -97,6 +115,7 @@ class TestManager:
             return False
         self._fillWithWater()
         self._setEngineState(True)
+        self._steady.reset()
         return True
 
     def stopTesting(self):
@@ -108,8 +127,12 @@ class TestManager:
         self.setDefaults()
         return True
 
-    def updateSensors(self, adam_data: dict, stages: int, base_rpm: int):
-        """обновление значений с датчиков"""
+    def updateSensors(self, adam_data: dict, stages: int, base_rpm: int) -> list:
+        """обновление значений с датчиков (adam_data может содержать
+        только изменившиеся каналы) -> имена изменившихся показаний"""
+        self._adam_data.update(adam_data)
+        adam_data = self._adam_data
+        previous = self._sensors.copy()
         self._sensors['RPM']    = round(adam_data[CN.RPM],0)          # об.мин
         self._sensors['Torque'] = abs(round(adam_data[CN.TORQUE],2))  # lb-in
         self._sensors['PsiIn']  = round(adam_data[CN.PSI_IN],2)       # psi
@@ -117,16 +140,21 @@ class TestManager:
         self._sensors['Flow0']  = round(adam_data[CN.FLW_0],2)        # м/сут
         self._sensors['Flow1']  = round(adam_data[CN.FLW_1],2)        # м/сут
         self._sensors['Flow2']  = round(adam_data[CN.FLW_2],2)        # м/сут
-        flw, lft, pwr = self._getCalculatedVals(float(base_rpm))
-        self._sensors['Flow']   = round(flw, 2)                       # м/сут
-        self._sensors['Lift']   = round(lft / float(stages), 2)       # метры
-        self._sensors['Power']  = round(pwr / float(stages), 4)       # кВт
+        flw, lft, pwr, _ = test_kernel.calculate(
+            self._sensors[self._getFlowmeterName()], self._sensors['PsiIn'],
+            self._sensors['PsiOut'], self._sensors['Torque'], self._sensors['RPM'],
+            float(base_rpm), float(stages)
+        )
+        self._sensors['Flow']   = round(float(flw), 2)                # м/сут
+        self._sensors['Lift']   = round(float(lft), 2)                # метры
+        self._sensors['Power']  = round(float(pwr), 4)                # кВт
+        return [key for key, value in self._sensors.items() if previous[key] != value]
 
     def sliderToAdam(self, name: str, slider_value: int):
         """установка значения канала из слайдера"""
         param = {
-            'sliderSpeed': PARAMS[CN.SPEED],
-            'sliderFlow': PARAMS[CN.VLV_FLW]
+            'sliderSpeed': self._adam.params[CN.SPEED],
+            'sliderFlow': self._adam.params[CN.VLV_FLW]
         }[name]
         # пока управление сладйдерами напрямую - значение слайдера летит прямо в адам
         # adam_value = int(slider_value * param.dig_max / param.val_rng)
@@ -136,7 +164,7 @@ class TestManager:
     def _setEngineState(self, state: bool):
         """вкл/выкл главный привод"""
         logger.debug(f"{'Запуск' if state else 'Остановка'} главного привода")
-        self._adam.setValue(PARAMS[CN.ENGINE], state)
+        self._adam.setValue(self._adam.params[CN.ENGINE], state)
         self._is_running = state
 
     def setEngineRotation(self, to_left: bool) -> bool:
@@ -145,7 +173,7 @@ class TestManager:
         if self._is_running:
             logger.error("Нельзя при работающем главном приводе")
             return False
-        self._adam.setValue(PARAMS[CN.ROTATE], to_left)
+        self._adam.setValue(self._adam.params[CN.ROTATE], to_left)
         return True
 #endregion <- ГЛАВНЫЙ ПРИВОД
 
@@ -180,8 +208,10 @@ class TestManager:
         # расходомер   1"   0     1
         # расходомер   2"   0     0
         self._active_flw = CN.FLW_0 if vlv1 else CN.FLW_1 if vlv2 else CN.FLW_2
-        self._adam.setValue(PARAMS[CN.VLV_2],  vlv2)
-        self._adam.setValue(PARAMS[CN.VLV_1], vlv1)
+        self._steady.reset()
+        with self._adam.transaction() as trn:
+            trn.setValue(self._adam.params[CN.VLV_2], vlv2)
+            trn.setValue(self._adam.params[CN.VLV_1], vlv1)
 #endregion <- РАСХОДОМЕРЫ
 
 #region РЕЖИМЫ РАБОТЫ ->
@@ -198,14 +228,14 @@ class TestManager:
         logger.debug(self._setMode_Purge.__doc__)
         # если продувка уже включена - выключаем и выходим
         if self._testmode == TestMode.PURGE:
-            self._adam.setValue(PARAMS[CN.VLV_AIR], False)
+            self._adam.setValue(self._adam.params[CN.VLV_AIR], False)
             self._testmode = TestMode.IDLING
             return
         self._onEvent("Идёт переключение в режим продувки...")
-        self._adam.setValue(PARAMS[CN.VLV_WTR], False)
+        self._adam.setValue(self._adam.params[CN.VLV_WTR], False)
         # ЗАДЕРЖКА
         # pause(10)
-        self._adam.setValue(PARAMS[CN.VLV_AIR], self._testmode != TestMode.PURGE)
+        self._adam.setValue(self._adam.params[CN.VLV_AIR], self._testmode != TestMode.PURGE)
         self._onEvent(None)
         self._testmode = TestMode.PURGE
 
@@ -214,7 +244,7 @@ class TestManager:
         logger.debug(self._setMode_Idling.__doc__)
         self._onEvent("Идёт переключение в режим обкатки...")
         self.setFlowmeter_2()
-        self._adam.setValue(PARAMS[CN.VLV_TST], False)
+        self._adam.setValue(self._adam.params[CN.VLV_TST], False)
         # pause(5)
         self._onEvent(None)
         self._testmode = TestMode.IDLING
@@ -226,7 +256,7 @@ class TestManager:
             logger.error("Нельзя переключаться в режим тестирования при продувке")
             return
         self._onEvent("Идёт переключение в режим теста...")
-        self._adam.setValue(PARAMS[CN.VLV_TST], True)
+        self._adam.setValue(self._adam.params[CN.VLV_TST], True)
         # pause(5)
         self._onEvent(None)
         self._testmode = TestMode.TEST
@@ -236,51 +266,22 @@ class TestManager:
     def _fillWithWater(self):
         """заполнение насоса водой"""
         logger.debug(self._fillWithWater.__doc__)
-        self._adam.setValue(PARAMS[CN.VLV_AIR], False)
-        # ЗАДЕРЖКА
-        # pause(1)
-        self._adam.setValue(PARAMS[CN.VLV_WTR], True)
+        with self._adam.transaction() as trn:
+            trn.setValue(self._adam.params[CN.VLV_AIR], False)
+            trn.setValue(self._adam.params[CN.VLV_WTR], True)
         # ЗАДЕРЖКА
         # pause(1)
         self._onEvent("Идёт заполнение водой...")
         # pause(10)
         self._onEvent("ИДЁТ ИСПЫТАНИЕ...")
 
-    def _getCalculatedVals(self, base_rpm: float):
-        """получение расчётных значений """
-        flowmeter = {
+    def _getFlowmeterName(self) -> str:
+        """имя показания активного расходомера"""
+        return {
             CN.FLW_0: "Flow0",
             CN.FLW_1: "Flow1",
             CN.FLW_2: "Flow2"
         }[self._active_flw]
-        flw = self._sensors[flowmeter]
-        lft = self._calculateLift()
-        pwr = self._calculatePower()
-        flw, lft, pwr = self._applySpeedFactor(base_rpm, flw, lft, pwr)
-        return flw, lft, pwr
-
-    def _calculateLift(self):
-        """рассчёт потребляемой мощности"""
-        psi_diff = (self._sensors['PsiOut'] - self._sensors['PsiIn'])
-        # 1 psi поднимает воду на 2.31 фута * перевод в метры
-        lift =  max(psi_diff, 0) * 2.31 * 0.3048
-        return lift
-
-    def _calculatePower(self):
-        """рассчёт потребляемой мощности"""
-        # перевод из lb-in в Н/м
-        npm = self._sensors['Torque'] * 0.113
-        power = self._sensors['RPM'] * npm / 9549.0
-        return power
-
-    def _applySpeedFactor(self, base_rpm: float, flw: float, lft: float, pwr: float):
-        """применение фактора скорости"""
-        if self._sensors['RPM']:
-            coeff = base_rpm / self._sensors['RPM']
-            flw *= coeff
-            lft *= coeff ** 2
-            pwr *= coeff ** 3
-        return flw, lft, pwr
 
     def _onEvent(self, message):
         """трансляция сообщения о событии"""
@@ -0,0 +1,110 @@
+"""
+    Модуль определения установившегося режима по потоку показаний датчиков
+    (скользящее окно, обновление за O(1) на отсчёт)
+"""
+import numpy as np
+
+
+class SteadyStateDetector:
+    """Класс детектора установившегося режима: по каждому каналу в окне
+    из window последних отсчётов поддерживаются суммы значений, квадратов
+    и произведений на номер отсчёта, по которым без прохода по окну
+    считаются СКО и наклон прямой; режим установившийся, когда во всех
+    каналах и СКО, и дрейф за окно (наклон * длина окна) не больше допуска"""
+    RESYNC = 1000   # пересчёт сумм по окну раз в RESYNC отсчётов (накопление погрешности)
+
+    def __init__(self, tolerances: dict, window=20, callback=None):
+        self._names = tuple(tolerances)
+        self._tolerances = np.array([tolerances[name] for name in self._names], dtype=np.float64)
+        self._window = window
+        self._callback = callback
+        self._buffer = np.zeros((window, len(self._names)), dtype=np.float64)
+        self._sample = np.zeros(len(self._names), dtype=np.float64)
+        self._sum = np.zeros_like(self._sample)
+        self._sum_sq = np.zeros_like(self._sample)
+        self._sum_xy = np.zeros_like(self._sample)
+        # суммы номеров отсчётов 0..window-1 и знаменатель МНК - постоянные
+        self._sum_x = window * (window - 1) / 2.0
+        self._denominator = window * (window - 1) * window * (window + 1) / 12.0
+        self._count = 0
+        self._steady = False
+        self._reset = False
+
+    @property
+    def isSteady(self) -> bool:
+        """установился ли режим"""
+        return self._steady
+
+    @property
+    def names(self) -> tuple:
+        """имена отслеживаемых каналов"""
+        return self._names
+
+    def setCallback(self, callback):
+        """привязка callback функции (вызывается при смене состояния)"""
+        self._callback = callback
+
+    def reset(self):
+        """сброс (выполняется с приходом следующего отсчёта - в потоке опроса)"""
+        self._reset = True
+
+    def update(self, values: dict) -> bool:
+        """добавление отсчёта {имя канала: значение} -> установился ли режим"""
+        if self._reset:
+            self._clear()
+        sample = self._sample
+        sample[:] = [values.get(name, 0.0) for name in self._names]
+        window = self._window
+        index = self._count % window
+        oldest = self._buffer[index]
+        if self._count < window:
+            self._sum_xy += self._count * sample
+            self._sum += sample
+            self._sum_sq += sample * sample
+        else:
+            # сдвиг окна: номера оставшихся отсчётов уменьшаются на 1
+            self._sum += sample - oldest
+            self._sum_sq += sample * sample - oldest * oldest
+            self._sum_xy += window * sample
+            self._sum_xy -= self._sum
+        oldest[:] = sample
+        self._count += 1
+        if self._count % self.RESYNC == 0:
+            self._resync()
+        return self._setSteady(self._count >= window and self._check())
+
+    def _check(self) -> bool:
+        """проверка разброса и дрейфа по всем каналам"""
+        window = self._window
+        mean = self._sum / window
+        variance = np.maximum(self._sum_sq / window - mean * mean, 0.0)
+        slope = (window * self._sum_xy - self._sum_x * self._sum) / self._denominator
+        tolerances = self._tolerances
+        return bool(np.all(variance <= tolerances * tolerances)
+                    and np.all(np.abs(slope) * (window - 1) <= tolerances))
+
+    def _resync(self):
+        """пересчёт сумм по окну (от самого старого отсчёта)"""
+        ordered = np.roll(self._buffer, -(self._count % self._window), axis=0)
+        positions = np.arange(self._window, dtype=np.float64)
+        self._sum[:] = ordered.sum(axis=0)
+        self._sum_sq[:] = (ordered * ordered).sum(axis=0)
+        self._sum_xy[:] = positions @ ordered
+
+    def _clear(self):
+        """очистка окна"""
+        self._reset = False
+        self._count = 0
+        self._buffer.fill(0.0)
+        self._sum.fill(0.0)
+        self._sum_sq.fill(0.0)
+        self._sum_xy.fill(0.0)
+        self._setSteady(False)
+
+    def _setSteady(self, state: bool) -> bool:
+        """смена состояния с оповещением"""
+        if state != self._steady:
+            self._steady = state
+            if self._callback:
+                self._callback(state)
+        return state
@@ -48,10 +48,14 @@ class Binding:
             # setattr(self, name, )
             self.bindings.update({name: bind(obj_name, prp_name)})
 
-    def toWidgets(self):
-        """запись из данных в поля"""
-        for name, binding in self.bindings.items():
-            binding.fset(self.parent, self.data[name])
+    def toWidgets(self, names=None):
+        """запись из данных в поля (names - только указанные)"""
+        if names is None:
+            names = self.bindings
+        for name in names:
+            binding = self.bindings.get(name)
+            if binding:
+                binding.fset(self.parent, self.data[name])
 
     def toData(self):
         """запись из полей в данные"""
@@ -4,6 +4,7 @@
 from time import sleep
 from PyQt6.QtWidgets import QApplication
 from AesmaLib.message import Message
+from Classes.Test.test_kernel import efficiency
 
 
 def parseFloat(text: str):
@@ -24,7 +25,7 @@ def calculateEffs(flws: list, lfts: list, pwrs: list):
     """расчёт точек КПД"""
     result = []
     if checkSameLength([flws, lfts, pwrs]):
-        result = [calculateEff(f,l,p) for f,l,p in zip(flws, lfts, pwrs)]
+        result = efficiency(flws, lfts, pwrs).tolist()
     return result
 
 def checkSameLength(arrays: list):
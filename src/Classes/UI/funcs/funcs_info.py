@@ -23,10 +23,10 @@ def addNew_Type(wnd, type_name: str, producer_name: str=""):
         wnd.signalTypeChangeRequest.emit(data)
 
 
-def findInfo_Pump(wnd, serial: str, type_id: int) -> dict:
+def findInfo_Pump(wnd, serial: str) -> dict:
     """проверка присутствия насоса в базе"""
     logger.debug(f"{findInfo_Pump.__doc__} {serial}")
-    pump = wnd.db_manager.findRecord_Pump(serial, type_id)
+    pump = wnd.db_manager.findRecord_Pump(serial)
     # если есть - выбираем
     if pump and Message.ask(
         "Внимание",
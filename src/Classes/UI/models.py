@@ -87,6 +87,89 @@ class ListModel(TemplateTableModel):
         return [index.data(Qt.ItemDataRole.UserRole) for index in matches] if matches else []
 
 
+class PagedListModel(ListModel):
+    """Модель таблицы для списка тестов с загрузкой по страницам
+    по мере прокрутки (по ключу ID - от новых к старым);
+    строки хранятся кортежами значений полей"""
+    PAGE_SIZE = 200
+
+    def __init__(self, fetch, display: list = None, headers: list = None, parent=None):
+        """fetch(before_id, limit) -> список словарей (ID по убыванию)"""
+        super().__init__(None, display, headers, parent)
+        self._fetch = fetch
+        self._keys = ()
+        self._columns = {}
+        self._has_more = False
+
+    def reload(self, rows: list = None):
+        """загрузка списка заново с первой страницы (или с готовой первой страницы rows)"""
+        self.beginResetModel()
+        self._data = []
+        self._row_count = 0
+        self._append(self._fetch(None, self.PAGE_SIZE) if rows is None else rows)
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        """есть ли ещё не загруженные строки"""
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        """загрузка следующей страницы (после последней загруженной строки)"""
+        if not self.canFetchMore(parent):
+            return
+        rows = self._fetch(self._data[-1][self._columns['ID']], self.PAGE_SIZE)
+        if not rows:
+            self._has_more = False
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+        self._append(rows)
+        self.endInsertRows()
+
+    def getData(self) -> list:
+        """загруженные строки"""
+        return [dict(zip(self._keys, row)) for row in self._data]
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole) -> QVariant:
+        """возвращает отображаемое значение"""
+        if not index.isValid():
+            return QVariant()
+        row = self._data[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return QVariant(dict(zip(self._keys, row)))
+        if role == Qt.ItemDataRole.DisplayRole:
+            column = self._columns.get(self._display[index.column()])
+            return row[column] if column is not None else QVariant()
+        return QVariant()
+
+    def getRowContains(self, column: int, value, role=Qt.ItemDataRole.DisplayRole) -> QModelIndex:
+        """возвращает строку со значением в столбце
+        (догружает страницы, пока значение может встретиться)"""
+        key = self._columns.get(self._display[column])
+        if key is None:
+            return None
+        start = 0
+        while True:
+            for row in range(start, self._row_count):
+                if self._data[row][key] == value:
+                    return self.index(row, column)
+            # ID убывают - дальше искомого не ищем
+            passed = self._display[column] == 'ID' and self._row_count \
+                and self._data[-1][key] < value
+            if passed or not self.canFetchMore():
+                return None
+            start = self._row_count
+            self.fetchMore()
+
+    def _append(self, rows: list):
+        """добавление строк страницы"""
+        if rows and not self._keys:
+            self._keys = tuple(rows[0].keys())
+            self._columns = {key: i for i, key in enumerate(self._keys)}
+        self._data.extend(tuple(row[key] for key in self._keys) for row in rows)
+        self._row_count = len(self._data)
+        self._has_more = len(rows) == self.PAGE_SIZE
+
+
 class FilterModel(QSortFilterProxyModel):
     """Модель для фильтра таблиц"""
 
@@ -1,10 +1,13 @@
 """
     Модуль содержит класс списка тестов
 """
-from PyQt6.QtCore import pyqtSignal, QObject, Qt
-from PyQt6.QtWidgets import QHeaderView, QMenu
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from PyQt6.QtCore import pyqtSignal, QObject, Qt, QTimer
+from PyQt6.QtWidgets import QHeaderView, QLineEdit, QMenu
 from PyQt6.QtGui import QCursor
 
+from Classes.UI import models
 from Classes.UI.funcs import funcs_table
 
 
@@ -12,10 +15,21 @@ class TestList(QObject):
     """Класс списка тестов"""
     _signalSelection = pyqtSignal(dict, name="selectionChanged")
     _signalMenu = pyqtSignal(str, name="menuSelected")
+    _signalFiltered = pyqtSignal(object, object, object)  # (отмена, условия, строки)
+    FILTER_DELAY = 300  # запрос по фильтру после паузы ввода, мс
 
     def __init__(self, parent) -> None:
         super().__init__(parent=parent)
         self._table = None
+        self._model = None
+        self._db_manager = None
+        self._conditions = {}   # условия фильтра отображаемого списка
+        self._pending = {}      # условия фильтра, ожидающие запроса
+        self._cancel = None     # отмена выполняющегося запроса по фильтру
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='testlist')
+        self._timer = QTimer(self, singleShot=True, interval=TestList.FILTER_DELAY)
+        self._timer.timeout.connect(self._queryFilter)
+        self._signalFiltered.connect(self._onFiltered)
 
     def build(self):
         """создание структуры списока тестов"""
@@ -42,22 +56,45 @@ class TestList(QObject):
                 headers_resizes=tests_resizes
             )
         )
+        # строка полнотекстового поиска - между фильтрами и списком
+        wnd.txtFilter_Text = QLineEdit(wnd, objectName='txtFilter_Text')
+        wnd.txtFilter_Text.setPlaceholderText('Поиск: наряд-заказ, зав.номер, куст, скважина')
+        wnd.verticalLayout.insertWidget(wnd.verticalLayout.indexOf(self._table), wnd.txtFilter_Text)
         self._table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self._table.selectionModel().currentChanged.connect(self._onSelectionChanged)
         self._table.customContextMenuRequested.connect(self._onMenuSelected)
 
     def refresh(self, db_manager):
-        """заполняет список тестов"""
-        tests_data = db_manager.getTestsList()
-        funcs_table.setData(self._table, tests_data)
+        """заполняет список тестов (первая страница, остальные - по мере прокрутки)"""
+        proxy = self._table.model()
+        model = proxy.sourceModel()
+        if not isinstance(model, models.PagedListModel):
+            self._db_manager = db_manager
+            model = models.PagedListModel(
+                lambda before_id, limit: db_manager.getTestsPage(before_id, limit, self._conditions),
+                model.getDisplay(), model.getHeaders()
+            )
+            self._model = model
+            proxy.setSourceModel(model)
+        model.reload()
         funcs_table.selectRow(self._table, 0)
         # gvars.db.set_permission('Tests', False)
 
-    def filterApply(self, conditions=None):
-        """применяет фильтр к списку тестов"""
-        self.parent().tests_filter.applyFilter(conditions)
-        if not conditions:
-            funcs_table.selectRow(self._table, -1)
+    def filterApply(self, conditions: dict = None):
+        """применяет фильтр {поле: значение} к списку тестов: запрос к БД -
+        после паузы ввода, выполняющийся запрос прерывается; сброс - сразу"""
+        self._pending = {key: value for key, value in (conditions or {}).items() if value}
+        if self._cancel:
+            self._cancel.set()
+            self._cancel = None
+        if self._pending:
+            self._timer.start()
+            return
+        self._timer.stop()
+        if self._conditions and self._model:
+            self._conditions = {}
+            self._model.reload()
+        funcs_table.selectRow(self._table, -1)
 
     def filterSwitch(self):
         """переключает список тестов (зав.номер/наряд-заказ)"""
@@ -73,14 +110,38 @@ class TestList(QObject):
             self.parent().txtFilter_Serial.show()
 
     def setCurrentTest(self, test_id: int):
-        """выбирает в списке тестов запись и указаным ID"""
+        """выбирает в списке тестов запись и указаным ID
+        (если запись скрыта фильтром - выбор не меняется)"""
         row = 0
         if test_id:
             model = self._table.model().sourceModel()
             index = model.getRowContains(0, test_id)
+            if index is None:
+                return
             row = index.row()
         self._table.selectRow(row)
 
+    def _queryFilter(self):
+        """запрос первой страницы по фильтру в фоновом потоке"""
+        if not self._db_manager:
+            return
+        self._cancel = cancel = Event()
+        conditions = self._pending
+        def query():
+            rows = self._db_manager.getTestsPage(
+                None, models.PagedListModel.PAGE_SIZE, conditions, cancel
+            )
+            self._signalFiltered.emit(cancel, conditions, rows)
+        self._executor.submit(query)
+
+    def _onFiltered(self, cancel, conditions, rows):
+        """отображение результата запроса по фильтру (если он не устарел:
+        сигнал с результатом мог встать в очередь до смены фильтра)"""
+        if cancel is not self._cancel or cancel.is_set() or rows is None:
+            return
+        self._conditions = conditions
+        self._model.reload(rows)
+
     def _onSelectionChanged(self):
         item = funcs_table.getRow(self._table)
         if item:
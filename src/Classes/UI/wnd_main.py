@@ -6,7 +6,7 @@ from loguru import logger
 
 from PyQt6 import uic
 from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal
-from PyQt6.QtWidgets import QMainWindow, QSlider, QLabel, QPushButton, QToolButton
+from PyQt6.QtWidgets import QMainWindow, QSlider, QLabel, QPushButton, QToolButton, QFileDialog
 from PyQt6.QtGui import QCloseEvent
 
 from Classes.UI.funcs import funcs_table
@@ -20,6 +20,7 @@ from Classes.UI.bindings import Binding
 from Classes.UI.progress import PurgeProgress
 from Classes.Test.test_manager import TestManager, TestMode
 from Classes.Adam.adam_manager import AdamManager
+from Classes.Adam.adam_service import AcquisitionService
 from Classes.Adam.adam_names import ChannelNames as CN
 from Classes.Data.db_manager import DataManager
 from Classes.Data.record import Record, TestData
@@ -27,10 +28,12 @@ from Classes.Data.report import Report
 from Classes.Graph.graph_manager import GraphManager
 
 from AesmaLib.message import Message
+from AesmaLib.metrics import Metrics
 
 class MainWindow(QMainWindow):
     """Класс описания функционала основного окна приложения"""
     signalTypeChangeRequest = pyqtSignal(dict, name='onTypeChangeRequest')
+    signalSteadyChanged = pyqtSignal(bool, name='onSteadyChanged')
 
     def __init__(self, path_to_ui, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -42,8 +45,10 @@ class MainWindow(QMainWindow):
             'Adam': None,
             'Data': None,
             'Graf': None,
-            'Test': None
+            'Test': None,
+            'Service': None
         }
+        self._stand_labels = {}
         self._bindings = {
             'test': None,
             'pump': None,
@@ -73,6 +78,7 @@ class MainWindow(QMainWindow):
         if self._managers['Adam']:
             # отключение ADAM 5000 TCP
             self.adam_manager.dataReceived.disconnect()
+            self.adam_manager.stopRecording()
             self.adam_manager.setPollingState(False)
         return super().closeEvent(close_event)
 
@@ -108,6 +114,10 @@ class MainWindow(QMainWindow):
         """привязка менеджера управления адамом"""
         self._managers.update({'Adam': adam_manager})
 
+    def setAcquisitionService(self, service: AcquisitionService):
+        """привязка службы опроса стендов"""
+        self._managers.update({'Service': service})
+
     def setReport(self, report: Report):
         """привязка класса протокола"""
         self._report = report
@@ -209,6 +219,9 @@ class MainWindow(QMainWindow):
         self._addPurgeElements()
         self._addMessageString()
         self._addValveIndicators()
+        self._addStandIndicators()
+        self._addSteadyElements()
+        self._addMetrics()
         self._addReloadConfig()
 
     def _addConnectionIcons(self):
@@ -255,10 +268,50 @@ class MainWindow(QMainWindow):
             self.statusBar().addWidget(lbl)
             setattr(self, name, lbl)
 
+    def _addStandIndicators(self):
+        """добавление индикаторов остальных стендов (опрашиваемых службой)"""
+        service = self._managers['Service']
+        if not service:
+            return
+        for manager in service.managers:
+            if manager is self.adam_manager:
+                continue
+            lbl = QLabel(self, text=manager.name)
+            lbl.setObjectName(f"statusStand{len(self._stand_labels)}")
+            lbl.setFixedWidth(140)
+            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.statusBar().addWidget(lbl)
+            self._stand_labels[manager.name] = lbl
+        service.dataReceived.connect(self._onService_DataReceived)
+
+    def _addSteadyElements(self):
+        """добавление индикатора установившегося режима и кнопки автоснятия точек"""
+        lbl = QLabel(self, objectName='statusSteady', text='Уст.')
+        lbl.setFixedWidth(40)
+        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lbl.setToolTip("Режим установился (показания стабильны)")
+        self.statusBar().addWidget(lbl)
+        setattr(self, 'statusSteady', lbl)
+        btn = QPushButton(self, text="Автоточка", checkable=True)
+        btn.setFixedSize(80, 20)
+        btn.setToolTip("Снимать точку автоматически при установившемся режиме")
+        self.statusBar().addWidget(btn)
+        setattr(self, 'btnAutoPoint', btn)
+
+    def _addMetrics(self):
+        """добавление кнопки сбора метрик времени выполнения"""
+        btn = QPushButton(self, text="Метрики", checkable=True)
+        btn.setFixedSize(80, 20)
+        btn.setChecked(Metrics.enabled)
+        btn.clicked.connect(self._onClicked_Metrics)
+        self.statusBar().addPermanentWidget(btn)
+        setattr(self, "btnMetrics", btn)
+
     def _addReloadConfig(self):
         """добавление кнопки перезагрузки конфига"""
         btn = QToolButton(self, width=20, height=20)
-        btn.clicked.connect(self.adam_manager.reloadConfig)
+        service = self._managers['Service']
+        btn.clicked.connect(service.reloadConfig if service else self.adam_manager.reloadConfig)
         self.statusBar().addPermanentWidget(btn, 1)
         setattr(self, 'btnReloadConfig', btn)
 
@@ -277,6 +330,7 @@ class MainWindow(QMainWindow):
         self.txtFilter_DateTime.textChanged.connect(self._onChanged_FilterApply)
         self.txtFilter_OrderNum.textChanged.connect(self._onChanged_FilterApply)
         self.txtFilter_Serial.textChanged.connect(self._onChanged_FilterApply)
+        self.txtFilter_Text.textChanged.connect(self._onChanged_FilterApply)
         self.btnFilterReset.clicked.connect(self._onClicked_FilterReset)
         self.radioOrderNum.toggled.connect(self._onToggled_TestlistColumn)
         #
@@ -315,6 +369,9 @@ class MainWindow(QMainWindow):
         self.adam_manager.dataReceived.connect(
             self._onAdam_DataReceived, no_receiver_check = True
         )
+        # смена режима приходит из потока опроса - через сигнал в поток интерфейса
+        self.signalSteadyChanged.connect(self._onChanged_Steady)
+        self.test_manager.setSteadyCallback(self.signalSteadyChanged.emit)
 #endregion <<= ИНИЦИАЛИЗАЦИЯ
 
 #region ОБРАБОТЧИКИ СОБЫТИЙ =>>
@@ -328,14 +385,16 @@ class MainWindow(QMainWindow):
         logger.info(f"Выбор теста № {item['ID']}")
         self._states['editing'].update({'pump': False, 'test': False })
         # если запись уже выбрана и загружена - выходим
-        x = time.time_ns()
         if self._testdata.test_.ID == item['ID']:
             return
+        stamp = Metrics.stamp()
         self._clearInfo()
-        self._loadInfo(item['ID'])
-        self._displayResult(self.webEngineView)
+        # все запросы загрузки записи и протокола - на одном подключении
+        with self.db_manager.sessionScope():
+            self._loadInfo(item['ID'])
+            self._displayResult(self.webEngineView)
+        Metrics.since('gui.test_select', stamp)
         logger.info(f"{'===' * 25}")
-        print(f"TEST SELECT {(time.time_ns() - x) / 1000000}")
 
     def _onToggled_TestlistColumn(self):
         """изменение столбца отображения в списке тестов (наряд-заказ/серийный номер)"""
@@ -356,12 +415,13 @@ class MainWindow(QMainWindow):
     def _onChanged_FilterApply(self, text: str):
         """изменение значения фильтра списка тестов"""
         logger.debug(f"{self._onChanged_FilterApply.__doc__} -> '{text}'")
-        conditions = [
-            self.txtFilter_ID.text(),
-            self.txtFilter_DateTime.text(),
-            self.txtFilter_OrderNum.text(),
-            self.txtFilter_Serial.text()
-        ]
+        conditions = {
+            'ID': self.txtFilter_ID.text(),
+            'DateTime': self.txtFilter_DateTime.text(),
+            'OrderNum': self.txtFilter_OrderNum.text(),
+            'Serial': self.txtFilter_Serial.text(),
+            'Text': self.txtFilter_Text.text()
+        }
         self._testlist.filterApply(conditions)
 
     def _onClicked_FilterReset(self):
@@ -516,6 +576,30 @@ class MainWindow(QMainWindow):
         self.btnEngine.setText({True: 'ЗАПУСК ДВИГАТЕЛЯ', False: 'ОСТАНОВКА ДВИГАТЕЛЯ'}[is_running])
         self.graph_manager.switchChartsVisibility(is_running)
         funcs_test.switchControlsAccessible(self, not is_running)
+        # запись телеметрии на время работы двигателя
+        if is_running:
+            self.adam_manager.stopRecording()
+        else:
+            self.adam_manager.startRecording(
+                f"test_{self._testdata.test_.ID}_{time.strftime('%Y%m%d_%H%M%S')}"
+            )
+
+    def _onClicked_Metrics(self):
+        """нажата кнопка сбора метрик: вкл. - сбор заново,
+        выкл. - вывод отчёта с возможностью сохранения в файл"""
+        logger.debug(self._onClicked_Metrics.__doc__)
+        if self.btnMetrics.isChecked():
+            Metrics.reset()
+            Metrics.setEnabled(True)
+            return
+        Metrics.setEnabled(False)
+        if not Message.choice("Метрики", Metrics.report(), ["Сохранить", "Закрыть"]):
+            path, _ = QFileDialog.getSaveFileName(
+                self, "Сохранение метрик", f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json",
+                "JSON (*.json)"
+            )
+            if path and not Metrics.export(path):
+                logger.error(f"Ошибка сохранения метрик: {path}")
 
     def _onClicked_Purge(self):
         """нажата кнопка начала/остановки продувки"""
@@ -541,16 +625,35 @@ class MainWindow(QMainWindow):
         text = text[1::] + text[0]
         self.statusMessage.setText(text)
 
+    @pyqtSlot(str, dict)
+    def _onService_DataReceived(self, name: str, adam_data: dict):
+        """получение данных от остальных стендов"""
+        lbl = self._stand_labels.get(name)
+        if lbl and CN.RPM in adam_data:
+            lbl.setText(f"{name}: {adam_data.get(CN.RPM, 0.0):.0f} об/мин")
+            self._displayLabelState(lbl, self._managers['Service'].getManager(name).isConnected)
+
     @pyqtSlot(dict)
     def _onAdam_DataReceived(self, adam_data: dict):
         """приход данных от ADAM5000TCP"""
-        self.test_manager.updateSensors(
+        stamp = Metrics.stamp()
+        changed = self.test_manager.updateSensors(
             adam_data, self._testdata.test_['Stages'], self._testdata.type_['Rpm'])
-        self._bindings['sens'].toWidgets()
+        self._bindings['sens'].toWidgets(changed)
         labels = (self.vlvAir, self.vlvWater, self.vlvTest, self.vlvF1, self.vlvF2)
         keys = (CN.VLV_AIR, CN.VLV_WTR, CN.VLV_TST, CN.VLV_1, CN.VLV_2)
         for label, key in zip(labels, keys):
-            self._displayLabelState(label, adam_data[key])
+            if key in adam_data:
+                self._displayLabelState(label, adam_data[key])
+        Metrics.since('gui.adam_data', stamp)
+
+    def _onChanged_Steady(self, state: bool):
+        """смена установившегося режима: индикация и автоснятие точки
+        (если включено и идёт испытание)"""
+        self._displayLabelState(self.statusSteady, state)
+        if state and self.btnAutoPoint.isChecked() and self.btnAddPoint.isEnabled():
+            logger.debug("Режим установился - автоснятие точки")
+            self._onClicked_PointAdd()
 
     def _onToggled_Flowmeter(self, state: bool):
         """изменение текущего расходомера"""
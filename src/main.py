@@ -5,7 +5,10 @@
     Программа для стенда испытания ЭЦН
 """
 from os import path
+from dataclasses import replace
+import argparse
 import sys
+import time
 import faulthandler
 from pathlib import Path
 from loguru import logger
@@ -20,7 +23,7 @@ from Classes.Data.db_manager import DataManager
 from Classes.Data.record import TestData
 from Classes.Data.report import Report
 from Classes.Adam import adam_config as config
-from Classes.Adam.adam_manager import AdamManager
+from Classes.Adam.adam_service import AcquisitionService
 
 # пути к файлам используемым приложением
 ROOT = Path(path.dirname(__file__)).parent.absolute()
@@ -29,7 +32,8 @@ PATHS = {
     'DB': path.join(ASSETS, 'pump.sqlite'),  # путь к файлу базы данных
     'WND': path.join(ASSETS, 'mainwindow.ui'),  # путь к файлу GUI
     'TYPE': path.join(ASSETS, 'pumpwindow.ui'),  # путь к файлу GUI
-    'TEMPLATE': path.join(ASSETS, 'report')  # путь к шаблону протокола
+    'TEMPLATE': path.join(ASSETS, 'report'),  # путь к шаблону протокола
+    'RECORDS': path.join(ASSETS, 'records')  # путь к папке записей телеметрии
 }
 
 # для отключения логирования разкомментировать эту строку
@@ -39,11 +43,19 @@ PATHS = {
 
 class App(QApplication):
     """Класс основного приложения"""
-    def __init__(self, argv) -> None:
+    def __init__(self, argv, replay: str = None, speed=1.0) -> None:
         super().__init__(argv)
         self._wnd_main = MainWindow(PATHS['WND'])
         self._wnd_type = TypeWindow(self._wnd_main, PATHS['TYPE'])
-        self._adam = AdamManager(config.IP, config.PORT, config.ADDRESS)
+        # в режиме воспроизведения - только первый стенд, данные из записи
+        stands = config.STANDS
+        if replay:
+            stands = (replace(stands[0], replay=replay, speed=speed),)
+        self._service = AcquisitionService(stands)
+        self._service.setRecordsFolder(PATHS['RECORDS'])
+        # первый стенд управляется из окна, остальные - только опрос и запись
+        self._adam = self._service.managers[0]
+        self._stands = self._service.names[1:]
         self._tdt = TestData()
         self._dbm = DataManager(PATHS['DB'])
         self._gfm = GraphManager(self._tdt)
@@ -58,12 +70,23 @@ class App(QApplication):
         self._wnd_type.setDataManager(self._dbm)
         self._wnd_main.setGraphManager(self._gfm)
         self._wnd_main.setAdamManager(self._adam)
+        self._wnd_main.setAcquisitionService(self._service)
         self._wnd_main.setTestManager(self._tst)
         self._wnd_main.setReport(self._report)
         self._wnd_main.onTypeChangeRequest.connect(self._onTypeChangeRequest)
         if self._wnd_main.show():
             self._wnd_main.initConnections()
+            self._startStands()
             self.exec()
+        self._service.close()
+
+    def _startStands(self):
+        """запуск опроса и записи телеметрии остальных стендов"""
+        if not self._stands:
+            return
+        self._service.setSensors(TestManager.SENSORS, self._stands)
+        self._service.setPollingState(True, 0.100, self._stands)
+        self._service.startRecording(time.strftime('%Y%m%d_%H%M%S'), self._stands)
 
     def _onTypeChangeRequest(self, data: dict):
         self._wnd_type.showDialog(data)
@@ -73,6 +96,11 @@ class App(QApplication):
 if __name__ == '__main__':
     logger.info("\t*** Запуск приложения ***")
     faulthandler.enable() # вкл. обработчика ошибок
-    App(sys.argv).run()
+    parser = argparse.ArgumentParser(description='Программа для стенда испытания ЭЦН')
+    parser.add_argument('--replay', help='воспроизведение записи телеметрии вместо опроса стенда')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='скорость воспроизведения (0 - максимальная)')
+    args, qt_args = parser.parse_known_args()
+    App(sys.argv[:1] + qt_args, args.replay, args.speed).run()
     faulthandler.disable() # выкл. обработчика ошибок
     logger.info("\t*** Завершение приложения ***")
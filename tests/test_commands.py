@@ -0,0 +1,86 @@
+"""
+    Тесты команд записи нескольких каналов (0x0F/0x10) на имитаторе Adam5000TCP
+"""
+import asyncio
+import socket
+from time import monotonic, sleep
+
+import pytest
+
+from Classes.Adam.adam_5k import Adam5K, CommandBuilder, SlotType
+from Classes.Adam.adam_5k_async import EventLoopThread
+from Classes.Adam.adam_simulator import Simulator, StandModel
+
+
+def _handle(stand: StandModel, command: bytearray) -> bytes:
+    """выполнение команды моделью стенда (PDU без заголовка MBAP и адреса)"""
+    assert int.from_bytes(command[4:6], 'big') == len(command) - 6
+    return stand.handle(bytes(command[7:]))
+
+
+def test_coils_frame():
+    stand = StandModel()
+    values = [1, 0, 1, 1, 0, 0, 0, 1, 1, 0]
+    reply = _handle(stand, CommandBuilder(1).buildCommand_coils(36, values))
+    assert reply == bytes([0x0F]) + (36).to_bytes(2, 'big') + len(values).to_bytes(2, 'big')
+    assert stand.coils[36:46].tolist() == values
+    assert not stand.coils[46]
+
+
+def test_registers_frame():
+    stand = StandModel()
+    values = [0, 1, 0x1234, 0xFFFF]
+    reply = _handle(stand, CommandBuilder(1).buildCommand_registers(17, values))
+    assert reply == bytes([0x10]) + (17).to_bytes(2, 'big') + len(values).to_bytes(2, 'big')
+    assert stand.registers[17:21].tolist() == values
+
+
+def test_channels_frame_addresses():
+    stand = StandModel()
+    builder = CommandBuilder(1)
+    _handle(stand, builder.buildCommand_channels(SlotType.DIGITAL, 2, 3, [1, 1]))
+    _handle(stand, builder.buildCommand_channels(SlotType.ANALOG, 2, 1, [7, 8]))
+    assert stand.coils[35:37].tolist() == [1, 1]
+    assert stand.registers[17:19].tolist() == [7, 8]
+
+
+@pytest.fixture
+def simulator():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    loop = EventLoopThread()
+    result = Simulator('127.0.0.1', port)
+    loop.run(result.start())
+    yield result
+    loop.run(result.stop())
+    loop.stop()
+
+
+def _wait(condition, timeout=3.0):
+    deadline = monotonic() + timeout
+    while not condition() and monotonic() < deadline:
+        sleep(0.01)
+    return condition()
+
+
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_channel_values_on_simulator(simulator, pipelined):
+    """запись групп каналов с пропуском: пропущенный канал не перезаписывается"""
+    stand = simulator.stands[0]
+    stand.coils[2 * 16 + 2] = 1
+    adam = Adam5K('127.0.0.1', simulator.ports[0], 1, pipelined)
+    assert asyncio.run(adam.connect())
+    adam.setInterval(0.01)
+    adam.setReadingState(True)
+    try:
+        adam.setChannelValues(SlotType.DIGITAL, 2, {0: 1, 1: 1, 3: 1, 5: 1, 6: 1})
+        adam.setChannelValues(SlotType.ANALOG, 6, {0: 100, 1: 200, 4: 500})
+        assert _wait(lambda: not adam.isBusy and stand.registers[6 * 8 + 4] == 500)
+        assert stand.coils[32:40].tolist() == [1, 1, 1, 1, 0, 1, 1, 0]
+        assert stand.registers[48:53].tolist() == [100, 200, 0, 0, 500]
+        assert _wait(lambda: adam.getValue_fromData(SlotType.DIGITAL, 2, 6))
+        assert adam.getValue_fromData(SlotType.ANALOG, 6, 1) == 200
+    finally:
+        adam.setReadingState(False)
+        asyncio.run(adam.disconnect())
@@ -0,0 +1,57 @@
+"""
+    Тесты фильтров сглаживания показаний датчиков
+"""
+from collections import deque
+
+import numpy as np
+import pytest
+
+from Classes.Adam.adam_filters import FilterParams, FilterType, createFilter
+
+
+@pytest.mark.parametrize('size', [1, 2, 5, 8])
+def test_median_matches_numpy(size):
+    rng = np.random.default_rng(size)
+    samples = rng.integers(0, 20, (100, 3)).astype(np.float64)
+    fltr = createFilter(FilterParams(FilterType.MEDIAN, size=size), 3)
+    window = deque(maxlen=size)
+    for i, values in enumerate(samples):
+        if i == 50:
+            fltr.prime(values)
+            window.extend([values] * size)
+            continue
+        fltr.update(values)
+        window.append(values)
+        assert np.array_equal(fltr.output, np.median(np.array(window), axis=0))
+
+
+def test_median_rejects_spike():
+    fltr = createFilter(FilterParams(FilterType.MEDIAN, size=5), 1)
+    fltr.prime(np.array([10.0]))
+    fltr.update(np.array([1000.0]))
+    assert fltr.output[0] == 10.0
+
+
+def test_moving_average():
+    fltr = createFilter(FilterParams(FilterType.MOVING, size=4), 2)
+    for value in (4.0, 8.0, 12.0, 16.0, 20.0):
+        fltr.update(np.array([value, -value]))
+    assert np.allclose(fltr.output, [14.0, -14.0])
+
+
+@pytest.mark.parametrize('filter_type', list(FilterType))
+def test_prime_holds_steady_state(filter_type):
+    fltr = createFilter(FilterParams(filter_type, size=5), 2)
+    fltr.prime(np.array([3.0, 7.0]))
+    for _ in range(10):
+        fltr.update(np.array([3.0, 7.0]))
+    assert np.allclose(fltr.output, [3.0, 7.0])
+
+
+@pytest.mark.parametrize('filter_type', list(FilterType))
+def test_reset_clears_state(filter_type):
+    fltr = createFilter(FilterParams(filter_type, size=5), 1)
+    fltr.prime(np.array([100.0]))
+    fltr.reset()
+    fltr.update(np.array([1.0]))
+    assert fltr.output[0] == pytest.approx(1.0 if filter_type != FilterType.MOVING else 0.2)
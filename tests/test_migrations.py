@@ -0,0 +1,90 @@
+"""
+    Тесты миграций схемы БД
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from Classes.Data.db_benchmark import createDatabase
+from Classes.Data.db_manager import DataManager
+from Classes.Data.db_migrations import MIGRATIONS, _hasIndex, migrate
+
+
+@pytest.fixture
+def path(tmp_path):
+    result = str(tmp_path / 'test.sqlite')
+    createDatabase(result, tests=200, types=20, producers=3)
+    return result
+
+
+def _schema(path: str) -> list:
+    with sqlite3.connect(path) as conn:
+        return conn.execute('SELECT type, name, sql FROM sqlite_master ORDER BY name').fetchall()
+
+
+def test_migrate_is_idempotent(path):
+    engine = create_engine(f'sqlite:///{path}')
+    assert migrate(engine) == MIGRATIONS[-1][0]
+    schema = _schema(path)
+    assert migrate(engine) == MIGRATIONS[-1][0]
+    assert _schema(path) == schema
+    indexes = {name: sql for kind, name, sql in schema if kind == 'index'}
+    assert {'ix_Tests_Serial', 'ix_Tests_DateTime', 'ix_Types_Name_Producer'} <= indexes.keys()
+    with engine.connect() as conn:
+        assert _hasIndex(conn, 'Tests', ('OrderNum',), unique=True)
+    engine.dispose()
+
+
+def test_interrupted_migration_is_repeated(path):
+    """версия записывается после миграции - повтор с IF NOT EXISTS не падает"""
+    engine = create_engine(f'sqlite:///{path}')
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql('PRAGMA user_version=0')
+    assert migrate(engine) == MIGRATIONS[-1][0]
+    engine.dispose()
+
+
+def test_full_text_index_follows_tests(path):
+    manager = DataManager(path)
+    if not manager.hasFullText:
+        pytest.skip('SQLite без FTS5')
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE Tests SET Well = 'NEWWELL' WHERE ID = 5")
+        conn.execute('DELETE FROM Tests WHERE ID = 6')
+        conn.execute("INSERT INTO Tests (ID, OrderNum, Well) VALUES (1000, 'X-1', 'NEWWELL')")
+        found = conn.execute(
+            "SELECT rowid FROM Tests_fts WHERE Tests_fts MATCH 'NEWWELL' ORDER BY rowid"
+        ).fetchall()
+        deleted = conn.execute(
+            "SELECT rowid FROM Tests_fts WHERE Tests_fts MATCH '\"ORD-0000006\"'"
+        ).fetchall()
+    assert found == [(5,), (1000,)]
+    assert not deleted
+
+
+def test_duplicate_order_numbers_get_plain_index(path):
+    """БД, созданная без ограничения UNIQUE на наряд-заказ, с повторами"""
+    with sqlite3.connect(path) as conn:
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'Tests'").fetchone()[0]
+        conn.execute('ALTER TABLE Tests RENAME TO Tests_old')
+        conn.execute(sql.replace('UNIQUE ("OrderNum"), ', ''))
+        conn.execute('INSERT INTO Tests SELECT * FROM Tests_old')
+        conn.execute('DROP TABLE Tests_old')
+        conn.execute("UPDATE Tests SET OrderNum = 'ORD-0000001' WHERE ID = 2")
+    engine = create_engine(f'sqlite:///{path}')
+    assert migrate(engine) == MIGRATIONS[-1][0]
+    engine.dispose()
+    sql = {name: sql for _, name, sql in _schema(path)}['ix_Tests_OrderNum']
+    assert 'UNIQUE' not in sql
+
+
+def test_failed_migration_raises_and_disconnects(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE ix_Tests_DateTime (x)')
+    engine = create_engine(f'sqlite:///{path}')
+    with pytest.raises(exc.SQLAlchemyError):
+        migrate(engine)
+    engine.dispose()
+    assert not DataManager(path).isConnected
@@ -0,0 +1,87 @@
+"""
+    Тесты модели списка тестов с загрузкой по страницам
+"""
+import pytest
+
+pytest.importorskip('PyQt6.QtCore')
+from PyQt6.QtCore import QCoreApplication, Qt
+
+from Classes.UI.models import PagedListModel
+
+DISPLAY = ['ID', 'DateTime', 'OrderNum', 'Serial']
+ROWS = [{'ID': i, 'DateTime': f'2021-01-01 {i:05}', 'OrderNum': f'ORD-{i}', 'Serial': f'SN{i}'}
+        for i in range(450, 0, -1)]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def application():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+class Source:
+    """источник строк по ключу ID (как DataManager.getTestsPage)"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, before_id, limit):
+        self.calls.append(before_id)
+        rows = [row for row in self.rows if before_id is None or row['ID'] < before_id]
+        return rows[:limit]
+
+
+def _model(rows=ROWS, page=100):
+    source = Source(rows)
+    model = PagedListModel(source, DISPLAY, DISPLAY)
+    model.PAGE_SIZE = page
+    model.reload()
+    return model, source
+
+
+def test_reload_loads_first_page():
+    model, source = _model()
+    assert model.rowCount() == 100
+    assert model.canFetchMore()
+    assert source.calls == [None]
+
+
+def test_fetch_more_pages_by_key():
+    model, source = _model()
+    while model.canFetchMore():
+        model.fetchMore()
+    assert [row['ID'] for row in model.getData()] == [row['ID'] for row in ROWS]
+    assert source.calls == [None, 351, 251, 151, 51]
+
+
+def test_last_full_page_ends_with_empty_fetch():
+    model, source = _model(ROWS[:200])
+    model.fetchMore()
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert not model.canFetchMore()
+    assert model.rowCount() == 200
+    assert source.calls == [None, 351, 251]
+
+
+def test_data_roles():
+    model, _ = _model()
+    index = model.index(1, 2)
+    assert model.data(index) == 'ORD-449'
+    assert model.data(index, Qt.ItemDataRole.UserRole) == ROWS[1]
+
+
+def test_get_row_contains_loads_pages():
+    model, source = _model()
+    index = model.getRowContains(0, 120)
+    assert index.row() == 330 and model.data(index) == 120
+    assert len(source.calls) == 4
+    assert model.getRowContains(0, 1000) is None
+    assert len(source.calls) == 4
+
+
+def test_reload_with_ready_page():
+    model, source = _model()
+    model.reload(ROWS[:10])
+    assert model.rowCount() == 10
+    assert not model.canFetchMore()
+    assert source.calls == [None]
@@ -0,0 +1,44 @@
+"""
+    Тесты отправки изменений показаний (DeltaPublisher)
+"""
+from Classes.Adam import adam_publisher
+from Classes.Adam.adam_publisher import DeltaPublisher
+
+
+def test_first_update_sends_all():
+    publisher = DeltaPublisher()
+    assert publisher.update({'a': 1.0, 'b': 2.0}) == {'a': 1.0, 'b': 2.0}
+
+
+def test_only_changes_are_sent():
+    publisher = DeltaPublisher()
+    publisher.update({'a': 1.0, 'b': 2.0})
+    assert publisher.update({'a': 1.0, 'b': 2.0}) == {}
+    assert publisher.update({'a': 1.0, 'b': 3.0}) == {'b': 3.0}
+
+
+def test_deadband():
+    publisher = DeltaPublisher({'a': 0.5})
+    publisher.update({'a': 10.0, 'b': 10.0})
+    assert publisher.update({'a': 10.4, 'b': 10.1}) == {'b': 10.1}
+    # отклонение считается от последнего отправленного значения, а не от предыдущего
+    assert publisher.update({'a': 10.8}) == {'a': 10.8}
+
+
+def test_interval_accumulates_changes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(adam_publisher, 'monotonic', lambda: now[0])
+    publisher = DeltaPublisher(interval=0.2)
+    assert publisher.update({'a': 1.0, 'b': 1.0}) == {'a': 1.0, 'b': 1.0}
+    now[0] += 0.1
+    assert publisher.update({'a': 2.0}) == {}
+    assert publisher.update({'b': 2.0}) == {}
+    now[0] += 0.15
+    assert publisher.update({}) == {'a': 2.0, 'b': 2.0}
+
+
+def test_reset_sends_all_again():
+    publisher = DeltaPublisher()
+    publisher.update({'a': 1.0})
+    publisher.reset()
+    assert publisher.update({'a': 1.0}) == {'a': 1.0}
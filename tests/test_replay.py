@@ -0,0 +1,49 @@
+"""
+    Тесты воспроизведения записи телеметрии вместо контроллера
+"""
+import asyncio
+from time import monotonic, sleep
+
+import numpy as np
+
+from Classes.Adam.adam_5k import LinkState, SlotType
+from Classes.Adam.adam_recorder import Recorder
+from Classes.Adam.adam_replay import Adam5KReplay
+
+
+def _record(path: str, frames: int) -> str:
+    recorder = Recorder(path, capacity=16)
+    for i in range(frames):
+        analog = np.full(0x40, 100 + i, dtype=np.uint16)
+        digital = np.full(0x08, i & 1, dtype=np.uint16)
+        recorder.write(analog, digital, stamp=float(i))
+    recorder.close()
+    return path
+
+
+def _play(replay: Adam5KReplay):
+    assert asyncio.run(replay.connect())
+    assert replay.setReadingState(True)
+    deadline = monotonic() + 2.0
+    while replay.progress < 1 and monotonic() < deadline:
+        sleep(0.01)
+    replay.setReadingState(False)
+
+
+def test_replay_feeds_all_frames(tmp_path):
+    replay = Adam5KReplay(_record(str(tmp_path / 'rec.adr'), 5), speed=0)
+    ticks = []
+    replay.setCallback(lambda: ticks.append(replay.getValue(SlotType.ANALOG, 0, 0)))
+    _play(replay)
+    assert ticks == [100, 101, 102, 103, 104]
+
+
+def test_stopped_replay_keeps_snapshot(tmp_path):
+    """после остановки значения читаются из снимка, связь не теряется"""
+    replay = Adam5KReplay(_record(str(tmp_path / 'rec.adr'), 5), speed=0)
+    _play(replay)
+    for _ in range(3):
+        assert replay.getValue(SlotType.ANALOG, 1, 2) == 104
+        assert replay.getValue(SlotType.DIGITAL, 0, 0) is False
+    assert replay.getSlotData(SlotType.ANALOG) is not None
+    assert replay.linkState == LinkState.CONNECTED
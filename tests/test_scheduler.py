@@ -0,0 +1,131 @@
+"""
+    Тесты планировщика команд записи Adam5000TCP
+"""
+from Classes.Adam.adam_5k import CommandBuilder, CommandType, Param, SlotType
+from Classes.Adam.adam_scheduler import CommandScheduler, Priority
+
+BUILDER = CommandBuilder(1)
+
+
+def _coil(slot, channel, value):
+    return BUILDER.buildCommand_register(CommandType.WRITE, Param(SlotType.DIGITAL, slot, channel), value)
+
+
+def _register(slot, channel, value):
+    return BUILDER.buildCommand_register(CommandType.WRITE, Param(SlotType.ANALOG, slot, channel), value)
+
+
+def test_pop_keeps_fifo_order():
+    scheduler = CommandScheduler()
+    commands = [_coil(2, 0, 1), _register(2, 0, 100), _coil(2, 1, 1)]
+    for command in commands:
+        scheduler.push(command)
+    assert scheduler.pop(10) == commands
+    assert len(scheduler) == 0
+
+
+def test_pop_limits_count():
+    scheduler = CommandScheduler()
+    for channel in range(5):
+        scheduler.push(_coil(2, channel, 1))
+    assert len(scheduler.pop(3)) == 3
+    assert len(scheduler) == 2
+
+
+def test_same_register_coalesced_in_place():
+    scheduler = CommandScheduler()
+    scheduler.push(_register(2, 0, 100))
+    scheduler.push(_register(2, 1, 5))
+    scheduler.push(_register(2, 0, 200))
+    assert scheduler.pop(10) == [_register(2, 0, 200), _register(2, 1, 5)]
+    assert scheduler.stats['coalesced'] == 1
+
+
+def test_high_priority_goes_first():
+    scheduler = CommandScheduler()
+    scheduler.push(_register(2, 0, 100))
+    scheduler.push(_coil(2, 1, 0), Priority.HIGH)
+    assert scheduler.pop(1) == [_coil(2, 1, 0)]
+    assert scheduler.pop(1) == [_register(2, 0, 100)]
+
+
+def test_high_priority_cancels_pending_normal_write():
+    scheduler = CommandScheduler()
+    scheduler.push(_coil(2, 0, 1))
+    scheduler.push(_coil(2, 0, 0), Priority.HIGH)
+    assert scheduler.pop(10) == [_coil(2, 0, 0)]
+
+
+def test_normal_write_does_not_cancel_high():
+    scheduler = CommandScheduler()
+    scheduler.push(_coil(2, 0, 0), Priority.HIGH)
+    scheduler.push(_coil(2, 0, 1))
+    assert scheduler.pop(10) == [_coil(2, 0, 0), _coil(2, 0, 1)]
+
+
+def test_clear_and_stats():
+    scheduler = CommandScheduler()
+    scheduler.push(_coil(2, 0, 1))
+    scheduler.push(_coil(2, 1, 1))
+    scheduler.pop(1)
+    stats = scheduler.stats
+    assert (stats['pushed'], stats['sent'], stats['depth'], stats['depth_max']) == (2, 1, 1, 2)
+    scheduler.clear()
+    assert len(scheduler) == 0
+
+
+def _coils(slot, channel, values):
+    return BUILDER.buildCommand_channels(SlotType.DIGITAL, slot, channel, values)
+
+
+def _written(commands: list) -> dict:
+    """итоговые значения коилов/регистров после выполнения команд по порядку"""
+    result = {}
+    for command in commands:
+        result.update(CommandScheduler._getValues(command))
+    return result
+
+
+def test_high_frame_cancels_covered_normal_write():
+    scheduler = CommandScheduler()
+    scheduler.push(_coil(2, 0, 1))
+    scheduler.push(_coils(2, 0, [0, 0, 0]), Priority.HIGH)
+    assert scheduler.pop(10) == [_coils(2, 0, [0, 0, 0])]
+
+
+def test_high_write_patches_overlapping_normal_frame():
+    scheduler = CommandScheduler()
+    scheduler.push(_coils(2, 0, [1, 1, 1]))
+    scheduler.push(_coil(2, 1, 0), Priority.HIGH)
+    commands = scheduler.pop(10)
+    assert commands[0] == _coil(2, 1, 0)
+    assert commands[1] == _coils(2, 0, [1, 0, 1])
+    assert scheduler.stats['patched'] == 1
+
+
+def test_registers_frame_patched():
+    scheduler = CommandScheduler()
+    scheduler.push(BUILDER.buildCommand_registers(8, [1, 2, 3]))
+    scheduler.push(_register(1, 1, 99), Priority.HIGH)
+    assert _written(scheduler.pop(10))[(1, False, 9)] == 99
+
+
+def test_coalescing_does_not_reorder_overlapping_writes():
+    """замена команды на её месте в очереди не должна ставить её
+    перед более поздней пересекающейся командой"""
+    scheduler = CommandScheduler()
+    scheduler.push(_coil(2, 0, 0))
+    scheduler.push(_coils(2, 0, [0, 1]))
+    scheduler.push(_coil(2, 0, 1))
+    assert _written(scheduler.pop(10))[(1, True, 32)] == 1
+
+
+def test_different_devices_and_tables_do_not_overlap():
+    scheduler = CommandScheduler()
+    other = CommandBuilder(2).buildCommand_register(
+        CommandType.WRITE, Param(SlotType.DIGITAL, 2, 0), 1
+    )
+    scheduler.push(other)
+    scheduler.push(_register(4, 0, 5))
+    scheduler.push(_coil(2, 0, 0), Priority.HIGH)
+    assert len(scheduler.pop(10)) == 3
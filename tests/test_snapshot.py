@@ -0,0 +1,87 @@
+"""
+    Тесты снимка значений слотов (seqlock над двойным буфером)
+"""
+from threading import Event, Thread
+
+import numpy as np
+
+from Classes.Adam.adam_5k import FrameBuffer, SlotType
+from Classes.Adam.adam_snapshot import Snapshot
+
+
+def _frame(values: list) -> FrameBuffer:
+    """кадр ответа на чтение регистров с values"""
+    frame = FrameBuffer()
+    data = b''.join(value.to_bytes(2, 'big') for value in values)
+    body = bytes([1, 0x03, len(data)]) + data
+    frame.buffer[:6 + len(body)] = bytes(4) + len(body).to_bytes(2, 'big') + body
+    frame.length = 6 + len(body)
+    return frame
+
+
+def _snapshot() -> Snapshot:
+    return Snapshot({SlotType.ANALOG: 0x40, SlotType.DIGITAL: 0x08})
+
+
+def test_no_data_before_write():
+    snapshot = _snapshot()
+    assert snapshot.read(SlotType.ANALOG) is None
+    assert snapshot.getItem(SlotType.ANALOG, 0) is None
+    assert snapshot.age(SlotType.ANALOG) is None
+
+
+def test_write_publishes_values():
+    snapshot = _snapshot()
+    assert snapshot.write(SlotType.ANALOG, _frame(list(range(0x40))))
+    assert snapshot.sequence == 1
+    assert snapshot.getItem(SlotType.ANALOG, 10) == 10
+    assert np.array_equal(snapshot.read(SlotType.ANALOG), np.arange(0x40))
+
+
+def test_partial_write_keeps_other_values():
+    snapshot = _snapshot()
+    snapshot.write(SlotType.ANALOG, _frame([1] * 0x40))
+    assert snapshot.write(SlotType.ANALOG, _frame([7, 8]), start=16, count=2)
+    values = snapshot.read(SlotType.ANALOG)
+    assert values[15:19].tolist() == [1, 7, 8, 1]
+
+
+def test_bad_frame_and_invalidate_drop_data():
+    snapshot = _snapshot()
+    snapshot.write(SlotType.ANALOG, _frame([1] * 0x40))
+    assert not snapshot.write(SlotType.ANALOG, _frame([1, 2]))
+    assert snapshot.read(SlotType.ANALOG) is None
+    snapshot.write(SlotType.ANALOG, _frame([1] * 0x40))
+    snapshot.invalidate(SlotType.ANALOG)
+    assert snapshot.getItem(SlotType.ANALOG, 0) is None
+
+
+def test_max_age():
+    snapshot = _snapshot()
+    snapshot.write(SlotType.ANALOG, _frame([1] * 0x40))
+    assert snapshot.getItem(SlotType.ANALOG, 0, max_age=60.0) == 1
+    assert snapshot.getItem(SlotType.ANALOG, 0, max_age=-1.0) is None
+
+
+def test_reader_never_sees_torn_frame():
+    """кадры записываются возрастающими значениями - последующее
+    согласованное чтение не может вернуть значение более раннего кадра"""
+    snapshot = _snapshot()
+    snapshot.write(SlotType.ANALOG, _frame([0] * 0x40))
+    frames = [_frame([value] * 0x40) for value in range(1, 1000)]
+    stop, torn = Event(), []
+
+    def reader():
+        while not stop.is_set():
+            first = snapshot.getItem(SlotType.ANALOG, 0)
+            last = snapshot.getItem(SlotType.ANALOG, 0x3F)
+            if first is None or last is None or last < first:
+                torn.append((first, last))
+
+    thread = Thread(target=reader)
+    thread.start()
+    for frame in frames:
+        snapshot.write(SlotType.ANALOG, frame)
+    stop.set()
+    thread.join()
+    assert not torn
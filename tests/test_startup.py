@@ -0,0 +1,90 @@
+"""
+    Проверка запуска приложения: главное окно с двумя стендами на имитаторе
+"""
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+from time import monotonic, sleep
+
+import pytest
+
+# QtWebEngine (протокол испытания) импортируется до создания QApplication
+pytest.importorskip('PyQt6.QtWebEngineWidgets', exc_type=ImportError)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import main
+from Classes.Adam import adam_config as config
+from Classes.Adam.adam_5k_async import EventLoopThread
+from Classes.Adam.adam_simulator import Simulator
+from Classes.Adam.adam_stand import StandConfig
+
+
+def _freePorts(count: int) -> int:
+    """первый из count свободных подряд идущих портов"""
+    for _ in range(20):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        try:
+            for offset in range(1, count):
+                with socket.socket() as sock:
+                    sock.bind(('127.0.0.1', port + offset))
+        except OSError:
+            continue
+        return port
+    pytest.skip('нет свободных портов')
+
+
+@pytest.fixture
+def simulator():
+    loop = EventLoopThread()
+    result = Simulator('127.0.0.1', _freePorts(2), stands=2)
+    loop.run(result.start())
+    yield result
+    loop.run(result.stop())
+    loop.stop()
+
+
+def test_startup(simulator, tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'pump.sqlite')
+    shutil.copyfile(main.PATHS['DB'], db_path)
+    # испытания без точек: проверяется запуск, а не расчёт кривых протокола
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE Tests SET Flows = '', Lifts = '', Powers = '', Vibrations = ''")
+    monkeypatch.setitem(main.PATHS, 'DB', db_path)
+    monkeypatch.setitem(main.PATHS, 'RECORDS', str(tmp_path / 'records'))
+    # протокол сохраняет картинку графика в папку шаблона
+    template = str(tmp_path / 'report')
+    shutil.copytree(main.PATHS['TEMPLATE'], template)
+    monkeypatch.setitem(main.PATHS, 'TEMPLATE', template)
+    monkeypatch.setattr(config, 'STANDS', tuple(
+        StandConfig(f'Стенд {i + 1}', '127.0.0.1', port)
+        for i, port in enumerate(simulator.ports)
+    ))
+    errors = []
+    monkeypatch.setattr(sys, 'excepthook', lambda *args: errors.append(args))
+    state = {}
+
+    def exec_(app):
+        """вместо цикла событий: ждём данные обоих стендов и закрываем окно"""
+        window = app._wnd_main
+        label = window._stand_labels['Стенд 2']
+        deadline = monotonic() + 5.0
+        while monotonic() < deadline and not errors and 'об/мин' not in label.text():
+            app.processEvents()
+            sleep(0.01)
+        state.update(visible=window.isVisible(), label=label.text(),
+                     connected=window.chkConnection.isChecked())
+        window.close()
+        app.processEvents()
+        return 0
+
+    monkeypatch.setattr(main.App, 'exec', exec_)
+    app = main.App(sys.argv[:1])
+    app.run()
+    assert not errors
+    assert state['visible'] and state['connected']
+    assert 'об/мин' in state['label']
+    assert simulator.stands[0].requests and simulator.stands[1].requests
@@ -0,0 +1,60 @@
+"""
+    Тесты детектора установившегося режима
+"""
+import numpy as np
+
+from Classes.Test.test_steady import SteadyStateDetector
+
+
+def _naive(window: np.ndarray, tolerances: np.ndarray) -> bool:
+    """проверка по окну напрямую: СКО и дрейф прямой МНК"""
+    slope = np.polyfit(np.arange(len(window)), window, 1)[0]
+    return bool(np.all(window.std(axis=0) <= tolerances)
+                and np.all(np.abs(slope) * (len(window) - 1) <= tolerances))
+
+
+def test_constant_signal_becomes_steady_when_window_fills():
+    states = []
+    detector = SteadyStateDetector({'a': 1.0, 'b': 1.0}, window=10, callback=states.append)
+    results = [detector.update({'a': 5.0, 'b': 100.0}) for _ in range(12)]
+    assert results == [False] * 9 + [True] * 3
+    assert states == [True]
+
+
+def test_noise_above_tolerance_is_not_steady():
+    rng = np.random.default_rng(0)
+    detector = SteadyStateDetector({'a': 1.0}, window=20)
+    for value in rng.normal(0.0, 3.0, 200):
+        assert not detector.update({'a': value})
+
+
+def test_drift_is_not_steady():
+    """медленный рост: СКО в окне меньше допуска, а дрейф за окно - больше"""
+    detector = SteadyStateDetector({'a': 1.0}, window=20)
+    for i in range(100):
+        assert not detector.update({'a': 0.1 * i})
+
+
+def test_matches_direct_calculation():
+    rng = np.random.default_rng(1)
+    tolerances = np.array([1.0, 2.0])
+    detector = SteadyStateDetector({'a': 1.0, 'b': 2.0}, window=15)
+    detector.RESYNC = 100
+    levels = np.repeat(rng.normal(50.0, 10.0, (40, 2)), 60, axis=0)
+    samples = levels + rng.normal(0.0, 1.0, levels.shape) \
+        + np.outer(np.sin(np.arange(len(levels)) / 40.0), [0.3, 0.5])
+    for i, (a, b) in enumerate(samples):
+        steady = detector.update({'a': a, 'b': b})
+        if i >= 14:
+            assert steady == _naive(samples[i - 14:i + 1], tolerances), i
+
+
+def test_reset():
+    states = []
+    detector = SteadyStateDetector({'a': 1.0}, window=5, callback=states.append)
+    for _ in range(5):
+        detector.update({'a': 1.0})
+    detector.reset()
+    assert detector.isSteady
+    assert not detector.update({'a': 1.0})
+    assert states == [True, False]
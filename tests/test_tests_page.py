@@ -0,0 +1,114 @@
+"""
+    Тесты постраничного списка тестов с фильтрами (DataManager.getTestsPage)
+"""
+import re
+import sqlite3
+from threading import Event
+
+import pytest
+
+from Classes.Data.db_benchmark import createDatabase
+from Classes.Data.db_manager import DataManager
+
+COUNT = 3000
+
+
+@pytest.fixture(scope='module')
+def path(tmp_path_factory):
+    result = str(tmp_path_factory.mktemp('db') / 'tests.sqlite')
+    createDatabase(result, tests=COUNT, types=20, producers=3)
+    return result
+
+
+@pytest.fixture
+def manager(path):
+    result = DataManager(path)
+    result.FILTER_WINDOW = 500
+    return result
+
+
+@pytest.fixture(scope='module')
+def rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            'SELECT ID, DateTime, OrderNum, Serial, Lease, Well FROM Tests ORDER BY ID DESC'
+        ).fetchall()
+
+
+def _words(value: str) -> list:
+    return re.findall(r'\w+', (value or '').lower())
+
+
+def _hasPhrase(words: list, phrase: list) -> bool:
+    *exact, prefix = phrase
+    return any(
+        words[i:i + len(exact)] == exact and words[i + len(exact)].startswith(prefix)
+        for i in range(len(words) - len(exact))
+    )
+
+
+def _matches(row: tuple, conditions: dict, full_text: bool) -> bool:
+    """проверка строки напрямую (как условия фильтра)"""
+    fields = dict(zip(('ID', 'DateTime', 'OrderNum', 'Serial'), row))
+    texts = row[2:]
+    for key, value in conditions.items():
+        if key == 'Text' and full_text:
+            # каждое слово запроса - фраза из подряд идущих слов поля, последнее - по началу
+            columns = [_words(text) for text in texts]
+            if not all(any(_hasPhrase(words, _words(part)) for words in columns)
+                       for part in value.split()):
+                return False
+        elif key == 'Text':
+            if not any(value in (text or '') for text in texts):
+                return False
+        elif not str(fields[key]).startswith(value):
+            return False
+    return True
+
+
+def _allPages(manager: DataManager, conditions: dict, limit: int) -> list:
+    result, before_id = [], None
+    while True:
+        page = manager.getTestsPage(before_id, limit, conditions)
+        result += page
+        if len(page) < limit:
+            return result
+        before_id = page[-1]['ID']
+
+
+def test_pages_without_filter(manager, rows):
+    page = manager.getTestsPage(limit=50)
+    assert [row['ID'] for row in page] == [row[0] for row in rows[:50]]
+    assert set(page[0]) == {'ID', 'DateTime', 'OrderNum', 'Serial'}
+    assert [row['ID'] for row in _allPages(manager, {}, 700)] == [row[0] for row in rows]
+
+
+@pytest.mark.parametrize('conditions', [
+    {'Serial': 'SN00001'},
+    {'OrderNum': 'ORD-00005'},
+    {'DateTime': '2021-01-01 00:00:1'},
+    {'ID': '12'},
+    {'Serial': 'SN00000', 'DateTime': '2021-01-01 00:00:4', 'OrderNum': ''},
+    {'Text': 'Lease 12'},
+    {'Text': 'W-4'},
+    {'Serial': 'NOTHING'},
+])
+@pytest.mark.parametrize('limit', [7, 200])
+def test_pages_with_filter(manager, rows, conditions, limit):
+    expected = [row[0] for row in rows
+                if _matches(row, {k: v for k, v in conditions.items() if v}, manager.hasFullText)]
+    assert [row['ID'] for row in _allPages(manager, conditions, limit)] == expected
+
+
+def test_text_without_full_text_index(manager, rows):
+    manager._full_text = False
+    expected = [row[0] for row in rows if _matches(row, {'Text': 'Lease 12'}, False)]
+    assert expected
+    assert [row['ID'] for row in _allPages(manager, {'Text': 'Lease 12'}, 100)] == expected
+
+
+def test_cancelled_query_returns_none(manager):
+    cancel = Event()
+    cancel.set()
+    assert manager.getTestsPage(conditions={'Serial': 'SN'}, cancel=cancel) is None
+    assert len(manager.getTestsPage(conditions={'Serial': 'SN'}, cancel=Event())) == 200